@@ -1,39 +1,13 @@
 import os
-import subprocess
 import sys
 import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
-import unicodedata
-import re
 from datetime import datetime
 
-VIDEO_EXTENSIONS = ['mp4', 'mkv', 'avi', 'mov', 'flv', 'wmv', 'm4v', 'webm', 'mpg', 'mpeg', 'ts', 'ogv', '3gp']
-
-def check_ffmpeg():
-    try:
-        subprocess.run(["ffmpeg", "-version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return True
-    except:
-        return False
-
-def sanitize_filename(name):
-    substitutions = {
-        ' ': '_', '＂': '', '"': '', "'": '', '´': '', '`': '',
-        '<': '', '>': '', '?': '', '|': '', '\\': '', '/': '', ':': '',
-        '*': '', '%': '', '&': '', '^': '',
-        'ç': 'c', 'ã': 'a', 'á': 'a', 'à': 'a', 'â': 'a',
-        'é': 'e', 'ê': 'e', 'í': 'i',
-        'ó': 'o', 'ô': 'o', 'õ': 'o',
-        'ú': 'u', 'ü': 'u', 'ñ': 'n',
-        '｜': '', '¦': '', '#': ''
-    }
-    for original, replacement in substitutions.items():
-        name = name.replace(original, replacement)
-    name = unicodedata.normalize('NFKD', name)
-    name = name.encode('ASCII', 'ignore').decode('ASCII')
-    name = re.sub(r'_+', '_', name).strip('_')
-    return name[:200]
+from core import encoders, vertical
+from core.events import EventBus, pump_tk
+from core.media import check_ffmpeg
 
 class VideoConverterApp:
     def __init__(self, root):
@@ -43,9 +17,10 @@ class VideoConverterApp:
         self.root.configure(bg="#f0f0f0")
 
         self.create_widgets()
-        self.video_list = []
-        self.stop_flag = False
-        self.current_process = None
+        self.jobs = []
+        self.ctx = None
+        self.bus = EventBus()
+        pump_tk(self.root, self.bus, self.apply_events)
 
     def create_widgets(self):
         main_frame = tk.Frame(self.root, bg="#f0f0f0")
@@ -66,9 +41,24 @@ class VideoConverterApp:
         tk.Label(mode_frame, text="Modo de conversão:", bg="#f0f0f0", font=("Arial", 12)).pack(side=tk.LEFT)
 
         self.conversion_mode = tk.StringVar(value="vertical_blur")
-        mode_combo = ttk.Combobox(mode_frame, textvariable=self.conversion_mode, values=["vertical_blur", "crop_scale"], state="readonly", width=20)
+        mode_combo = ttk.Combobox(mode_frame, textvariable=self.conversion_mode, values=vertical.MODES, state="readonly", width=20)
         mode_combo.pack(side=tk.LEFT, padx=10)
 
+        tk.Label(mode_frame, text="Simultâneos:", bg="#f0f0f0", font=("Arial", 12)).pack(side=tk.LEFT, padx=(20, 0))
+        self.workers = tk.IntVar(value=1)
+        ttk.Spinbox(mode_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.workers, width=5).pack(side=tk.LEFT, padx=10)
+
+        tk.Label(mode_frame, text="Threads ffmpeg (total, 0=auto):", bg="#f0f0f0", font=("Arial", 12)).pack(side=tk.LEFT, padx=(20, 0))
+        self.thread_budget = tk.IntVar(value=0)
+        ttk.Spinbox(mode_frame, from_=0, to=256, textvariable=self.thread_budget, width=5).pack(side=tk.LEFT, padx=10)
+
+        profile_frame = tk.Frame(main_frame, bg="#f0f0f0")
+        profile_frame.pack(fill=tk.X)
+
+        tk.Label(profile_frame, text="Perfil de encoder:", bg="#f0f0f0", font=("Arial", 12)).pack(side=tk.LEFT)
+        self.profile = tk.StringVar(value="padrão do modo")
+        ttk.Combobox(profile_frame, textvariable=self.profile, values=["padrão do modo", *encoders.PROFILES], state="readonly", width=26).pack(side=tk.LEFT, padx=10)
+
         progress_frame = tk.Frame(main_frame, bg="#f0f0f0")
         progress_frame.pack(fill=tk.X, pady=10)
 
@@ -78,11 +68,10 @@ class VideoConverterApp:
         self.progress_total = ttk.Progressbar(progress_frame, length=700, mode='determinate')
         self.progress_total.pack(fill=tk.X, pady=5)
 
-        self.label_current = tk.Label(progress_frame, text="Progresso do vídeo atual: 0%", bg="#f0f0f0")
-        self.label_current.pack(anchor=tk.W)
-
-        self.progress_current = ttk.Progressbar(progress_frame, length=700, mode='determinate')
-        self.progress_current.pack(fill=tk.X, pady=5)
+        # Uma barra por conversão simultânea
+        self.jobs_frame = tk.Frame(progress_frame, bg="#f0f0f0")
+        self.jobs_frame.pack(fill=tk.X)
+        self.create_job_bars(1)
 
         log_frame = tk.LabelFrame(main_frame, text="Log de Processamento", bg="#f0f0f0")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -90,16 +79,44 @@ class VideoConverterApp:
         self.log_text = scrolledtext.ScrolledText(log_frame, font=("Consolas", 10), bg="black", fg="white", wrap=tk.WORD)
         self.log_text.pack(fill=tk.BOTH, expand=True)
 
-    def log(self, message):
+    def create_job_bars(self, count):
+        for child in self.jobs_frame.winfo_children():
+            child.destroy()
+        self.job_bars = []
+        self.job_slots = {}
+        for _ in range(count):
+            label = tk.Label(self.jobs_frame, text="Aguardando...", bg="#f0f0f0")
+            label.pack(anchor=tk.W)
+            bar = ttk.Progressbar(self.jobs_frame, length=700, mode='determinate')
+            bar.pack(fill=tk.X, pady=2)
+            self.job_bars.append((label, bar))
+
+    def log(self, *messages):
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        self.log_text.insert(tk.END, "".join(f"[{timestamp}] {message}\n" for message in messages))
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
+
+    def apply_events(self, batch):
+        """Aplica de uma vez, na thread do Tk, o que os workers publicaram."""
+        for kind, data in batch.other:
+            if kind == "planned":
+                self.start_progress(data["total"], data["workers"])
+        if batch.logs:
+            self.log(*batch.logs)
+        if batch.progress:
+            self.update_total(*batch.progress)
+        for name, percent in batch.file_progress.items():
+            self.update_progress(percent, name)
+        for kind, data in batch.other:
+            if kind == "finished":
+                self.finish_conversion()
+            elif kind == "nothing_to_do":
+                self.reset_buttons()
+                messagebox.showinfo("Informação", "Todos os vídeos já foram convertidos.")
 
     def stop_conversion(self):
-        self.stop_flag = True
-        if self.current_process:
-            self.current_process.terminate()
+        if self.ctx:
+            self.ctx.cancel()
         self.btn_stop.config(state=tk.DISABLED)
         self.log("Conversão interrompida pelo usuário")
 
@@ -108,145 +125,68 @@ class VideoConverterApp:
         if not folder:
             return
 
-        self.stop_flag = False
+        self.ctx = self.bus.context()
         self.btn_select.config(state=tk.DISABLED)
         self.btn_stop.config(state=tk.NORMAL)
 
         self.log(f"Pasta selecionada: {folder}")
 
         self.converted_dir = os.path.join(folder, "converted")
-        os.makedirs(self.converted_dir, exist_ok=True)
-        self.log(f"Pasta de saída: {self.converted_dir}")
-
-        all_videos = [f for f in os.listdir(folder) if os.path.isfile(os.path.join(folder, f)) and f.split('.')[-1].lower() in VIDEO_EXTENSIONS]
-
-        self.video_list = []
-        for video in all_videos:
-            base_name, ext = os.path.splitext(video)
-            output_path = os.path.join(self.converted_dir, f"{sanitize_filename(base_name)}_vertical{ext}")
-            if not os.path.exists(output_path):
-                self.video_list.append(video)
-            else:
-                self.log(f"Arquivo já convertido, pulando: {video}")
-
-        if not self.video_list:
-            messagebox.showinfo("Informação", "Todos os vídeos já foram convertidos.")
-            self.btn_select.config(state=tk.NORMAL)
-            self.btn_stop.config(state=tk.DISABLED)
+        profile = self.profile.get() if self.profile.get() in encoders.PROFILES else None
+        args = (folder, self.conversion_mode.get(), profile, self.workers.get(), self.thread_budget.get())
+        threading.Thread(target=self.process_videos, args=args, daemon=True).start()
+
+    def process_videos(self, folder, mode, profile, workers, thread_budget):
+        # O planejamento (com o hash de duplicados) lê os vídeos: fica fora da thread do Tk
+        self.jobs = vertical.plan_folder(folder, self.ctx, mode, profile)
+        if not self.jobs:
+            self.bus.emit("nothing_to_do")
             return
+        self.ctx.log(f"Total de vídeos para converter: {len(self.jobs)}")
+        self.bus.emit("planned", total=len(self.jobs), workers=workers)
+        vertical.process_videos(self.jobs, self.ctx, workers, thread_budget)
+        self.bus.emit("finished")
 
-        self.log(f"Total de vídeos para converter: {len(self.video_list)}")
-
-        self.folder = folder
-        self.progress_total['maximum'] = len(self.video_list)
+    def start_progress(self, total, workers):
+        self.progress_total['maximum'] = total
         self.progress_total['value'] = 0
-        self.progress_current['value'] = 0
-        self.label_total.config(text=f"Progresso geral: 0/{len(self.video_list)}")
-        self.label_current.config(text="Progresso do vídeo atual: 0%")
+        self.label_total.config(text=f"Progresso geral: 0/{total}")
+        self.create_job_bars(max(1, workers))
 
-        threading.Thread(target=self.process_videos, daemon=True).start()
-
-    def process_videos(self):
-        for i, video in enumerate(self.video_list, start=1):
-            if self.stop_flag:
-                break
-
-            self.label_total.config(text=f"Progresso geral: {i-1}/{len(self.video_list)}")
-            input_path = os.path.join(self.folder, video)
-            base_name, ext = os.path.splitext(video)
-            output_path = os.path.join(self.converted_dir, f"{sanitize_filename(base_name)}_vertical{ext}")
-
-            self.log(f"\nIniciando conversão: {video} → {os.path.basename(output_path)}")
-            success = self.convert_video(input_path, output_path)
-
-            if success:
-                self.log(f"Conversão concluída: {video}")
-            else:
-                self.log(f"Falha ao converter: {video}")
-
-            self.progress_total['value'] = i
-            self.label_total.config(text=f"Progresso geral: {i}/{len(self.video_list)}")
-
-        self.label_current.config(text="Progresso do vídeo atual: 100%")
-        self.progress_current['value'] = 0
+    def reset_buttons(self):
         self.btn_select.config(state=tk.NORMAL)
         self.btn_stop.config(state=tk.DISABLED)
 
-        if not self.stop_flag:
+    def finish_conversion(self):
+        for label, bar in self.job_bars:
+            label.config(text="Aguardando...")
+            bar['value'] = 0
+        self.reset_buttons()
+
+        if not self.ctx.cancelled:
             self.log("\nConversão concluída com sucesso!")
             messagebox.showinfo("Finalizado", f"Todos os vídeos foram processados.\nSaída: {self.converted_dir}")
         else:
             self.log("\nProcesso interrompido pelo usuário")
 
-    def update_progress(self, current_time, total_duration):
-        try:
-            def time_to_seconds(t):
-                h, m, s = t.split(':')
-                return int(h)*3600 + int(m)*60 + float(s)
-
-            current = time_to_seconds(current_time)
-            total = time_to_seconds(total_duration)
-
-            percent = (current / total) * 100
-            self.progress_current['value'] = percent
-            self.label_current.config(text=f"Progresso do vídeo atual: {int(percent)}%")
-            self.root.update_idletasks()
-        except:
-            pass
-
-    def convert_video(self, input_path, output_path):
-        try:
-            if not os.path.exists(input_path):
-                self.log(f"Erro: Arquivo de entrada não encontrado: {input_path}")
-                return False
-
-            mode = self.conversion_mode.get()
-
-            if mode == "vertical_blur":
-                command = [
-                    "ffmpeg", "-y", "-i", input_path,
-                    "-filter_complex",
-                    "[0:v]scale=1080:1920:force_original_aspect_ratio=increase,boxblur=20:5[bg];"
-                    "[0:v]scale=1080:1920:force_original_aspect_ratio=decrease[fg];"
-                    "[bg][fg]overlay=(W-w)/2:(H-h)/2,crop=1080:1920",
-                    "-c:a", "copy", "-movflags", "+faststart",
-                    "-preset", "fast", "-crf", "23",
-                    output_path
-                ]
-            else:
-                vf_filter = "scale=-2:1920,crop='if(gt(iw,1080),1080,iw)':1920"
-                command = [
-                    "ffmpeg", "-y", "-i", input_path,
-                    "-vf", vf_filter,
-                    "-c:v", "libx264", "-preset", "fast", "-b:v", "5000k",
-                    "-c:a", "aac", "-b:a", "192k",
-                    "-movflags", "+faststart", "-shortest",
-                    output_path
-                ]
-
-            self.current_process = subprocess.Popen(command, stderr=subprocess.PIPE, universal_newlines=True, bufsize=1)
-
-            duration = None
-            for line in self.current_process.stderr:
-                if self.stop_flag:
-                    self.current_process.terminate()
-                    return False
-
-                if "Duration:" in line:
-                    duration = line.split("Duration:")[1].split(",")[0].strip()
-                elif "time=" in line:
-                    time = line.split("time=")[1].split(" ")[0]
-                    if duration:
-                        self.update_progress(time, duration)
-
-            self.current_process.wait()
-            return self.current_process.returncode == 0
-
-        except Exception as e:
-            self.log(f"Erro na conversão: {str(e)}")
-            return False
-        finally:
-            self.current_process = None
+    def update_total(self, done, total, label=None):
+        self.progress_total['value'] = done
+        self.label_total.config(text=f"Progresso geral: {done}/{total}")
+
+    def update_progress(self, percent, name=None):
+        slot = self.job_slots.get(name)
+        if slot is None:
+            busy = set(self.job_slots.values())
+            free = [i for i in range(len(self.job_bars)) if i not in busy]
+            if not free:
+                return
+            slot = self.job_slots[name] = free[0]
+
+        label, bar = self.job_bars[slot]
+        bar['value'] = percent
+        label.config(text=f"{name}: {int(percent)}%")
+        if percent >= 100:
+            del self.job_slots[name]
 
 if __name__ == "__main__":
     if not check_ffmpeg():
@@ -0,0 +1,9 @@
+"""Núcleo headless do pipeline de shorts.
+
+Toda a lógica de ffprobe/ffmpeg/Whisper fica aqui, sem depender de Tkinter;
+os scripts `*_gui.py` são apenas front-ends e `python -m core` roda os mesmos
+estágios pela linha de comando (cron, workers).
+"""
+from .jobs import JobContext
+
+__all__ = ["JobContext"]
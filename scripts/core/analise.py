@@ -0,0 +1,203 @@
+import collections
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+from dataclasses import asdict, dataclass, field
+
+from .probe import CACHE_DIR
+from .runner import STDERR_TAIL
+
+LIMIAR_CENA_MINIMO = 0.1  # o que fica guardado; o limiar de uso é escolhido depois
+LIMIAR_CENA = 0.3  # score de mudança de cena (0-1) que conta como corte
+SILENCIO_DB = -35  # abaixo disso (dBFS) é silêncio
+SILENCIO_MINIMO = 0.3  # segundos
+LARGURA_ANALISE = 160  # a detecção de cena roda numa cópia reduzida do vídeo
+TAXA_ENERGIA = 8000  # o RMS por segundo é medido com o áudio reamostrado para cá
+RMS_MINIMO_DB = -90.0  # valor usado para segundos de silêncio digital (-inf)
+
+_RE_FILTRO = re.compile(r"^\[(\S+) @ \S+\]")
+_RE_PTS = re.compile(r"pts_time:([0-9.]+)")
+_RE_SCORE = re.compile(r"lavfi\.scene_score=([0-9.]+)")
+_RE_RMS = re.compile(r"lavfi\.astats\.Overall\.RMS_level=(\S+)")
+_RE_SILENCIO = re.compile(r"silence_(start|end): (-?[0-9.]+)")
+
+
+@dataclass
+class Analise:
+    cenas: list = field(default_factory=list)  # [(tempo, score)]
+    silencios: list = field(default_factory=list)  # [(início, fim)]
+    energia: list = field(default_factory=list)  # RMS do áudio (dBFS) de cada segundo
+    movimento: list = field(default_factory=list)  # score de cena médio de cada segundo
+
+    def cortes_de_cena(self, limiar=LIMIAR_CENA):
+        return [tempo for tempo, score in self.cenas if score >= limiar]
+
+    def meios_de_silencio(self):
+        return [(inicio + fim) / 2 for inicio, fim in self.silencios]
+
+
+def comando_analise(video_path, tem_video=True, tem_audio=True):
+    """Um único ffmpeg que decodifica vídeo e áudio juntos, tudo medido no stderr:
+
+    - `select`+`metadata` imprimem o score de cena de cada quadro;
+    - `silencedetect` marca os silêncios;
+    - `astats` em blocos de um segundo dá o RMS do áudio segundo a segundo.
+    """
+    grafos, mapas = [], []
+    if tem_video:
+        grafos.append(
+            f"[0:v]scale={LARGURA_ANALISE}:-2,select='gte(scene,0)',metadata=print:key=lavfi.scene_score[v]"
+        )
+        mapas += ["-map", "[v]"]
+    if tem_audio:
+        grafos.append(
+            f"[0:a]silencedetect=noise={SILENCIO_DB}dB:d={SILENCIO_MINIMO},"
+            f"aresample={TAXA_ENERGIA},asetnsamples=n={TAXA_ENERGIA},"
+            "astats=metadata=1:reset=1,ametadata=print:key=lavfi.astats.Overall.RMS_level[a]"
+        )
+        mapas += ["-map", "[a]"]
+    return [
+        "ffmpeg", "-nostdin", "-nostats", "-hide_banner", "-i", str(video_path),
+        "-filter_complex", ";".join(grafos), *mapas, "-f", "null", "-"
+    ]
+
+
+def ler_saida(linhas, duracao=None):
+    """Extrai cenas, silêncios e as séries por segundo das linhas de log do ffmpeg.
+
+    `linhas` é consumido à medida que chega (o stderr do processo): o score de
+    cada quadro vai direto para o balde do seu segundo, sem guardar o log.
+    Vídeo e áudio são filtrados em paralelo, então as linhas dos dois se
+    misturam: o `pts_time` de cada quadro é guardado por instância de filtro.
+    """
+    analise = Analise()
+    segundos = int(duracao or 0) + 1
+    pts = {}
+    soma_cena, quadros, energia = [0.0] * segundos, [0] * segundos, [None] * segundos
+    inicio = None
+    for linha in linhas:
+        filtro = _RE_FILTRO.match(linha)
+        filtro = filtro.group(1) if filtro else ""
+        quadro = _RE_PTS.search(linha)
+        score = _RE_SCORE.search(linha)
+        nivel = _RE_RMS.search(linha)
+        silencio = _RE_SILENCIO.search(linha)
+        if quadro:
+            pts[filtro] = float(quadro.group(1))
+        elif score and filtro in pts:
+            tempo, valor = pts.pop(filtro), float(score.group(1))
+            if valor > LIMIAR_CENA_MINIMO:
+                analise.cenas.append((tempo, round(valor, 4)))
+            balde = min(segundos - 1, max(0, int(tempo)))
+            soma_cena[balde] += valor
+            quadros[balde] += 1
+        elif nivel and filtro in pts:
+            try:
+                db = max(RMS_MINIMO_DB, float(nivel.group(1)))
+            except ValueError:  # "-inf"
+                db = RMS_MINIMO_DB
+            balde = min(segundos - 1, max(0, int(pts.pop(filtro))))
+            energia[balde] = db if energia[balde] is None else max(energia[balde], db)
+        elif silencio:
+            if silencio.group(1) == "start":
+                inicio = max(0.0, float(silencio.group(2)))
+            elif inicio is not None:
+                analise.silencios.append((inicio, float(silencio.group(2))))
+                inicio = None
+    if inicio is not None and duracao:
+        # Silêncio que vai até o fim do arquivo não tem silence_end
+        analise.silencios.append((inicio, duracao))
+
+    if any(v is not None for v in energia):
+        analise.energia = [RMS_MINIMO_DB if v is None else round(v, 4) for v in energia]
+    if any(quadros):
+        analise.movimento = [round(soma / n, 4) if n else 0.0 for soma, n in zip(soma_cena, quadros)]
+    return analise
+
+
+class AnaliseCache:
+    """Cenas e silêncios já analisados, por caminho/tamanho/mtime do vídeo.
+
+    A análise não depende da duração dos trechos, então redividir o mesmo
+    vídeo com outro limite não decodifica nada de novo.
+    """
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db_path = os.path.join(CACHE_DIR, "analise.sqlite")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analise ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, dados TEXT)"
+        )
+        self._conn.commit()
+
+    def get(self, path, stat):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dados FROM analise WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if not row:
+            return None
+        dados = json.loads(row[0])
+        if "energia" not in dados:
+            return None  # análise de uma versão anterior, sem as séries por segundo
+        return Analise(
+            [tuple(c) for c in dados["cenas"]], [tuple(s) for s in dados["silencios"]],
+            dados["energia"], dados["movimento"]
+        )
+
+    def put(self, path, stat, analise):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analise (path, size, mtime_ns, dados) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, json.dumps(asdict(analise))),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _guardando(linhas, cauda):
+    for linha in linhas:
+        cauda.append(linha)
+        yield linha
+
+
+def analisar(video_path, info, ctx, cache=None):
+    """Cenas, silêncios e séries por segundo de `video_path`, do cache ou de uma única decodificação."""
+    path = os.path.abspath(str(video_path))
+    stat = os.stat(path)
+    if cache:
+        analise = cache.get(path, stat)
+        if analise is not None:
+            return analise
+
+    if not (info.has_video or info.has_audio):
+        return Analise()
+    ctx.log(f"Analisando cenas e silêncios: {os.path.basename(path)}")
+    cmd = comando_analise(path, info.has_video, info.has_audio)
+    # O metadata=print escreve uma linha por quadro: o stderr é lido em
+    # streaming, e só as últimas linhas ficam guardadas para o erro.
+    processo = ctx.popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="replace")
+    cauda = collections.deque(maxlen=STDERR_TAIL)
+    try:
+        analise = ler_saida(_guardando(processo.stderr, cauda), info.duration)
+        processo.wait()
+    finally:
+        ctx.release(processo)
+    if processo.returncode != 0:
+        raise subprocess.CalledProcessError(processo.returncode, cmd, stderr="".join(cauda))
+    if cache:
+        cache.put(path, stat, analise)
+    return analise
@@ -0,0 +1,185 @@
+import os
+import re
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import encoders
+from .vertical import BLUR_MODES, blur_graph
+
+FRAME_RE = re.compile(r"frame=\s*(\d+)")
+
+
+@dataclass
+class BenchResult:
+    input_path: str
+    mode: str
+    frames: int
+    seconds: float
+
+    @property
+    def fps(self):
+        return self.frames / self.seconds if self.seconds else 0.0
+
+
+def bench_blur(input_path, mode, ctx, duration=10, threads=0):
+    """Mede só o grafo de fundo de `mode` (saída descartada, sem encoder)."""
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-y",
+        "-t", str(duration), "-i", str(input_path),
+        "-filter_complex", blur_graph(mode),
+        *(["-threads", str(threads)] if threads else []),
+        "-an", "-f", "null", "-"
+    ]
+    start = time.perf_counter()
+    process = ctx.run(cmd, text=True)
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise Exception(f"FFmpeg erro: {process.stderr[-500:]}")
+    frames = FRAME_RE.findall(process.stderr)
+    return BenchResult(str(input_path), mode, int(frames[-1]) if frames else 0, elapsed)
+
+
+def run_blur_benchmark(inputs, ctx, modes=BLUR_MODES, duration=10, threads=0):
+    """Roda cada modo de blur em cada vídeo de amostra e registra quadros/s."""
+    results = []
+    for input_path in inputs:
+        for mode in modes:
+            if ctx.cancelled:
+                return results
+            result = bench_blur(input_path, mode, ctx, duration, threads)
+            ctx.log(f"{Path(input_path).name:<30} {mode:<22} {result.frames:>6} quadros  {result.fps:8.1f} q/s")
+            results.append(result)
+
+    baseline = {r.input_path: r.fps for r in results if r.mode == "vertical_blur"}
+    for r in results:
+        if r.mode != "vertical_blur" and baseline.get(r.input_path):
+            ctx.log(f"{Path(r.input_path).name}: {r.mode} {r.fps / baseline[r.input_path]:.1f}x o vertical_blur")
+    return results
+
+
+# Clipes sintéticos em 1080x1920: gráficos em movimento, detalhe fino e ruído (grão)
+CORPUS_RATE = 30
+SYNTHETIC_SOURCES = {
+    "testsrc2": f"testsrc2=size=1080x1920:rate={CORPUS_RATE}",
+    "mandelbrot": f"mandelbrot=size=1080x1920:rate={CORPUS_RATE}",
+    "ruido": f"smptehdbars=size=1080x1920:rate={CORPUS_RATE},noise=alls=25:allf=t+u",
+}
+SSIM_RE = re.compile(r"SSIM .*All:([0-9.]+)")
+VMAF_RE = re.compile(r"VMAF score[:=]\s*([0-9.]+)")
+
+
+@dataclass
+class ProfileResult:
+    profile: str
+    clip: str
+    duration: float
+    seconds: float
+    size: int
+    ssim: float = None
+    vmaf: float = None
+
+    @property
+    def fps(self):
+        return self.duration * CORPUS_RATE / self.seconds if self.seconds else 0.0
+
+    @property
+    def seconds_per_minute(self):
+        """Tempo de encode por minuto de vídeo: o custo de cada short."""
+        return self.seconds / self.duration * 60
+
+    @property
+    def mb_per_minute(self):
+        return self.size / 1e6 / self.duration * 60
+
+
+def has_filter(name):
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-filters"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return any(line.split()[1:2] == [name] for line in result.stdout.splitlines())
+
+
+def make_corpus(folder, ctx, duration=5):
+    """Gera (uma vez) os clipes de referência sem perdas em `folder`."""
+    os.makedirs(folder, exist_ok=True)
+    clips = []
+    for name, source in SYNTHETIC_SOURCES.items():
+        path = os.path.join(folder, f"{name}_{duration:g}s.mkv")
+        if not os.path.exists(path):
+            cmd = [
+                "ffmpeg", "-nostdin", "-y", "-f", "lavfi", "-i", f"{source}:duration={duration}",
+                "-c:v", "libx264", "-qp", "0", "-preset", "ultrafast", "-pix_fmt", "yuv420p", path
+            ]
+            process = ctx.run(cmd, text=True)
+            if process.returncode != 0:
+                raise Exception(f"FFmpeg erro: {process.stderr[-500:]}")
+        clips.append(path)
+    return clips
+
+
+def measure_quality(encoded, reference, ctx, vmaf=False):
+    """SSIM (e VMAF, se pedido) da saída contra a referência sem perdas."""
+    metrics = "[0:v][1:v]ssim" + (";[0:v][1:v]libvmaf" if vmaf else "")
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-i", encoded, "-i", reference, "-lavfi", metrics, "-f", "null", "-"]
+    process = ctx.run(cmd, text=True)
+    ssim = SSIM_RE.search(process.stderr)
+    score = VMAF_RE.search(process.stderr)
+    return float(ssim.group(1)) if ssim else None, float(score.group(1)) if score else None
+
+
+def bench_profile(profile, clip, ctx, workdir, duration, threads=0, vmaf=False):
+    output = os.path.join(workdir, f"{Path(clip).stem}.{profile.name}.mp4")
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-i", clip, *profile.video_args(),
+        *(["-threads", str(threads)] if threads else []), "-an", output
+    ]
+    passlog = output + ".passlog"
+    start = time.perf_counter()
+    try:
+        for step in encoders.pass_commands(profile, cmd, passlog):
+            process = ctx.run(step, text=True)
+            if process.returncode != 0:
+                raise Exception(f"FFmpeg erro: {process.stderr[-500:]}")
+    finally:
+        encoders.remove_passlog(passlog)
+    elapsed = time.perf_counter() - start
+
+    ssim, score = measure_quality(output, clip, ctx, vmaf)
+    result = ProfileResult(profile.name, Path(clip).stem, duration, elapsed, os.path.getsize(output), ssim, score)
+    os.remove(output)
+    return result
+
+
+def run_profile_benchmark(names, ctx, folder, duration=5, threads=0):
+    """Codifica o corpus sintético com cada perfil e resume velocidade, tamanho e qualidade.
+
+    O VMAF só é medido se o ffmpeg tiver o filtro libvmaf; o SSIM sempre.
+    """
+    clips = make_corpus(folder, ctx, duration)
+    vmaf = has_filter("libvmaf")
+    if not vmaf:
+        ctx.log("libvmaf não disponível no ffmpeg; medindo só SSIM.")
+
+    results = []
+    for name in names:
+        profile = encoders.get_profile(name)
+        for clip in clips:
+            if ctx.cancelled:
+                return results
+            results.append(bench_profile(profile, clip, ctx, folder, duration, threads, vmaf))
+
+    ctx.log(f"{'perfil':<26} {'q/s':>7} {'s/min':>7} {'MB/min':>7} {'SSIM':>7} {'VMAF':>6}")
+    for name in names:
+        rows = [r for r in results if r.profile == name]
+        if not rows:
+            continue
+        ssims = [r.ssim for r in rows if r.ssim is not None]
+        vmafs = [r.vmaf for r in rows if r.vmaf is not None]
+        ctx.log(
+            f"{name:<26} {sum(r.fps for r in rows) / len(rows):7.1f} "
+            f"{sum(r.seconds_per_minute for r in rows) / len(rows):7.1f} "
+            f"{sum(r.mb_per_minute for r in rows) / len(rows):7.1f} "
+            f"{sum(ssims) / len(ssims) if ssims else float('nan'):7.4f} "
+            f"{sum(vmafs) / len(vmafs) if vmafs else float('nan'):6.1f}"
+        )
+    return results
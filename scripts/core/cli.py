@@ -0,0 +1,333 @@
+"""Entrada de linha de comando dos estágios do pipeline (sem Tk/display).
+
+Uso, a partir da pasta `scripts`:
+
+    python -m core converter PASTA [--modo vertical_blur|vertical_blur_fast|vertical_blur_still|crop_scale] [--paralelo N] [--threads N] [--sempre-recodificar] [--perfil NOME]
+    python -m core trechos PASTA [--duracao 3:00] [--corte copia|segmentos|preciso] [--ajustar [SEGUNDOS]] [--destaques N]
+    python -m core shorts PASTA_AUDIOS PASTA_VIDEOS [--resolucao 1080x1920] [--semente N] [--paralelo N] [--pool]
+    python -m core pool PASTA_VIDEOS [--resolucao 1080x1920]
+    python -m core legendar PASTA [--modelo small] [--fonte Arial] ...
+    python -m core tts PASTA --voz pt-BR-AntonioNeural [--paralelo 4]
+    python -m core duracao PASTA [--maximo 180] [--paralelo 8] [--relatorio saida.csv]
+    python -m core benchmark VIDEO [VIDEO ...] [--segundos 10] [--threads N]
+    python -m core baixar URL [URL ...] --pasta DIR [--formato mp4|mp3] [--paralelo 3] [--fragmentos 4] [--limite 2M] [--sincronizar]
+    python -m core perfis [--listar] [--perfis NOME ...] [--segundos 5] [--pasta DIR]
+    python -m core duplicados PASTA [--perceptual]
+    python -m core pipeline VIDEO [VIDEO ...] [--duracao 3:00] [--modo vertical_blur_fast] [--srt ARQUIVO] [--sem-legenda] [--ajustar [SEGUNDOS]]
+
+`converter`, `shorts`, `legendar` e `tts` aceitam `--retomar` (ou `--resume`) para
+refazer só os itens que o journal da pasta de saída marca como pendentes ou com falha.
+Com `python -m core --json <estágio> ...`, log e progresso saem como JSON (um evento por linha).
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+from . import benchmark, dedup, downloads, duracao, encoders, legendas, pipeline, shorts, trechos, tts, vertical
+from .events import EventBus, JsonLinesSink
+from .jobs import JobContext
+from .media import AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, check_ffmpeg, list_media
+from .probe import CACHE_DIR
+
+
+def cmd_converter(args, ctx):
+    if args.perfil:
+        encoders.get_profile(args.perfil)
+    jobs = vertical.plan_folder(args.pasta, ctx, args.modo, args.perfil, args.retomar)
+    if not jobs:
+        ctx.log("Todos os vídeos já foram convertidos.")
+        return 0
+    ctx.log(f"Total de vídeos para converter: {len(jobs)}")
+    for job in jobs:
+        job.fast_path = not args.sempre_recodificar
+    done = vertical.process_videos(jobs, ctx, args.paralelo, args.threads)
+    return 0 if done == len(jobs) else 1
+
+
+def cmd_trechos(args, ctx):
+    trechos.process_folder(args.pasta, trechos.parse_duration(args.duracao), ctx, args.corte, args.ajustar, args.destaques)
+    return 0
+
+
+def cmd_shorts(args, ctx):
+    encoders.get_profile(args.perfil)
+    batch = shorts.ShortsBatch(
+        args.audios, args.videos, shorts.parse_resolution(args.resolucao),
+        seed=args.semente, workers=args.paralelo, threads_per_job=args.threads, use_pool=args.pool,
+        profile=args.perfil, resume=args.retomar
+    )
+    return 0 if shorts.generate_shorts(batch, ctx) else 1
+
+
+def cmd_pool(args, ctx):
+    encoders.get_profile(args.perfil)
+    resolution = shorts.parse_resolution(args.resolucao)
+    ready = shorts.prepare_pool(args.videos, resolution, ctx, args.paralelo, args.threads, args.perfil)
+    ctx.log(f"🧰 Pool pronto: {len(ready)} fundo(s) em {shorts.pool_folder(args.videos, resolution)}")
+    return 0 if ready else 1
+
+
+def cmd_legendar(args, ctx):
+    estilo = legendas.EstiloLegenda(args.fonte, args.tamanho, args.cor, args.posicao)
+    return 0 if legendas.processar_pasta(args.pasta, ctx, args.modelo, estilo, args.renderizador, args.idioma, args.refazer, not args.sem_vad, args.retomar) else 1
+
+
+def cmd_duracao(args, ctx):
+    relatorio = duracao.verificar_videos(args.pasta, args.maximo, ctx, args.paralelo, args.relatorio)
+    return 1 if relatorio["erros"] else 0
+
+
+def cmd_tts(args, ctx):
+    arquivos = tts.listar_textos(args.pasta)
+    if not arquivos and not args.retomar:
+        ctx.log("ℹ️ Nenhum arquivo encontrado para conversão.")
+        return 0
+    sintetizar = tts.sintetizador_edge(args.voz, tts.formatar_velocidade(args.velocidade))
+    resumo = asyncio.run(tts.converter_lote(
+        arquivos, os.path.join(args.pasta, "audios_gerados"), sintetizar, ctx,
+        max_simultaneos=args.paralelo, tentativas=args.tentativas, retomar=args.retomar
+    ))
+    ctx.log(f"🎉 Conversão finalizada! {resumo}")
+    return 1 if resumo.get("erro") else 0
+
+
+def cmd_baixar(args, ctx):
+    if args.formato == "mp3" and not check_ffmpeg():
+        ctx.log("FFmpeg não encontrado: necessário para extrair o MP3.")
+        return 2
+    os.makedirs(args.pasta, exist_ok=True)
+    resumo = downloads.download(
+        args.urls, args.pasta, ctx, args.formato, args.paralelo, downloads.parse_rate(args.limite), args.fragmentos,
+        args.sincronizar
+    )
+    ctx.log(f"📥 Download finalizado: {resumo['downloaded']} arquivo(s) de {resumo['entries']} entrada(s)"
+            + (f", {resumo['converted']} convertido(s) para MP3" if args.formato == "mp3" else ""))
+    return 1 if resumo["errors"] else 0
+
+
+def cmd_benchmark(args, ctx):
+    results = benchmark.run_blur_benchmark(args.videos, ctx, args.modos, args.segundos, args.threads)
+    return 0 if results else 1
+
+
+def cmd_perfis(args, ctx):
+    if args.listar:
+        disponiveis = encoders.available_profiles()
+        for name, profile in encoders.PROFILES.items():
+            ctx.log(f"{name:<26} {profile.describe()}" + ("" if name in disponiveis else "  [encoder ausente]"))
+        return 0
+    names = args.perfis or encoders.available_profiles()
+    results = benchmark.run_profile_benchmark(names, ctx, args.pasta, args.segundos, args.threads)
+    return 0 if results else 1
+
+
+def cmd_duplicados(args, ctx):
+    if args.perceptual and not check_ffmpeg():
+        ctx.log("FFmpeg não encontrado: necessário para a comparação perceptual.")
+        return 2
+    index = dedup.default_index() or dedup.DedupIndex()
+    index.perceptual = args.perceptual
+    paths = [os.path.join(args.pasta, f) for f in list_media(args.pasta, VIDEO_EXTENSIONS + AUDIO_EXTENSIONS)]
+    grupos = dedup.find_duplicates(paths, index)
+    recuperavel = 0
+    for original, copias in grupos.items():
+        ctx.log(f"🟰 {os.path.basename(original)}")
+        for copia in copias:
+            recuperavel += os.path.getsize(copia)
+            ctx.log(f"    {os.path.basename(copia)}")
+    ctx.log(f"{sum(len(c) for c in grupos.values())} cópia(s) em {len(grupos)} grupo(s), "
+            f"{recuperavel / 1024 ** 2:.1f} MB recuperáveis.")
+    for estagio, total in sorted(index.savings().items()):
+        ctx.log(f"Já pulado em '{estagio}': {total['itens']} item(ns), {total['segundos'] / 60:.1f} min, "
+                f"{total['bytes'] / 1024 ** 2:.1f} MB")
+    return 0
+
+
+def cmd_pipeline(args, ctx):
+    if args.srt and len(args.videos) > 1:
+        raise ValueError("--srt só vale para um único vídeo.")
+    if encoders.PROFILES[args.perfil].two_pass:
+        raise ValueError(f"O perfil {args.perfil} usa 2 passagens; escolha um perfil de passagem única.")
+    estilo = None if args.sem_legenda else legendas.EstiloLegenda(args.fonte, args.tamanho, args.cor, args.posicao)
+    falhas = 0
+    ctx.progress(0, len(args.videos))
+    for i, video in enumerate(args.videos, start=1):
+        if ctx.cancelled:
+            break
+        job = pipeline.PipelineJob(
+            video, args.pasta or os.path.join(os.path.dirname(os.path.abspath(video)), "prontos"),
+            trechos.parse_duration(args.duracao), args.modo, args.modelo, args.idioma, not args.sem_vad, args.srt,
+            estilo, args.ajustar, args.perfil, args.threads
+        )
+        try:
+            pipeline.render(job, ctx)
+        except Exception as e:
+            # Um vídeo ruim (probe, análise, transcrição ou render) não derruba o lote
+            ctx.log(f"❌ Erro ao processar {os.path.basename(video)}: {e}")
+            falhas += 1
+        ctx.progress(i, len(args.videos))
+    return 1 if falhas or ctx.cancelled else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core", description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="emite log e progresso como JSON, um evento por linha")
+    sub = parser.add_subparsers(dest="estagio", required=True)
+
+    p = sub.add_parser("converter", help="converte vídeos para vertical 1080x1920")
+    p.add_argument("pasta")
+    p.add_argument("--modo", choices=vertical.MODES, default="vertical_blur")
+    p.add_argument("--paralelo", type=int, default=1, help="conversões simultâneas (padrão: 1)")
+    p.add_argument("--threads", type=int, default=0, help="total de threads do ffmpeg somando todas as conversões (0 = automático)")
+    p.add_argument("--sempre-recodificar", action="store_true", help="não copia streams que já estão no formato alvo")
+    p.add_argument("--perfil", choices=encoders.PROFILES, metavar="NOME", help="perfil de encoder (padrão: depende do modo)")
+    p.add_argument("--retomar", "--resume", action="store_true", help="refaz só o que ficou pendente ou falhou no lote anterior")
+    p.set_defaults(func=cmd_converter)
+
+    p = sub.add_parser("trechos", help="divide vídeos em trechos de duração máxima")
+    p.add_argument("pasta")
+    p.add_argument("--duracao", default="3", help="minutos ou mm:ss (padrão: 3)")
+    p.add_argument("--corte", choices=trechos.MODOS, default="copia",
+                   help="copia: um ffmpeg por trecho; segmentos: um único ffmpeg, cortes nos keyframes; "
+                        "preciso: corte exato recodificando só o início de cada trecho")
+    p.add_argument("--ajustar", type=float, nargs="?", const=trechos.TOLERANCIA_PADRAO, default=0, metavar="SEGUNDOS",
+                   help="recua cada corte até um silêncio ou corte de cena a até SEGUNDOS do limite "
+                        f"(padrão: {trechos.TOLERANCIA_PADRAO}); a análise fica em cache")
+    p.add_argument("--destaques", type=int, default=0, metavar="N",
+                   help="gera só as N janelas de maior energia, fala e movimento de cada vídeo (0 = todos os trechos)")
+    p.set_defaults(func=cmd_trechos)
+
+    p = sub.add_parser("shorts", help="junta áudios com trechos aleatórios de vídeos de fundo")
+    p.add_argument("audios")
+    p.add_argument("videos")
+    p.add_argument("--resolucao", choices=shorts.RESOLUTIONS, default="1080x1920")
+    p.add_argument("--semente", type=int, help="semente do sorteio dos fundos (reproduz um lote anterior)")
+    p.add_argument("--paralelo", type=int, default=0, help="encodes simultâneos (0 = pelos núcleos)")
+    p.add_argument("--threads", type=int, default=0, help="threads de cada ffmpeg (0 = automático)")
+    p.add_argument("--pool", action="store_true", help="usa (e prepara, se preciso) fundos pré-normalizados")
+    p.add_argument("--perfil", choices=encoders.PROFILES, metavar="NOME", default=encoders.DEFAULT_ABR, help="perfil de encoder")
+    p.add_argument("--retomar", "--resume", action="store_true", help="refaz só o que ficou pendente ou falhou no lote anterior")
+    p.set_defaults(func=cmd_shorts)
+
+    p = sub.add_parser("pool", help="pré-normaliza os vídeos de fundo para uma resolução")
+    p.add_argument("videos")
+    p.add_argument("--resolucao", choices=shorts.RESOLUTIONS, default="1080x1920")
+    p.add_argument("--paralelo", type=int, default=0, help="encodes simultâneos (0 = pelos núcleos)")
+    p.add_argument("--threads", type=int, default=0, help="threads de cada ffmpeg (0 = automático)")
+    p.add_argument("--perfil", choices=encoders.PROFILES, metavar="NOME", default=encoders.DEFAULT_ABR, help="perfil de encoder")
+    p.set_defaults(func=cmd_pool)
+
+    padrao = legendas.EstiloLegenda()
+    p = sub.add_parser("legendar", help="transcreve com Whisper e aplica legendas")
+    p.add_argument("pasta")
+    p.add_argument("--modelo", choices=legendas.MODELOS_WHISPER, default="small")
+    p.add_argument("--fonte", default=padrao.fonte)
+    p.add_argument("--tamanho", type=int, default=padrao.tamanho)
+    p.add_argument("--cor", default=padrao.cor)
+    p.add_argument("--posicao", type=int, default=padrao.posicao_vertical, help="0=topo, 100=base")
+    p.add_argument("--refazer", action="store_true", help="renderiza de novo vídeos já legendados (ex.: novo estilo)")
+    p.add_argument("--sem-vad", action="store_true", help="transcreve o áudio inteiro, sem pular silêncios")
+    p.add_argument("--idioma", help="código do idioma para o Whisper (ex.: pt); padrão: detecção automática")
+    p.add_argument("--renderizador", choices=legendas.RENDERIZADORES, default="ass",
+                   help="ass: queima com ffmpeg (padrão); moviepy: TextClip/ImageMagick")
+    p.add_argument("--retomar", "--resume", action="store_true", help="refaz só o que ficou pendente ou falhou no lote anterior")
+    p.set_defaults(func=cmd_legendar)
+
+    p = sub.add_parser("pipeline", help="vertical, legenda e trechos de cada vídeo numa única decodificação")
+    p.add_argument("videos", nargs="+")
+    p.add_argument("--pasta", help="pasta de saída (padrão: 'prontos' ao lado de cada vídeo)")
+    p.add_argument("--duracao", default="3", help="duração máxima de cada trecho, minutos ou mm:ss (padrão: 3)")
+    p.add_argument("--modo", choices=vertical.MODES, default="vertical_blur_fast")
+    p.add_argument("--ajustar", type=float, nargs="?", const=trechos.TOLERANCIA_PADRAO, default=0, metavar="SEGUNDOS",
+                   help="recua cada corte até um silêncio ou corte de cena a até SEGUNDOS do limite")
+    p.add_argument("--srt", help="usa esta transcrição em vez de rodar o Whisper")
+    p.add_argument("--sem-legenda", action="store_true", help="só vertical e trechos, sem legenda queimada")
+    p.add_argument("--modelo", choices=legendas.MODELOS_WHISPER, default="small")
+    p.add_argument("--idioma", help="código do idioma para o Whisper (ex.: pt); padrão: detecção automática")
+    p.add_argument("--sem-vad", action="store_true", help="transcreve o áudio inteiro, sem pular silêncios")
+    p.add_argument("--fonte", default=padrao.fonte)
+    p.add_argument("--tamanho", type=int, default=padrao.tamanho)
+    p.add_argument("--cor", default=padrao.cor)
+    p.add_argument("--posicao", type=int, default=padrao.posicao_vertical, help="0=topo, 100=base")
+    p.add_argument("--perfil", choices=encoders.PROFILES, metavar="NOME", default=encoders.DEFAULT_CRF,
+                   help="perfil de encoder de passagem única")
+    p.add_argument("--threads", type=int, default=0, help="threads do ffmpeg (0 = automático)")
+    p.set_defaults(func=cmd_pipeline)
+
+    p = sub.add_parser("duracao", help="exclui vídeos acima da duração máxima")
+    p.add_argument("pasta")
+    p.add_argument("--maximo", type=int, default=180, help="segundos (padrão: 180)")
+    p.add_argument("--paralelo", type=int, default=duracao.WORKERS_PADRAO, help="sondagens ffprobe simultâneas")
+    p.add_argument("--relatorio", metavar="ARQUIVO.csv|.json", help="não exclui nada; grava o resultado no arquivo")
+    p.set_defaults(func=cmd_duracao)
+
+    p = sub.add_parser("tts", help="converte arquivos de texto em MP3 com edge-tts")
+    p.add_argument("pasta")
+    p.add_argument("--voz", required=True, help="ShortName da voz (ex.: pt-BR-AntonioNeural)")
+    p.add_argument("--velocidade", type=int, default=0, help="-100 a +100 (padrão: 0)")
+    p.add_argument("--paralelo", type=int, default=tts.MAX_SIMULTANEOS_PADRAO, help="requisições simultâneas")
+    p.add_argument("--tentativas", type=int, default=tts.TENTATIVAS_PADRAO, help="tentativas por arquivo")
+    p.add_argument("--retomar", "--resume", action="store_true", help="refaz só o que ficou pendente ou falhou no lote anterior")
+    p.set_defaults(func=cmd_tts, precisa_ffmpeg=False)
+
+    p = sub.add_parser("baixar", help="baixa vídeos, playlists ou canais com yt-dlp, em paralelo")
+    p.add_argument("urls", nargs="+")
+    p.add_argument("--pasta", required=True, help="pasta de destino")
+    p.add_argument("--formato", choices=downloads.FORMATS, default="mp4")
+    p.add_argument("--paralelo", type=int, default=downloads.WORKERS_PADRAO, help="downloads simultâneos")
+    p.add_argument("--fragmentos", type=int, default=downloads.FRAGMENTS_PADRAO, help="fragmentos simultâneos por vídeo")
+    p.add_argument("--limite", help="taxa máxima do lote inteiro, em bytes/s (ex.: 500K, 2M)")
+    p.add_argument("--sincronizar", action="store_true",
+                   help="baixa só vídeos novos, pelo arquivo de IDs da pasta, parando ao alcançar os já baixados")
+    p.set_defaults(func=cmd_baixar, precisa_ffmpeg=False)
+
+    p = sub.add_parser("benchmark", help="compara quadros/s dos grafos de fundo borrado")
+    p.add_argument("videos", nargs="+")
+    p.add_argument("--modos", nargs="+", choices=vertical.BLUR_MODES, default=list(vertical.BLUR_MODES))
+    p.add_argument("--segundos", type=float, default=10, help="quanto de cada vídeo processar (padrão: 10)")
+    p.add_argument("--threads", type=int, default=0, help="threads do ffmpeg (0 = automático)")
+    p.set_defaults(func=cmd_benchmark)
+
+    p = sub.add_parser("perfis", help="lista os perfis de encoder ou compara-os num corpus sintético")
+    p.add_argument("--listar", action="store_true", help="só lista os perfis e se o encoder está disponível")
+    p.add_argument("--perfis", nargs="+", choices=encoders.PROFILES, metavar="NOME", help="perfis a comparar (padrão: todos os disponíveis)")
+    p.add_argument("--segundos", type=float, default=5, help="duração de cada clipe sintético (padrão: 5)")
+    p.add_argument("--pasta", default=os.path.join(CACHE_DIR, "benchmark"), help="onde guardar o corpus")
+    p.add_argument("--threads", type=int, default=0, help="threads do ffmpeg (0 = automático)")
+    p.set_defaults(func=cmd_perfis)
+
+    p = sub.add_parser("duplicados", help="lista mídias de mesmo conteúdo e o que os lotes já deixaram de reprocessar")
+    p.add_argument("pasta")
+    p.add_argument("--perceptual", action="store_true",
+                   help="compara também quadros decodificados (pega o mesmo vídeo recodificado)")
+    p.set_defaults(func=cmd_duplicados, precisa_ffmpeg=False)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if getattr(args, "precisa_ffmpeg", True) and not check_ffmpeg():
+        print("FFmpeg não encontrado. Instale e configure no PATH.", file=sys.stderr)
+        return 2
+
+    sink = None
+    if args.json:
+        bus = EventBus()
+        ctx = bus.context()
+        sink = JsonLinesSink(bus).start()
+    else:
+        ctx = JobContext()
+    signal.signal(signal.SIGINT, lambda *_: ctx.cancel())
+    signal.signal(signal.SIGTERM, lambda *_: ctx.cancel())
+    try:
+        return args.func(args, ctx)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if sink:
+            sink.close()
@@ -0,0 +1,283 @@
+import hashlib
+import os
+import sqlite3
+import subprocess
+import threading
+import time
+
+from .probe import CACHE_DIR, probe
+
+SAMPLE_BLOCKS = 8  # blocos lidos por arquivo, espalhados do início ao fim
+BLOCK_SIZE = 64 * 1024
+FINGERPRINT_FRAMES = 5  # quadros decodificados para a impressão perceptual
+MAX_HAMMING = 10  # distância média (de 64 bits) abaixo da qual dois quadros são "iguais"
+MAX_DURATION_DIFF = 1.0  # segundos; vídeos com durações mais distantes nunca são o mesmo
+
+
+def partial_hash(path, blocks=SAMPLE_BLOCKS, block_size=BLOCK_SIZE):
+    """SHA-256 do tamanho e de `blocks` blocos amostrados do arquivo (sem lê-lo inteiro)."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        if size <= blocks * block_size:
+            digest.update(f.read())
+        else:
+            for i in range(blocks):
+                f.seek((size - block_size) * i // (blocks - 1))
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+def _dhash(pixels):
+    """dHash 64 bits de um quadro 9x8 em cinza: cada bit diz se o pixel é mais claro que o vizinho."""
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def fingerprint(path, duration, frames=FINGERPRINT_FRAMES):
+    """dHash de `frames` quadros em pontos fixos da duração (a mesma cena em qualquer cópia)."""
+    hashes = []
+    for i in range(1, frames + 1):
+        cmd = [
+            "ffmpeg", "-nostdin", "-v", "error", "-ss", f"{duration * i / (frames + 1):.3f}", "-i", str(path),
+            "-frames:v", "1", "-vf", "scale=9:8,format=gray", "-f", "rawvideo", "-"
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode == 0 and len(result.stdout) == 72:
+            hashes.append(_dhash(result.stdout))
+    return hashes
+
+
+def similar(a, b):
+    if not a or len(a) != len(b):
+        return False
+    return sum(bin(x ^ y).count("1") for x, y in zip(a, b)) / len(a) <= MAX_HAMMING
+
+
+class DedupIndex:
+    """Índice de conteúdo das mídias de entrada, compartilhado entre lotes.
+
+    Cada arquivo é identificado pelo hash parcial (tamanho + blocos
+    amostrados), guardado por caminho/tamanho/mtime. Opcionalmente, uma
+    impressão perceptual de alguns quadros pega a mesma mídia recodificada.
+    O índice lembra também que saída cada estágio gerou para cada conteúdo
+    (só conta como já processado se essa saída ainda existe na pasta de
+    destino do lote atual) e o que foi pulado, para o relatório.
+    """
+
+    def __init__(self, db_path=None, perceptual=False):
+        if db_path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db_path = os.path.join(CACHE_DIR, "dedup.sqlite")
+        self.db_path = db_path
+        self.perceptual = perceptual
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS media ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, partial TEXT, fingerprint TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS produced ("
+            "stage TEXT, partial TEXT, path TEXT, output TEXT, PRIMARY KEY (stage, partial, output))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS skipped ("
+            "stage TEXT, path TEXT, original TEXT, size INTEGER, duration REAL, at REAL, PRIMARY KEY (stage, path))"
+        )
+        self._conn.commit()
+
+    def _media(self, path):
+        path = os.path.abspath(str(path))
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT partial, fingerprint FROM media WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return path, stat, row[0], row[1]
+        digest = partial_hash(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media (path, size, mtime_ns, partial, fingerprint) VALUES (?, ?, ?, ?, NULL)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+            self._conn.commit()
+        return path, stat, digest, None
+
+    def key(self, path):
+        return self._media(path)[2]
+
+    def fingerprint(self, path):
+        """Impressão perceptual (lista de dHash), calculada uma vez por versão do arquivo; [] sem vídeo."""
+        path, stat, _, cached = self._media(path)
+        if cached is not None:
+            return [int(h, 16) for h in cached.split(",") if h]
+        info = probe(path)
+        hashes = fingerprint(path, info.duration) if info.has_video else []
+        with self._lock:
+            self._conn.execute(
+                "UPDATE media SET fingerprint = ? WHERE path = ? AND mtime_ns = ?",
+                (",".join(f"{h:016x}" for h in hashes), path, stat.st_mtime_ns),
+            )
+            self._conn.commit()
+        return hashes
+
+    def _produced(self, stage, destination, digest=None):
+        """Entradas do estágio cuja saída ainda existe em `destination`: [(entrada, hash)]."""
+        query = "SELECT path, partial, output FROM produced WHERE stage = ?"
+        params = (stage,)
+        if digest:
+            query += " AND partial = ?"
+            params += (digest,)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        destination = os.path.abspath(str(destination))
+        return [
+            (path, partial) for path, partial, output in rows
+            if os.path.dirname(output) == destination and os.path.exists(output) and os.path.exists(path)
+        ]
+
+    def find_original(self, stage, path, seen, destination=None):
+        """Caminho de uma cópia do mesmo conteúdo já vista no lote (`seen`) ou já processada pelo
+        estágio com a saída ainda em `destination` (sem `destination`, só o lote conta)."""
+        digest = self.key(path)
+        if digest in seen:
+            return seen[digest]
+        me = os.path.abspath(str(path))
+        if destination:
+            previous = [p for p, _ in self._produced(stage, destination, digest) if p != me]
+            if previous:
+                return previous[0]
+        if self.perceptual:
+            duration = probe(path).duration
+            mine = self.fingerprint(path)
+            candidates = list(seen.values())
+            if destination:
+                candidates += [p for p, _ in self._produced(stage, destination)]
+            for other in candidates:
+                if other == me:
+                    continue
+                if abs(probe(other).duration - duration) <= MAX_DURATION_DIFF and similar(mine, self.fingerprint(other)):
+                    return other
+        return None
+
+    def filter(self, stage, paths, ctx, destination=None):
+        """Tira de `paths` as cópias de conteúdo repetido.
+
+        Com `destination` (a pasta de saída do lote), também pula o que o
+        estágio já gerou ali a partir de outra cópia, e registra o que foi
+        pulado no relatório. Sem ela, só tira as repetições dentro do lote.
+        """
+        unique, seen, skipped, size, duration = [], {}, 0, 0, 0.0
+        for path in paths:
+            try:
+                original = self.find_original(stage, path, seen, destination)
+            except (OSError, subprocess.SubprocessError, ValueError) as e:
+                ctx.log(f"Não foi possível verificar duplicidade de {os.path.basename(str(path))} ({e}).")
+                unique.append(path)
+                continue
+            if original is None:
+                seen[self.key(path)] = os.path.abspath(str(path))
+                unique.append(path)
+                continue
+            item_size = os.path.getsize(path)
+            try:
+                item_duration = probe(path).duration
+            except Exception:
+                item_duration = 0.0
+            if destination:
+                self._skip(stage, path, original, item_size, item_duration)
+            skipped += 1
+            size += item_size
+            duration += item_duration
+            ctx.log(f"Duplicado, pulando: {os.path.basename(str(path))} (mesmo conteúdo de {os.path.basename(original)})")
+        if skipped:
+            ctx.log(f"{skipped} duplicado(s) pulado(s): {duration / 60:.1f} min de mídia, {size / 1024 ** 2:.1f} MB.")
+        return unique
+
+    def _skip(self, stage, path, original, size, duration):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO skipped (stage, path, original, size, duration, at) VALUES (?, ?, ?, ?, ?, ?)",
+                (stage, os.path.abspath(str(path)), original, size, duration, time.time()),
+            )
+            self._conn.commit()
+
+    def mark_processed(self, stage, path, output):
+        """Registra que o estágio gerou `output` a partir deste conteúdo.
+
+        Enquanto `output` existir, outras cópias do conteúdo com destino na
+        mesma pasta são puladas nos próximos lotes.
+        """
+        try:
+            digest = self.key(path)
+        except OSError:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO produced (stage, partial, path, output) VALUES (?, ?, ?, ?)",
+                (stage, digest, os.path.abspath(str(path)), os.path.abspath(str(output))),
+            )
+            self._conn.commit()
+
+    def savings(self):
+        """Por estágio: quantos itens foram pulados, quantos segundos de mídia e quantos bytes."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(size), 0) FROM skipped GROUP BY stage"
+            ).fetchall()
+        return {stage: {"itens": n, "segundos": seconds, "bytes": size} for stage, n, seconds, size in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def find_duplicates(paths, index):
+    """Agrupa `paths` por conteúdo: {original: [cópias]} (só grupos com cópias)."""
+    groups, seen = {}, {}
+    for path in sorted(paths, key=lambda p: os.path.getmtime(p)):
+        original = index.find_original(None, path, seen)
+        if original is None:
+            seen[index.key(path)] = os.path.abspath(str(path))
+        else:
+            groups.setdefault(original, []).append(os.path.abspath(str(path)))
+    return groups
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def default_index():
+    """Índice compartilhado pelo processo; None se desativado (SHORTS_DEDUP=0) ou indisponível.
+
+    SHORTS_DEDUP=perceptual liga também a impressão perceptual dos vídeos.
+    """
+    global _default_index
+    with _default_lock:
+        mode = os.environ.get("SHORTS_DEDUP", "1")
+        if _default_index is None and mode != "0":
+            try:
+                _default_index = DedupIndex(perceptual=mode == "perceptual")
+            except (OSError, sqlite3.Error):
+                _default_index = False
+        return _default_index or None
+
+
+def skip_duplicates(stage, paths, ctx, destination=None):
+    """Atalho para os estágios: `paths` sem duplicados, ou a própria lista se o índice estiver desligado."""
+    index = default_index()
+    return index.filter(stage, paths, ctx, destination) if index else list(paths)
+
+
+def mark_processed(stage, path, output):
+    index = default_index()
+    if index:
+        index.mark_processed(stage, path, output)
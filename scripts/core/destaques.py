@@ -0,0 +1,110 @@
+import os
+from dataclasses import dataclass
+
+from .analise import RMS_MINIMO_DB
+from .transcricoes import cache_padrao
+
+PESOS_PADRAO = {"energia": 1.0, "fala": 1.0, "movimento": 0.5}
+
+
+@dataclass
+class Janela:
+    inicio: float
+    fim: float
+    score: float
+
+
+def _normalizar(serie):
+    """Leva a série para 0-1 entre os percentis 5 e 95 (picos isolados não dominam)."""
+    import numpy as np
+
+    baixo, alto = np.percentile(serie, [5, 95])
+    if alto - baixo < 1e-9:
+        return np.zeros_like(serie)
+    return np.clip((serie - baixo) / (alto - baixo), 0.0, 1.0)
+
+
+def _ajustar(serie, segundos, vazio=0.0):
+    import numpy as np
+
+    serie = np.asarray(serie, dtype=np.float64)[:segundos]
+    return np.pad(serie, (0, segundos - len(serie)), constant_values=vazio)
+
+
+def densidade_de_fala(segmentos, segundos):
+    """Palavras por segundo, espalhando cada segmento (ou palavra) pelo tempo que ocupa."""
+    import numpy as np
+
+    densidade = np.zeros(segundos)
+    for seg in segmentos:
+        palavras = seg.get("words") or [
+            {"start": seg["start"], "end": seg["end"], "n": max(1, len(seg["text"].split()))}
+        ]
+        for palavra in palavras:
+            inicio = int(min(segundos - 1, max(0, palavra["start"])))
+            fim = int(min(segundos, max(inicio + 1, np.ceil(palavra["end"]))))
+            densidade[inicio:fim] += palavra.get("n", 1) / (fim - inicio)
+    return densidade
+
+
+def transcricao_de(video_path):
+    """Segmentos já transcritos para o áudio do vídeo (cache do legendador), se houver."""
+    cache = cache_padrao()
+    if cache is None or cache.vazio():
+        return None
+    try:
+        return cache.qualquer(cache.hash_de(video_path))
+    except Exception:
+        return None
+
+
+def caracteristicas(analise, duracao, segmentos=None):
+    """Matriz (n_segundos x 3) com energia, fala e movimento, cada coluna em 0-1.
+
+    Sem transcrição, a coluna de fala fica zerada e não pesa no ranking.
+    """
+    import numpy as np
+
+    segundos = max(1, int(np.ceil(duracao)))
+    energia = _ajustar(analise.energia, segundos, RMS_MINIMO_DB) if analise.energia else np.zeros(segundos)
+    movimento = _ajustar(analise.movimento, segundos) if analise.movimento else np.zeros(segundos)
+    fala = densidade_de_fala(segmentos, segundos) if segmentos else np.zeros(segundos)
+    return np.column_stack([_normalizar(energia), _normalizar(fala), _normalizar(movimento)])
+
+
+def pontuar_janelas(matriz, janela, pesos=None):
+    """Score médio de cada janela de `janela` segundos começando em cada segundo (somas acumuladas)."""
+    import numpy as np
+
+    pesos = pesos or PESOS_PADRAO
+    vetor = np.array([pesos["energia"], pesos["fala"], pesos["movimento"]])
+    por_segundo = matriz @ vetor
+    janela = max(1, min(int(janela), len(por_segundo)))
+    acumulado = np.concatenate(([0.0], np.cumsum(por_segundo)))
+    return (acumulado[janela:] - acumulado[:-janela]) / janela
+
+
+def melhores_janelas(scores, janela, n, duracao):
+    """As `n` janelas de maior score que não se sobrepõem, em ordem de score."""
+    import numpy as np
+
+    janela = max(1, int(janela))
+    ocupado = np.zeros(len(scores) + janela, dtype=bool)
+    escolhidas = []
+    for inicio in np.argsort(-scores, kind="stable"):
+        if len(escolhidas) >= n:
+            break
+        if ocupado[inicio:inicio + janela].any():
+            continue
+        ocupado[inicio:inicio + janela] = True
+        escolhidas.append(Janela(float(inicio), float(min(duracao, inicio + janela)), float(scores[inicio])))
+    return escolhidas
+
+
+def ranquear(video_path, analise, duracao, janela, n, ctx, pesos=None):
+    """Top-`n` janelas de `janela` segundos do vídeo, por energia, fala e movimento."""
+    segmentos = transcricao_de(video_path)
+    ctx.log(f"Ranqueando janelas de {janela:g}s de {os.path.basename(video_path)}"
+            + (" (com transcrição)" if segmentos else " (sem transcrição: só energia e movimento)"))
+    scores = pontuar_janelas(caracteristicas(analise, duracao, segmentos), janela, pesos)
+    return melhores_janelas(scores, janela, n, duracao)
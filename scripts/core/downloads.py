@@ -0,0 +1,320 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from .journal import discard, part_path, publish
+from .probe import run_ffprobe
+from .runner import run_ffmpeg
+
+FORMATS = ["mp4", "mp3"]
+WORKERS_PADRAO = 3  # vídeos baixados ao mesmo tempo
+FRAGMENTS_PADRAO = 4  # fragmentos (HLS/DASH) simultâneos por vídeo
+PLAYLIST_KEYS = ("YoutubeTab",)  # entradas que são listas (abas de canal) e precisam ser expandidas
+ARCHIVE_NAME = ".make-shorts-downloads.sqlite"
+CONVERT_WORKERS_PADRAO = max(1, (os.cpu_count() or 2) // 2)  # conversões para MP3 simultâneas
+MP3_QUALITY = "2"  # -q:a do libmp3lame (VBR, ~190 kbps)
+STOP_AFTER_KNOWN = 5  # itens já baixados seguidos que encerram a listagem incremental
+
+
+def parse_rate(text):
+    """Converte '2M', '500K' ou '1048576' em bytes/s; vazio ou '0' = sem limite."""
+    from yt_dlp.utils import parse_bytes
+
+    text = (text or "").strip()
+    if not text or text == "0":
+        return None
+    rate = parse_bytes(text)
+    if rate is None:
+        raise ValueError(f"Limite de taxa inválido: {text!r} (use por exemplo 500K ou 2M)")
+    return rate
+
+
+def ydl_options(save_path, output_format="mp4", rate_limit=None, fragments=FRAGMENTS_PADRAO):
+    opts = {
+        'format': 'bestaudio/best' if output_format == 'mp3' else 'best',
+        'outtmpl': os.path.join(save_path, '%(title)s.%(ext)s'),
+        'ignoreerrors': True,
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'concurrent_fragment_downloads': max(1, fragments),
+    }
+    if rate_limit:
+        opts['ratelimit'] = rate_limit
+    return opts
+
+
+def resolve_channel_url(url):
+    """Troca um link de @handle pelo link /channel/ID do canal."""
+    import yt_dlp as ytdlp
+
+    if '@' not in url:
+        return url
+    with ytdlp.YoutubeDL({'quiet': True, 'extract_flat': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return f"https://www.youtube.com/channel/{info['channel_id']}"
+
+
+@dataclass
+class Entry:
+    url: str
+    key: str = None  # "<extrator> <id>", o mesmo formato do --download-archive do yt-dlp
+    title: str = ""
+
+
+def _entry_key(extractor, video_id):
+    if extractor and video_id:
+        return f"{extractor.lower()} {video_id}"
+    return None
+
+
+class DownloadArchive:
+    """IDs já baixados e estado de sincronização de cada canal, na pasta de destino.
+
+    Títulos mudam, IDs não: é pelo ID que um vídeo já baixado é reconhecido.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video (key TEXT PRIMARY KEY, channel TEXT, title TEXT, downloaded REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS channel (url TEXT PRIMARY KEY, last_sync REAL, downloaded INTEGER DEFAULT 0)"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_folder(cls, folder):
+        os.makedirs(folder, exist_ok=True)
+        return cls(os.path.join(folder, ARCHIVE_NAME))
+
+    def has(self, key):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM video WHERE key = ?", (key,)).fetchone() is not None
+
+    def add(self, key, channel=None, title=""):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video (key, channel, title, downloaded) VALUES (?, ?, ?, ?)",
+                (key, channel, title, time.time()),
+            )
+            self._conn.commit()
+
+    def last_sync(self, channel):
+        """Momento (epoch) da última sincronização completa do canal, ou None."""
+        with self._lock:
+            row = self._conn.execute("SELECT last_sync FROM channel WHERE url = ?", (channel,)).fetchone()
+        return row[0] if row else None
+
+    def mark_synced(self, channel, downloaded):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO channel (url, last_sync, downloaded) VALUES (?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET last_sync = excluded.last_sync, "
+                "downloaded = downloaded + excluded.downloaded",
+                (channel, time.time(), downloaded),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _flatten(info, ydl, archive=None, depth=2, stop_early=False):
+    """Percorre as entradas (preguiçosas) de uma lista, expandindo abas de canal.
+
+    Com `archive`, o que já foi baixado é pulado. Com `stop_early` (só depois
+    de uma sincronização completa do link), a lista é tratada como em ordem de
+    data (mais novos primeiro, como nas abas de canal): depois de
+    STOP_AFTER_KNOWN itens seguidos já arquivados, o resto nem é paginado.
+    Sem ela, uma primeira sincronização interrompida (ou com downloads
+    terminando fora de ordem) faria as seguintes pararem antes dos antigos.
+    """
+    known = 0
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        url = entry.get("webpage_url") or entry.get("url")
+        if entry.get("ie_key") in PLAYLIST_KEYS and depth > 0:
+            yield from _flatten(ydl.extract_info(url, download=False), ydl, archive, depth - 1, stop_early)
+            continue
+        if not url:
+            continue
+        key = _entry_key(entry.get("ie_key"), entry.get("id"))
+        if archive and key and archive.has(key):
+            known += 1
+            if stop_early and known >= STOP_AFTER_KNOWN:
+                return
+            continue
+        known = 0
+        yield Entry(url, key, entry.get("title") or "")
+
+
+def iter_entries(url, archive=None, stop_early=False):
+    """Entradas de um vídeo, playlist ou canal, sem baixar nada (extração "flat").
+
+    Um link de vídeo único devolve só ele mesmo; abas de canal são expandidas.
+    Com `archive`, pula o que já foi baixado; com `stop_early`, para cedo (ver `_flatten`).
+    """
+    import yt_dlp as ytdlp
+
+    opts = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist', 'lazy_playlist': True}
+    with ytdlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+        if not info:
+            return
+        if "entries" not in info:
+            key = _entry_key(info.get("extractor_key"), info.get("id"))
+            if not (archive and key and archive.has(key)):
+                yield Entry(info.get("webpage_url") or url, key, info.get("title") or "")
+            return
+        yield from _flatten(info, ydl, archive, stop_early=stop_early)
+
+
+def download_entries(entries, save_path, ctx, output_format="mp4", workers=WORKERS_PADRAO, rate_limit=None,
+                     fragments=FRAGMENTS_PADRAO, archive=None, channel=None, on_file=None):
+    """Baixa cada entrada com até `workers` downloads simultâneos.
+
+    Cada worker usa o próprio YoutubeDL (a instância não é thread-safe) e
+    baixa até `fragments` fragmentos de cada vídeo em paralelo. `rate_limit`
+    (bytes/s) vale para o lote inteiro e é dividido entre os workers. Com
+    `archive`, cada download concluído é registrado pelo ID. `on_file(caminho)`
+    é chamado, na thread do worker, para cada arquivo assim que a entrada termina.
+    Retorna (arquivos baixados, erros).
+    """
+    import yt_dlp as ytdlp
+
+    workers = max(1, min(workers, len(entries) or 1))
+    per_worker = rate_limit // workers if rate_limit else None
+    downloaded, errors = [], []
+    lock = threading.Lock()
+
+    def fetch(entry):
+        if ctx.cancelled:
+            return
+        files = []
+
+        def hook(d):
+            if ctx.cancelled:
+                raise ytdlp.utils.DownloadCancelled("cancelado")
+            if d['status'] == 'finished':
+                files.append(d['filename'])
+
+        opts = ydl_options(save_path, output_format, per_worker, fragments)
+        opts['progress_hooks'] = [hook]
+        with ytdlp.YoutubeDL(opts) as ydl:
+            if ydl.download([entry.url]) != 0:
+                raise Exception("falha no download")
+        if archive and entry.key:
+            archive.add(entry.key, channel, entry.title)
+        with lock:
+            downloaded.extend(files)
+        for path in files:
+            if on_file:
+                on_file(path)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch, entry): entry for entry in entries}
+        for done, future in enumerate(as_completed(futures), start=1):
+            url = futures[future].url
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(f"Erro ao baixar {url}: {e}")
+                ctx.log(f"❌ Erro ao baixar {url}: {e}")
+            ctx.progress(done, len(entries), url)
+    return downloaded, errors
+
+
+def mp3_command(path, output_path, audio_codec):
+    """Áudio que já é MP3 só é remuxado; o resto vai para libmp3lame VBR."""
+    codec = ["-c:a", "copy"] if audio_codec == "mp3" else ["-c:a", "libmp3lame", "-q:a", MP3_QUALITY]
+    return ["ffmpeg", "-y", "-i", path, "-vn", "-map", "0:a:0", *codec, "-f", "mp3", output_path]
+
+
+def convert_to_mp3(path, ctx):
+    """Extrai o áudio de `path` para um .mp3 ao lado e apaga o original.
+
+    Retorna False se o arquivo já era MP3 (nada a fazer).
+    """
+    if os.path.splitext(path)[1].lower() == '.mp3':
+        return False
+    info = run_ffprobe(path)
+    output_path = os.path.splitext(path)[0] + '.mp3'
+    tmp = part_path(output_path)
+    result = run_ffmpeg(mp3_command(path, tmp, info.audio_codec), ctx, info.duration, label=os.path.basename(path))
+    if result.returncode != 0:
+        discard(tmp)
+        raise Exception(f"FFmpeg erro: {result.stderr[-500:]}")
+    publish(tmp, output_path)
+    os.remove(path)
+    ctx.log(f"🎵 Convertido: {os.path.basename(output_path)}" + (" (stream copy)" if info.audio_codec == "mp3" else ""))
+    return True
+
+
+def download(links, save_path, ctx, output_format="mp4", workers=WORKERS_PADRAO, rate_limit=None,
+             fragments=FRAGMENTS_PADRAO, sync=False):
+    """Lista as entradas de cada link e as baixa em paralelo; em MP3, converte cada arquivo ao terminar.
+
+    Com `sync`, usa o arquivo de IDs da pasta de destino: só entradas novas
+    são baixadas e, depois da primeira sincronização completa, a listagem de cada
+    canal para ao alcançar as já baixadas.
+    Retorna um resumo (dict) com o total de entradas, baixadas, convertidas e os erros.
+    """
+    archive = DownloadArchive.for_folder(save_path) if sync else None
+    files, errors, total = [], [], 0
+
+    # Em MP3, cada arquivo vai para a fila de conversão assim que termina de
+    # baixar, e a conversão corre em paralelo com os downloads seguintes.
+    converter = ThreadPoolExecutor(max_workers=CONVERT_WORKERS_PADRAO) if output_format == "mp3" else None
+    conversions = {}
+
+    def on_file(path):
+        conversions[converter.submit(convert_to_mp3, path, ctx)] = path
+
+    try:
+        for link in links:
+            if archive:
+                last = archive.last_sync(link)
+                ctx.log(f"🔄 Última sincronização de {link}: "
+                        + (time.strftime("%d/%m/%Y %H:%M", time.localtime(last)) if last else "nunca"))
+            ctx.log(f"🔎 Listando entradas de {link}...")
+            try:
+                entries = list(iter_entries(link, archive, stop_early=bool(archive and last)))
+            except Exception as e:
+                errors.append(f"Erro ao listar {link}: {e}")
+                ctx.log(f"❌ Erro ao listar {link}: {e}")
+                continue
+            ctx.log(f"📋 {len(entries)} entrada(s){' nova(s)' if archive else ''}; "
+                    f"{workers} download(s) simultâneo(s), {fragments} fragmento(s) cada")
+            got, failed = download_entries(
+                entries, save_path, ctx, output_format, workers, rate_limit, fragments, archive, link,
+                on_file if converter else None
+            )
+            files += got
+            errors += failed
+            total += len(entries)
+            if archive and not failed and not ctx.cancelled:
+                archive.mark_synced(link, len(entries))
+    finally:
+        if archive:
+            archive.close()
+        if converter:
+            converter.shutdown(wait=True)
+
+    converted = 0
+    for future, path in conversions.items():
+        try:
+            converted += future.result()
+        except Exception as e:
+            errors.append(f"Erro ao converter {path}: {e}")
+            ctx.log(f"❌ Erro ao converter {path}: {e}")
+    return {"entries": total, "downloaded": len(files), "converted": converted, "errors": errors}
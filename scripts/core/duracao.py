@@ -0,0 +1,157 @@
+import csv
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+
+from .media import get_media_duration
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+WORKERS_PADRAO = 8
+
+
+@dataclass
+class ResultadoDuracao:
+    video: str
+    duracao: float = None
+    acao: str = ""  # "excluido", "excluir" (somente relatório), "mantido" ou "erro"
+    erro: str = ""
+
+
+def formatar_duracao(segundos):
+    """Formata segundos para formato HH:MM:SS"""
+    return str(timedelta(seconds=segundos)).split('.')[0]
+
+
+def obter_duracao_video(caminho_video, ctx):
+    """Obtém a duração do vídeo em segundos: `(duracao, "")`, ou `(None, erro)` registrando o erro no log"""
+    try:
+        return get_media_duration(caminho_video), ""
+    except subprocess.CalledProcessError as e:
+        erro = (e.stderr or "").strip() or str(e)
+        ctx.log(f"Erro ao verificar {os.path.basename(caminho_video)}: {erro}")
+        return None, erro
+    except Exception as e:
+        ctx.log(f"Erro inesperado com {os.path.basename(caminho_video)}: {e}")
+        return None, str(e)
+
+
+def varrer_duracoes(caminhos, ctx, workers=WORKERS_PADRAO):
+    """Sonda as durações com até `workers` ffprobe em paralelo.
+
+    Gera `(caminho, duracao, erro)` na ordem em que terminam; `duracao` é None
+    (e `erro` diz o motivo) quando a sondagem falha. Mantém no máximo `2 * workers` tarefas pendentes
+    para que o cancelamento seja rápido mesmo em pastas enormes.
+    """
+    pendentes = iter(caminhos)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        em_voo = {}
+        for caminho in pendentes:
+            em_voo[pool.submit(obter_duracao_video, caminho, ctx)] = caminho
+            if len(em_voo) >= 2 * workers:
+                break
+
+        while em_voo:
+            prontos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                yield (em_voo.pop(futuro), *futuro.result())
+                if not ctx.cancelled:
+                    proximo = next(pendentes, None)
+                    if proximo is not None:
+                        em_voo[pool.submit(obter_duracao_video, proximo, ctx)] = proximo
+
+
+def salvar_relatorio(resultados, caminho):
+    """Grava o relatório em CSV ou JSON, conforme a extensão de `caminho`."""
+    linhas = [asdict(r) for r in sorted(resultados, key=lambda r: r.video)]
+    if caminho.lower().endswith(".json"):
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(linhas, f, ensure_ascii=False, indent=2)
+    else:
+        with open(caminho, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["video", "duracao", "acao", "erro"])
+            writer.writeheader()
+            writer.writerows(linhas)
+
+
+def verificar_videos(pasta, duracao_maxima, ctx, workers=WORKERS_PADRAO, relatorio_path=None):
+    """Exclui os vídeos da pasta mais longos que `duracao_maxima` segundos.
+
+    Com `relatorio_path`, nada é excluído: o resultado é gravado em CSV/JSON.
+    Retorna um dict com os totais do relatório final.
+    """
+    somente_relatorio = bool(relatorio_path)
+    ctx.log("\n" + "="*50)
+    ctx.log(f"Verificando vídeos em: {pasta}")
+    ctx.log(f"Duração máxima permitida: {duracao_maxima}s ({formatar_duracao(duracao_maxima)})")
+    if somente_relatorio:
+        ctx.log(f"Modo somente relatório: nenhum arquivo será excluído ({relatorio_path})")
+
+    videos = sorted(f for f in os.listdir(pasta) if f.lower().endswith(VIDEO_EXTENSIONS))
+    total_videos = len(videos)
+    # "analisados" conta só os vídeos com duração lida; falhas de sondagem vão para "erros"
+    relatorio = {"analisados": 0, "excluidos": 0, "mantidos": 0, "erros": 0}
+
+    if total_videos == 0:
+        ctx.log("Nenhum vídeo encontrado na pasta!")
+        return relatorio
+
+    ctx.log(f"\nEncontrados {total_videos} vídeos para análise ({workers} sondagens simultâneas)...")
+    ctx.progress(0, total_videos)
+
+    resultados = []
+    inicio = time.monotonic()
+    caminhos = [os.path.join(pasta, video) for video in videos]
+    for i, (caminho, duracao, erro) in enumerate(varrer_duracoes(caminhos, ctx, workers), start=1):
+        video = os.path.basename(caminho)
+        resultado = ResultadoDuracao(video, duracao, erro=erro)
+        resultados.append(resultado)
+        decorrido = time.monotonic() - inicio
+        ctx.progress(i, total_videos, f"{i / decorrido:.1f} arquivos/s" if decorrido > 0 else None)
+
+        if duracao is None:
+            resultado.acao = "erro"
+            relatorio["erros"] += 1
+            continue
+        relatorio["analisados"] += 1
+
+        ctx.log(f"\n{video}: {formatar_duracao(duracao)}")
+
+        if duracao <= duracao_maxima:
+            ctx.log("OK (dentro do limite)")
+            resultado.acao = "mantido"
+            relatorio["mantidos"] += 1
+        elif somente_relatorio:
+            ctx.log("ACIMA DO LIMITE (seria excluído)")
+            resultado.acao = "excluir"
+            relatorio["excluidos"] += 1
+        else:
+            try:
+                ctx.log("EXCLUINDO (maior que o limite)")
+                os.remove(caminho)
+                resultado.acao = "excluido"
+                relatorio["excluidos"] += 1
+            except OSError as e:
+                ctx.log(f"Erro ao processar {video}: {e}")
+                resultado.acao = "erro"
+                resultado.erro = str(e)
+                relatorio["erros"] += 1
+
+    decorrido = time.monotonic() - inicio
+    if somente_relatorio:
+        salvar_relatorio(resultados, relatorio_path)
+
+    # Relatório final
+    ctx.log("\n" + "="*50)
+    ctx.log("RELATÓRIO FINAL:")
+    ctx.log(f"- Vídeos analisados: {relatorio['analisados']}")
+    ctx.log(f"- Vídeos {'acima do limite' if somente_relatorio else 'excluídos'}: {relatorio['excluidos']}")
+    ctx.log(f"- Vídeos mantidos: {relatorio['mantidos']}")
+    ctx.log(f"- Erros encontrados: {relatorio['erros']}")
+    if decorrido > 0:
+        ctx.log(f"- Velocidade: {len(resultados) / decorrido:.1f} arquivos/s ({decorrido:.1f}s)")
+    ctx.log("="*50)
+    return relatorio
@@ -0,0 +1,104 @@
+import functools
+import glob
+import os
+import subprocess
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class EncoderProfile:
+    name: str
+    encoder: str
+    preset: str
+    crf: int = None
+    bitrate: str = None  # ABR alvo (-b:v)
+    maxrate: str = None  # teto do VBR por CRF (bufsize = 2x)
+    two_pass: bool = False
+    extra: tuple = ()
+
+    def video_args(self):
+        args = ["-c:v", self.encoder, "-preset", str(self.preset)]
+        if self.crf is not None:
+            args += ["-crf", str(self.crf)]
+        if self.bitrate:
+            args += ["-b:v", self.bitrate]
+        if self.maxrate:
+            args += ["-maxrate", self.maxrate, "-bufsize", f"{2 * int(self.maxrate.rstrip('k'))}k"]
+        return args + list(self.extra)
+
+    def describe(self):
+        mode = f"CRF {self.crf}" if self.crf is not None else f"{self.bitrate}"
+        if self.maxrate:
+            mode += f" (máx. {self.maxrate})"
+        return f"{self.encoder} {self.preset}, {mode}" + (", 2 passagens" if self.two_pass else "")
+
+
+PROFILES = {p.name: p for p in [
+    # Escada de presets do x264 com a mesma qualidade alvo
+    EncoderProfile("x264_veryfast_crf23", "libx264", "veryfast", crf=23),
+    EncoderProfile("x264_fast_crf23", "libx264", "fast", crf=23),
+    EncoderProfile("x264_medium_crf23", "libx264", "medium", crf=23),
+    EncoderProfile("x264_slow_crf23", "libx264", "slow", crf=23),
+    # Taxa média fixa (o que os shorts sempre usaram) e VBR por CRF com teto
+    EncoderProfile("x264_fast_5000k", "libx264", "fast", bitrate="5000k"),
+    EncoderProfile("x264_fast_crf23_max5000k", "libx264", "fast", crf=23, maxrate="5000k"),
+    EncoderProfile("x264_medium_2pass_4000k", "libx264", "medium", bitrate="4000k", two_pass=True),
+    # Codecs mais eficientes, se o ffmpeg tiver sido compilado com eles
+    EncoderProfile("x265_medium_crf28", "libx265", "medium", crf=28, extra=("-tag:v", "hvc1")),
+    EncoderProfile("svtav1_p8_crf35", "libsvtav1", "8", crf=35),
+]}
+
+DEFAULT_CRF = "x264_fast_crf23"  # conversor vertical (blur)
+DEFAULT_ABR = "x264_fast_5000k"  # crop_scale, shorts e pool de fundos
+
+
+@functools.lru_cache(maxsize=None)
+def available_encoders():
+    """Nomes dos encoders de vídeo do ffmpeg instalado."""
+    result = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return frozenset(
+        parts[1] for parts in (line.split() for line in result.stdout.splitlines())
+        if len(parts) > 1 and parts[0].startswith("V")
+    )
+
+
+def available_profiles():
+    encoders = available_encoders()
+    return [name for name, profile in PROFILES.items() if profile.encoder in encoders]
+
+
+def get_profile(name):
+    """Perfil pelo nome; ValueError se não existir ou se o encoder não estiver no ffmpeg."""
+    if name not in PROFILES:
+        raise ValueError(f"Perfil de encoder desconhecido: {name}")
+    profile = PROFILES[name]
+    if profile.encoder not in available_encoders():
+        raise ValueError(f"O ffmpeg instalado não tem o encoder {profile.encoder} (perfil {name})")
+    return profile
+
+
+def pass_commands(profile, cmd, passlog):
+    """Expande um comando de passagem única nas passagens que o perfil pede.
+
+    `cmd` termina no arquivo de saída. Na 1ª de duas passagens o áudio e o
+    muxer são descartados; só as estatísticas em `passlog` importam.
+    """
+    if not profile.two_pass:
+        return [cmd]
+    first = []
+    args = iter(cmd[:-1])
+    for arg in args:
+        if arg == "-movflags":
+            next(args)
+            continue
+        first.append(arg)
+    pass_args = ["-passlogfile", passlog, "-pass"]
+    return [
+        first + [*pass_args, "1", "-an", "-f", "null", os.devnull],
+        cmd[:-1] + [*pass_args, "2", cmd[-1]],
+    ]
+
+
+def remove_passlog(passlog):
+    for path in glob.glob(glob.escape(passlog) + "*"):
+        os.remove(path)
@@ -0,0 +1,120 @@
+import json
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .jobs import JobContext
+
+DRAIN_INTERVAL_MS = 100
+
+
+@dataclass
+class EventBatch:
+    """Eventos acumulados entre duas drenagens, já coalescidos.
+
+    Logs chegam todos, na ordem; de `progress` só importa o último; de
+    `file_progress`, o último de cada arquivo. Os demais eventos (conclusão,
+    erro, etc.) ficam em `other`, na ordem em que foram emitidos.
+    """
+    logs: list = field(default_factory=list)
+    progress: tuple = None  # (done, total, label)
+    file_progress: dict = field(default_factory=dict)  # label -> percent
+    other: list = field(default_factory=list)  # (kind, data)
+
+    def __bool__(self):
+        return bool(self.logs or self.progress or self.file_progress or self.other)
+
+
+class EventBus:
+    """Canal entre as threads de trabalho e quem mostra o andamento.
+
+    Os workers só enfileiram eventos (custo de um `put`); a interface Tk ou
+    um sink de JSON drena a fila no próprio ritmo, em lotes.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+
+    def emit(self, kind, **data):
+        self._queue.put((kind, data))
+
+    def context(self):
+        """JobContext cujos callbacks apenas publicam eventos no barramento."""
+        return JobContext(
+            log=lambda message: self.emit("log", message=message),
+            progress=lambda done, total, label=None: self.emit("progress", done=done, total=total, label=label),
+            file_progress=lambda percent, label=None: self.emit("file_progress", percent=percent, label=label),
+        )
+
+    def drain(self, limit=10000):
+        batch = EventBatch()
+        for _ in range(limit):
+            try:
+                kind, data = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                batch.logs.append(data["message"])
+            elif kind == "progress":
+                batch.progress = (data["done"], data["total"], data["label"])
+            elif kind == "file_progress":
+                # Reinsere para manter a ordem da última atualização
+                batch.file_progress.pop(data["label"], None)
+                batch.file_progress[data["label"]] = data["percent"]
+            else:
+                batch.other.append((kind, data))
+        return batch
+
+
+def pump_tk(root, bus, handle, interval=DRAIN_INTERVAL_MS):
+    """Drena `bus` no loop do Tk a cada `interval` ms e entrega cada lote não vazio a `handle`."""
+    def tick():
+        batch = bus.drain()
+        if batch:
+            handle(batch)
+        root.after(interval, tick)
+
+    root.after(interval, tick)
+
+
+class JsonLinesSink:
+    """Escreve os eventos do barramento como JSON por linha (para CLI/integrações)."""
+
+    def __init__(self, bus, stream=None, interval=DRAIN_INTERVAL_MS / 1000):
+        self.bus = bus
+        self.stream = stream or sys.stdout
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        batch = self.bus.drain()
+        now = time.time()
+        lines = [{"event": "log", "time": now, "message": m} for m in batch.logs]
+        if batch.progress:
+            done, total, label = batch.progress
+            lines.append({"event": "progress", "time": now, "done": done, "total": total, "label": label})
+        lines += [
+            {"event": "file_progress", "time": now, "label": label, "percent": round(percent, 1)}
+            for label, percent in batch.file_progress.items()
+        ]
+        lines += [{"event": kind, "time": now, **data} for kind, data in batch.other]
+        for line in lines:
+            self.stream.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+        if lines:
+            self.stream.flush()
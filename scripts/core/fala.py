@@ -0,0 +1,89 @@
+import subprocess
+
+TAXA_AMOSTRAGEM = 16000  # o que o Whisper espera
+QUADRO_MS = 30
+
+
+def extrair_pcm(video_path):
+    """Decodifica o áudio uma única vez em PCM mono 16 kHz (float32 entre -1 e 1)."""
+    import numpy as np
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-v", "error", "-i", str(video_path),
+        "-vn", "-ac", "1", "-ar", str(TAXA_AMOSTRAGEM), "-f", "s16le", "-"
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+
+def detectar_fala(audio, limiar_db=-40.0, margem=0.3, juntar=0.6, minimo=0.25):
+    """Regiões com voz (em segundos) por energia RMS de quadros de 30 ms.
+
+    O limiar acompanha o ruído de fundo (percentil 10 da energia), de modo
+    que trilhas com música baixa não sejam marcadas inteiras como fala.
+    Regiões separadas por menos de `juntar` segundos viram uma só e cada
+    região ganha `margem` segundos de folga nas pontas.
+    """
+    import numpy as np
+
+    tamanho = TAXA_AMOSTRAGEM * QUADRO_MS // 1000
+    n = len(audio) // tamanho
+    if n == 0:
+        return []
+
+    quadros = audio[:n * tamanho].reshape(n, tamanho)
+    db = 10 * np.log10(np.mean(quadros ** 2, axis=1) + 1e-10)
+    limiar = max(limiar_db, float(np.percentile(db, 10)) + 12)
+    ativo = db > limiar
+
+    # Bordas de subida/descida da máscara de atividade
+    bordas = np.flatnonzero(np.diff(np.concatenate(([0], ativo.astype(np.int8), [0]))))
+    segundos = QUADRO_MS / 1000
+    regioes = []
+    for inicio, fim in zip(bordas[::2], bordas[1::2]):
+        inicio, fim = float(inicio * segundos), float(fim * segundos)
+        if regioes and inicio - regioes[-1][1] < juntar:
+            regioes[-1][1] = fim
+        else:
+            regioes.append([inicio, fim])
+
+    duracao = len(audio) / TAXA_AMOSTRAGEM
+    return [
+        (max(0.0, inicio - margem), min(duracao, fim + margem))
+        for inicio, fim in regioes if fim - inicio >= minimo
+    ]
+
+
+class MapaTempo:
+    """Converte tempos do áudio concatenado (só fala) para a linha do tempo original."""
+
+    def __init__(self, regioes):
+        self.regioes = regioes
+        self.offsets = []
+        acumulado = 0.0
+        for inicio, fim in regioes:
+            self.offsets.append(acumulado)
+            acumulado += fim - inicio
+
+    def original(self, t):
+        for (inicio, fim), offset in zip(reversed(self.regioes), reversed(self.offsets)):
+            if t >= offset:
+                return min(inicio + (t - offset), fim)
+        return t
+
+    def remapear(self, segments):
+        for seg in segments:
+            seg["start"] = self.original(seg["start"])
+            seg["end"] = self.original(seg["end"])
+            for palavra in seg.get("words", []):
+                palavra["start"] = self.original(palavra["start"])
+                palavra["end"] = self.original(palavra["end"])
+        return segments
+
+
+def recortar_fala(audio, regioes):
+    """Concatena só as regiões de fala; retorna (áudio, MapaTempo)."""
+    import numpy as np
+
+    partes = [audio[int(inicio * TAXA_AMOSTRAGEM):int(fim * TAXA_AMOSTRAGEM)] for inicio, fim in regioes]
+    return np.concatenate(partes), MapaTempo(regioes)
@@ -0,0 +1,75 @@
+import subprocess
+import threading
+from datetime import datetime
+
+
+class JobContext:
+    """Canal entre um estágio do pipeline e quem o executa (GUI, CLI ou daemon).
+
+    Recebe callbacks opcionais de log e progresso; sem eles, escreve no terminal.
+    Também guarda os processos ffmpeg em execução para que `cancel()` consiga
+    interromper todos de uma vez.
+    """
+
+    def __init__(self, log=None, progress=None, file_progress=None):
+        self._log = log
+        self._progress = progress
+        self._file_progress = file_progress
+        self._stop = threading.Event()
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    def log(self, message):
+        if self._log:
+            self._log(message)
+        else:
+            timestamp = datetime.now().strftime("%H:%M:%S")
+            print(f"[{timestamp}] {message}", flush=True)
+
+    def progress(self, done, total, label=None):
+        """Progresso do lote: `done` de `total` itens concluídos."""
+        if self._progress:
+            self._progress(done, total, label)
+
+    def file_progress(self, percent, label=None):
+        """Progresso (0-100) do item atual."""
+        if self._file_progress:
+            self._file_progress(percent, label)
+
+    @property
+    def cancelled(self):
+        return self._stop.is_set()
+
+    def cancel(self):
+        self._stop.set()
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            try:
+                process.terminate()
+            except OSError:
+                pass
+
+    def popen(self, cmd, **kwargs):
+        """Abre um subprocesso registrado para cancelamento."""
+        process = subprocess.Popen(cmd, **kwargs)
+        with self._lock:
+            self._processes.add(process)
+        if self.cancelled:
+            process.terminate()
+        return process
+
+    def release(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def run(self, cmd, **kwargs):
+        """Equivalente a `subprocess.run`, mas cancelável via `cancel()`."""
+        kwargs.setdefault("stdout", subprocess.PIPE)
+        kwargs.setdefault("stderr", subprocess.PIPE)
+        process = self.popen(cmd, **kwargs)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            self.release(process)
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import threading
+import time
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+JOURNAL_NAME = ".make-shorts-journal.sqlite"
+
+
+def part_path(path):
+    """Nome temporário (oculto, mesma pasta e extensão) onde o ffmpeg escreve a saída."""
+    folder, name = os.path.split(str(path))
+    stem, ext = os.path.splitext(name)
+    return os.path.join(folder, f".{stem}.part{ext}")
+
+
+def publish(tmp, path):
+    """Troca atômica do temporário pela saída final."""
+    os.replace(tmp, str(path))
+
+
+def discard(tmp):
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+
+def sweep_parts(folder):
+    """Apaga temporários `part_path` deixados na pasta por um processo interrompido."""
+    removed = 0
+    for name in os.listdir(folder):
+        if name.startswith(".") and ".part." in name:
+            discard(os.path.join(folder, name))
+            removed += 1
+    return removed
+
+
+def _key(path):
+    return os.path.abspath(str(path))
+
+
+class JobJournal:
+    """Estado persistente dos itens de um lote, numa pasta de saída.
+
+    Cada item (chave = arquivo de entrada) passa por pending → running →
+    done/failed. Um item que ficou em running é de um processo que morreu
+    no meio; junto com as saídas escritas via `part_path`/`publish`, isso
+    evita que um arquivo pela metade seja tomado como pronto.
+    """
+
+    def __init__(self, db_path, stage):
+        self.db_path = db_path
+        self.stage = stage
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job ("
+            "stage TEXT, key TEXT, output TEXT, state TEXT, attempts INTEGER DEFAULT 0, "
+            "error TEXT, updated REAL, PRIMARY KEY (stage, key))"
+        )
+        self._conn.commit()
+
+    @classmethod
+    def for_folder(cls, folder, stage):
+        os.makedirs(folder, exist_ok=True)
+        return cls(os.path.join(folder, JOURNAL_NAME), stage)
+
+    def _row(self, key):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT output, state FROM job WHERE stage = ? AND key = ?", (self.stage, _key(key))
+            ).fetchone()
+
+    def _set(self, key, state, output=None, error=None, attempt=False):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job (stage, key, output, state, attempts, error, updated) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (stage, key) DO UPDATE SET state = excluded.state, error = excluded.error, "
+                "updated = excluded.updated, output = COALESCE(excluded.output, output), "
+                "attempts = attempts + excluded.attempts",
+                (self.stage, _key(key), output and _key(output), state, int(attempt), error, time.time()),
+            )
+            self._conn.commit()
+
+    def is_done(self, key, output):
+        """Pronto = registrado como done e a saída existe.
+
+        Saídas sem registro (de antes do journal) continuam valendo; as que
+        ficaram em running/failed são refeitas.
+        """
+        if not os.path.exists(str(output)):
+            return False
+        row = self._row(key)
+        return row is None or row[1] == DONE
+
+    def plan(self, key, output):
+        if not self.is_done(key, output):
+            self._set(key, PENDING, output)
+
+    def start(self, key, output=None):
+        self._set(key, RUNNING, output, attempt=True)
+
+    def finish(self, key, ok, error=None):
+        self._set(key, DONE if ok else FAILED, error=None if ok else (error or "falhou"))
+
+    def unfinished(self):
+        """Itens do último lote que não terminaram (pending, running ou failed), como (chave, saída)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, output FROM job WHERE stage = ? AND state != ? ORDER BY key", (self.stage, DONE)
+            ).fetchall()
+
+    def summary(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM job WHERE stage = ? GROUP BY state", (self.stage,)
+            ).fetchall()
+        return dict(rows)
@@ -0,0 +1,387 @@
+import datetime
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+
+from .fala import TAXA_AMOSTRAGEM, detectar_fala, extrair_pcm, recortar_fala
+from .dedup import mark_processed, skip_duplicates
+from .journal import JobJournal, discard, part_path, publish
+from .media import VIDEO_EXTENSIONS, list_media
+from .modelos import registro
+from .probe import probe
+from .runner import run_ffmpeg
+from .transcricoes import cache_padrao, limpar_segmentos
+
+MODELOS_WHISPER = ['tiny', 'base', 'small', 'medium', 'large']
+# ass: gera um .ass estilizado e queima com um único ffmpeg (padrão)
+# moviepy: TextClip (ImageMagick) + CompositeVideoClip, quadro a quadro em Python
+RENDERIZADORES = ["ass", "moviepy"]
+CORES_NOMEADAS = {"black": "#000000", "white": "#FFFFFF"}
+IMAGEMAGICK_BINARY = r"C:\Program Files\ImageMagick-7.1.1-Q16\magick.exe"
+EXTENSAO_SAIDA = ".mp4"  # o vídeo é sempre recodificado em H.264; só o MP4 serve para qualquer origem
+AUDIO_MP4 = ("aac", "mp3", "ac3", "eac3", "alac")  # copiados; o resto vira AAC
+
+
+@dataclass
+class EstiloLegenda:
+    fonte: str = "Arial"
+    tamanho: int = 54
+    cor: str = "#DAA520"  # Amarelo mostarda
+    posicao_vertical: int = 20  # Porcentagem (0=topo, 100=base)
+    cor_contorno: str = "black"
+    espessura_contorno: int = 5
+
+
+@dataclass
+class LegendaJob:
+    video_path: str
+    output_path: str
+    modelo: str = "small"
+    estilo: EstiloLegenda = None
+    renderizador: str = "ass"
+    idioma: str = None  # None = detecção automática do Whisper
+    vad: bool = True  # transcreve só os trechos com voz
+
+    def __post_init__(self):
+        if self.estilo is None:
+            self.estilo = EstiloLegenda()
+
+
+def caminho_saida(video_path, output_dir):
+    return os.path.join(output_dir, f"{Path(video_path).stem}_legendado{EXTENSAO_SAIDA}")
+
+
+def listar_fontes_fontconfig():
+    """Famílias de fonte que o libass (filtro `ass`) encontra pelo fontconfig."""
+    resultado = subprocess.run(['fc-list', ':', 'family'], capture_output=True, text=True, check=True)
+    # Cada linha pode trazer nomes alternativos ("DejaVu Sans,DejaVu Sans Light"): o primeiro basta
+    return sorted({linha.split(",")[0].strip() for linha in resultado.stdout.splitlines() if linha.strip()})
+
+
+def listar_fontes(renderizador="ass"):
+    """Fontes que o renderizador escolhido resolve pelo nome."""
+    return listar_fontes_imagemagick() if renderizador == "moviepy" else listar_fontes_fontconfig()
+
+
+def listar_fontes_imagemagick():
+    resultado = subprocess.run(
+        ['magick', '-list', 'font'],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    nomes_fontes = []
+    for linha in resultado.stdout.splitlines():
+        if linha.strip().startswith("Font:"):
+            partes = linha.split(":", 1)
+            if len(partes) == 2:
+                nomes_fontes.append(partes[1].strip())
+    return sorted(nomes_fontes)
+
+
+def _entrada_whisper(video_path, ctx):
+    """Áudio (PCM 16 kHz) só com as regiões de fala, e o mapa para voltar ao tempo original."""
+    audio = extrair_pcm(video_path)
+    regioes = detectar_fala(audio)
+    total = len(audio) / TAXA_AMOSTRAGEM
+    fala = sum(fim - inicio for inicio, fim in regioes)
+    if ctx:
+        ctx.log(f"VAD: {fala:.0f}s de fala em {total:.0f}s de áudio ({len(regioes)} região(ões))")
+    if not regioes:
+        return None, None
+    if fala > 0.9 * total:
+        return audio, None
+    return recortar_fala(audio, regioes)
+
+
+def transcrever_video(video_path, modelo, ctx=None, idioma=None, vad=True):
+    """Segmentos do Whisper (com tempos por palavra), reaproveitando o cache.
+
+    A chave do cache é o hash do áudio + modelo + idioma, então mudar só o
+    estilo da legenda não roda a inferência de novo. Com `vad`, o áudio é
+    extraído uma vez, os silêncios são descartados antes da inferência e os
+    tempos são remapeados para a linha do tempo do vídeo.
+    """
+    chave_modelo = f"{modelo}+vad" if vad else modelo
+    cache = cache_padrao()
+    digest = None
+    if cache:
+        try:
+            digest = cache.hash_de(video_path)
+            segments = cache.get(digest, chave_modelo, idioma)
+            if segments is not None:
+                if ctx:
+                    ctx.log("Transcrição encontrada no cache, Whisper não será executado.")
+                return segments
+        except (subprocess.CalledProcessError, ValueError, OSError) as e:
+            if ctx:
+                ctx.log(f"Cache de transcrição indisponível para este vídeo: {e}")
+
+    entrada, mapa = video_path, None
+    if vad:
+        entrada, mapa = _entrada_whisper(video_path, ctx)
+
+    if entrada is None:
+        segments = []
+    else:
+        model = registro.obter(modelo, ctx)
+        result = model.transcribe(entrada, language=idioma, word_timestamps=True)
+        segments = limpar_segmentos(result["segments"])
+        if mapa:
+            mapa.remapear(segments)
+
+    if digest:
+        cache.put(digest, chave_modelo, idioma, segments)
+    return segments
+
+
+def gerar_srt(segments, srt_path):
+    import srt
+
+    legendas = []
+    for i, seg in enumerate(segments):
+        texto = ' '.join(seg['text'].strip().split())
+        legendas.append(srt.Subtitle(
+            index=i+1,
+            start=datetime.timedelta(seconds=seg['start']),
+            end=datetime.timedelta(seconds=seg['end']),
+            content=texto
+        ))
+
+    with open(srt_path, "w", encoding="utf-8") as f:
+        f.write(srt.compose(legendas))
+
+
+def ler_srt(srt_path):
+    """Segmentos de um .srt já existente, no formato que o Whisper devolve."""
+    import srt
+
+    with open(srt_path, encoding="utf-8-sig") as f:
+        legendas = list(srt.parse(f.read()))
+    return [
+        {"start": sub.start.total_seconds(), "end": sub.end.total_seconds(), "text": sub.content}
+        for sub in legendas
+    ]
+
+
+def cor_para_ass(cor_hex):
+    """Converte cor hex para formato ASS (BGR)"""
+    if cor_hex.startswith('#'):
+        cor_hex = cor_hex[1:]
+    r = int(cor_hex[0:2], 16)
+    g = int(cor_hex[2:4], 16)
+    b = int(cor_hex[4:6], 16)
+    return f"&H{b:02X}{g:02X}{r:02X}&"
+
+
+def _cor_estilo_ass(cor):
+    # Estilos ASS usam &HAABBGGRR (alfa 00 = opaco)
+    return "&H00" + cor_para_ass(CORES_NOMEADAS.get(cor.lower(), cor))[2:-1]
+
+
+def _tempo_ass(segundos):
+    centesimos = int(round(segundos * 100))
+    h, resto = divmod(centesimos, 360000)
+    m, resto = divmod(resto, 6000)
+    s, cs = divmod(resto, 100)
+    return f"{h}:{m:02}:{s:02}.{cs:02}"
+
+
+def gerar_ass(segments, ass_path, estilo, largura, altura):
+    """Grava as legendas num .ass com o estilo da interface.
+
+    A posição vertical é o topo do texto em % da altura, como no MoviePy,
+    e a largura útil é 90% do quadro.
+    """
+    margem_lateral = int(largura * 0.05)
+    margem_vertical = int(altura * estilo.posicao_vertical / 100)
+    linhas = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {largura}",
+        f"PlayResY: {altura}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Default,{estilo.fonte},{int(estilo.tamanho)},{_cor_estilo_ass(estilo.cor)},&H000000FF,"
+        f"{_cor_estilo_ass(estilo.cor_contorno)},&H00000000,0,0,0,0,100,100,0,0,1,{estilo.espessura_contorno},0,"
+        f"8,{margem_lateral},{margem_lateral},{margem_vertical},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for seg in segments:
+        texto = ' '.join(seg['text'].strip().split())
+        if not texto:
+            continue
+        texto = texto.replace("{", "(").replace("}", ")")
+        linhas.append(f"Dialogue: 0,{_tempo_ass(seg['start'])},{_tempo_ass(seg['end'])},Default,,0,0,0,,{texto}")
+
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(linhas) + "\n")
+
+
+def renderizar_ass(video_path, output_path, segments, estilo, ctx):
+    """Queima as legendas com o filtro `ass` do ffmpeg em uma única passada."""
+    info = probe(video_path)
+    tmp_dir = tempfile.mkdtemp(prefix="legendas_")
+    try:
+        # O ffmpeg roda dentro da pasta temporária para o filtro receber um
+        # nome simples, sem precisar escapar ':' e '\' de caminhos do Windows.
+        gerar_ass(segments, os.path.join(tmp_dir, "legenda.ass"), estilo, info.width or 1080, info.height or 1920)
+
+        ctx.log("Aplicando legendas com ffmpeg (ASS)...")
+        audio = ["-c:a", "copy"] if info.audio_codec in AUDIO_MP4 else ["-c:a", "aac", "-b:a", "192k"]
+        cmd = [
+            "ffmpeg", "-y", "-i", os.path.abspath(video_path),
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", "ass=legenda.ass",
+            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+            *audio,
+            "-movflags", "+faststart",
+            os.path.abspath(output_path)
+        ]
+        result = run_ffmpeg(cmd, ctx, info.duration, label=os.path.basename(video_path), cwd=tmp_dir)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg erro: {result.stderr[-2000:]}")
+        ctx.log(f"Render: {result.speed:.1f}x tempo real")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def renderizar_moviepy(video_path, output_path, segments, estilo, ctx):
+    """Compõe as legendas com TextClip (ImageMagick) e renderiza com MoviePy."""
+    from moviepy.editor import VideoFileClip, CompositeVideoClip, TextClip
+    from moviepy.config import change_settings
+
+    if os.path.exists(IMAGEMAGICK_BINARY):
+        change_settings({"IMAGEMAGICK_BINARY": IMAGEMAGICK_BINARY})
+
+    ctx.log("Carregando vídeo com MoviePy...")
+    video = VideoFileClip(video_path)
+    legendas = []
+
+    altura_legenda = int(video.h * estilo.posicao_vertical / 100)
+
+    ctx.log("Renderizando legendas no vídeo...")
+
+    for seg in segments:
+        texto = seg['text'].strip()
+        if not texto:
+            continue
+
+        # Configurações comuns para contorno e texto principal
+        text_kwargs = {
+            'txt': texto,
+            'fontsize': int(estilo.tamanho),
+            'font': estilo.fonte,
+            'method': 'caption',  # Ou 'pango' se disponível
+            'size': (video.w * 0.9, None),  # Largura fixa, altura automática
+            'align': 'center',
+            'print_cmd': True  # Debug (opcional)
+        }
+
+        # Camada de contorno (stroke externo)
+        contorno = TextClip(
+            **text_kwargs,
+            color=estilo.cor_contorno,
+            stroke_color=estilo.cor_contorno,
+            stroke_width=estilo.espessura_contorno * 2,  # Stroke mais largo
+        ).set_position(("center", altura_legenda)).set_duration(seg['end'] - seg['start']).set_start(seg['start'])
+
+        # Camada de texto principal (sem stroke)
+        texto_principal = TextClip(
+            **text_kwargs,
+            color=estilo.cor,
+            stroke_width=0,  # Sem contorno
+        ).set_position(("center", altura_legenda)).set_duration(seg['end'] - seg['start']).set_start(seg['start'])
+
+        # Adiciona ambas as camadas (contorno primeiro)
+        legendas.extend([contorno, texto_principal])
+
+    video_final = CompositeVideoClip([video] + legendas)
+    video_final.write_videofile(output_path, codec="libx264", audio_codec="aac")
+
+
+def processar_video(job, ctx):
+    tmp = part_path(job.output_path)
+    try:
+        srt_path = f"{os.path.splitext(job.output_path)[0]}.srt"
+
+        ctx.log("Transcrevendo áudio...")
+        segments = transcrever_video(job.video_path, job.modelo, ctx, job.idioma, job.vad)
+
+        ctx.log("Gerando legendas SRT...")
+        gerar_srt(segments, srt_path)
+
+        if job.renderizador == "moviepy":
+            renderizar_moviepy(job.video_path, tmp, segments, job.estilo, ctx)
+        else:
+            renderizar_ass(job.video_path, tmp, segments, job.estilo, ctx)
+
+        publish(tmp, job.output_path)
+        return True
+
+    except Exception as e:
+        discard(tmp)
+        ctx.log(f"Erro ao processar vídeo ({job.renderizador}): {e}")
+        return False
+
+
+def processar_pasta(pasta, ctx, modelo="small", estilo=None, renderizador="ass", idioma=None, refazer=False, vad=True,
+                    retomar=False):
+    """Legenda todos os vídeos da pasta. Retorna a pasta de saída, ou None se não houver vídeos.
+
+    Com `refazer`, vídeos já legendados são renderizados de novo (útil para
+    trocar o estilo: a transcrição vem do cache). Com `retomar`, só os vídeos
+    que o journal registra como não concluídos no lote anterior.
+    """
+    ctx.log(f"Pasta selecionada: {pasta}")
+
+    output_dir = os.path.join(pasta, "legendados")
+    os.makedirs(output_dir, exist_ok=True)
+    ctx.log(f"Pasta de saída criada: {output_dir}")
+
+    journal = JobJournal.for_folder(output_dir, "legendar")
+    if retomar:
+        videos = [os.path.relpath(chave, pasta) for chave, _ in journal.unfinished() if os.path.exists(chave)]
+        ctx.log(f"Retomando {len(videos)} vídeo(s) não concluído(s).")
+    else:
+        ctx.log("Procurando vídeos...")
+        videos = list_media(pasta, VIDEO_EXTENSIONS)
+        if not videos:
+            ctx.log(f"Nenhum vídeo encontrado na pasta. Formatos suportados: {', '.join(VIDEO_EXTENSIONS)}")
+            return None
+        ctx.log(f"Encontrados {len(videos)} vídeos para processar.")
+        unicos = set(skip_duplicates("legendar", [os.path.join(pasta, v) for v in videos], ctx, output_dir))
+        videos = [v for v in videos if os.path.join(pasta, v) in unicos]
+        for video in videos:
+            journal.plan(os.path.join(pasta, video), caminho_saida(os.path.join(pasta, video), output_dir))
+
+    for i, video in enumerate(videos, start=1):
+        if ctx.cancelled:
+            break
+        video_path = os.path.join(pasta, video)
+        output_path = caminho_saida(video_path, output_dir)
+
+        if journal.is_done(video_path, output_path) and not refazer:
+            ctx.log(f"Pulando {video} (já existe versão legendada)")
+        else:
+            ctx.log(f"\nProcessando: {video}")
+            journal.start(video_path, output_path)
+            ok = processar_video(LegendaJob(video_path, output_path, modelo, estilo, renderizador, idioma, vad), ctx)
+            journal.finish(video_path, ok)
+            if ok:
+                mark_processed("legendar", video_path, output_path)
+            ctx.log(f"Concluído: {video}" if ok else f"Falha ao processar: {video}")
+        ctx.progress(i, len(videos))
+
+    ctx.log("\nProcessamento concluído!")
+    return output_dir
@@ -0,0 +1,60 @@
+import os
+import re
+import subprocess
+import unicodedata
+
+from .probe import probe
+
+VIDEO_EXTENSIONS = ['mp4', 'mkv', 'avi', 'mov', 'flv', 'wmv', 'm4v', 'webm', 'mpg', 'mpeg', 'ts', 'ogv', '3gp']
+AUDIO_EXTENSIONS = ['mp3', 'wav', 'aac', 'ogg', 'm4a']
+
+
+def check_ffmpeg():
+    try:
+        subprocess.run(["ffmpeg", "-version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return True
+    except Exception:
+        return False
+
+
+def get_media_duration(path):
+    """Obtém a duração da mídia em segundos (ffprobe, com cache em disco)"""
+    return probe(path).duration
+
+
+def list_media(folder, extensions):
+    """Lista (ordenada) os arquivos da pasta cuja extensão está em `extensions`."""
+    return sorted(
+        f for f in os.listdir(folder)
+        if os.path.isfile(os.path.join(folder, f)) and f.rsplit('.', 1)[-1].lower() in extensions
+    )
+
+
+def sanitize_filename(name):
+    substitutions = {
+        ' ': '_', '＂': '', '"': '', "'": '', '´': '', '`': '',
+        '<': '', '>': '', '?': '', '|': '', '\\': '', '/': '', ':': '',
+        '*': '', '%': '', '&': '', '^': '',
+        'ç': 'c', 'ã': 'a', 'á': 'a', 'à': 'a', 'â': 'a',
+        'é': 'e', 'ê': 'e', 'í': 'i',
+        'ó': 'o', 'ô': 'o', 'õ': 'o',
+        'ú': 'u', 'ü': 'u', 'ñ': 'n',
+        '｜': '', '¦': '', '#': ''
+    }
+    for original, replacement in substitutions.items():
+        name = name.replace(original, replacement)
+    name = unicodedata.normalize('NFKD', name)
+    name = name.encode('ASCII', 'ignore').decode('ASCII')
+    name = re.sub(r'_+', '_', name).strip('_')
+    return name[:200]
+
+
+def normalize_filename(name):
+    name = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('ASCII')
+    return ''.join(c if c.isalnum() or c in ['-', '_'] else '_' for c in name).strip('_')
+
+
+def time_to_seconds(t):
+    """Converte 'HH:MM:SS.ms' (formato do ffmpeg) em segundos."""
+    h, m, s = t.split(':')
+    return int(h) * 3600 + int(m) * 60 + float(s)
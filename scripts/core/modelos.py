@@ -0,0 +1,67 @@
+import gc
+import threading
+import time
+from collections import OrderedDict
+
+MAX_MODELOS_PADRAO = 2
+
+
+def tamanho_modelo(model):
+    """Memória ocupada pelos pesos (bytes), quando o modelo é um módulo torch."""
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except AttributeError:
+        return 0
+
+
+class RegistroModelos:
+    """Modelos Whisper carregados no processo, com despejo LRU por nome.
+
+    O carregamento é preguiçoso (na primeira transcrição que pede o modelo) e
+    o mesmo objeto é reaproveitado por todos os vídeos do lote.
+    """
+
+    def __init__(self, max_modelos=MAX_MODELOS_PADRAO, carregar=None):
+        self.max_modelos = max_modelos
+        self._carregar = carregar
+        self._modelos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _carregar_modelo(self, nome):
+        if self._carregar:
+            return self._carregar(nome)
+        import whisper
+
+        return whisper.load_model(nome)
+
+    def obter(self, nome, ctx=None):
+        with self._lock:
+            if nome in self._modelos:
+                self._modelos.move_to_end(nome)
+                return self._modelos[nome]
+
+            while self._modelos and len(self._modelos) >= self.max_modelos:
+                antigo, _ = self._modelos.popitem(last=False)
+                gc.collect()
+                if ctx:
+                    ctx.log(f"Modelo Whisper '{antigo}' descarregado da memória")
+
+            inicio = time.monotonic()
+            model = self._carregar_modelo(nome)
+            self._modelos[nome] = model
+            if ctx:
+                mb = tamanho_modelo(model) / 1024 / 1024
+                ctx.log(f"Modelo Whisper '{nome}' carregado em {time.monotonic() - inicio:.1f}s ({mb:.0f} MB)")
+            return model
+
+    def carregados(self):
+        with self._lock:
+            return list(self._modelos)
+
+    def limpar(self):
+        with self._lock:
+            self._modelos.clear()
+        gc.collect()
+
+
+registro = RegistroModelos()
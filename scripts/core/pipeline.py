@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+
+from . import encoders, legendas, trechos
+from .analise import AnaliseCache
+from .journal import discard, part_path, publish
+from .media import sanitize_filename
+from .probe import probe
+from .runner import run_ffmpeg
+from .vertical import BLUR_MODES, CROP_SCALE_FILTER, TARGET_H, TARGET_W, blur_graph
+
+SUBTITLE_NAME = "legenda.ass"  # o ffmpeg roda na pasta temporária, como em legendas.renderizar_ass
+
+
+@dataclass
+class PipelineJob:
+    """Um vídeo de origem levado direto a shorts verticais, legendados e divididos."""
+    video_path: str
+    output_dir: str
+    max_seconds: float = 180
+    mode: str = "vertical_blur_fast"
+    modelo: str = "small"  # modelo do Whisper, se não houver `srt_path`
+    idioma: str = None
+    vad: bool = True
+    srt_path: str = None  # transcrição pronta; None = Whisper (com cache)
+    estilo: legendas.EstiloLegenda = None  # None = sem legenda queimada
+    tolerancia: float = 0  # > 0 ajusta os cortes a silêncios/cenas (ver core.trechos)
+    profile: str = encoders.DEFAULT_CRF
+    threads: int = 0
+
+    @property
+    def base_name(self):
+        return sanitize_filename(os.path.splitext(os.path.basename(self.video_path))[0])
+
+    def output_path(self, index):
+        return os.path.join(self.output_dir, f"{self.base_name}_short{index:02}.mp4")
+
+
+def canvas_graph(mode, subtitles=None):
+    """Grafo até o quadro final 1080x1920 (sem rótulo de saída), com a legenda queimada por cima."""
+    graph = blur_graph(mode) if mode in BLUR_MODES else f"[0:v]{CROP_SCALE_FILTER}"
+    if subtitles:
+        graph += f",ass={subtitles}"
+    return graph
+
+
+def build_command(job, bounds, has_audio, subtitles=None):
+    """Um único ffmpeg: decodifica uma vez e grava um arquivo por trecho.
+
+    O quadro vertical (e a legenda) é montado uma vez sobre a linha do tempo
+    inteira; `split`/`asplit` entregam cópias a cada saída, e `trim`/`atrim`
+    recortam o trecho de cada uma, recomeçando os timestamps do zero.
+    """
+    n = len(bounds) - 1
+    graph = [canvas_graph(job.mode, subtitles) + ",split=" + str(n) + "".join(f"[c{i}]" for i in range(n))]
+    if has_audio:
+        graph.append("[0:a]asplit=" + str(n) + "".join(f"[s{i}]" for i in range(n)))
+    outputs = []
+    encode = encoders.PROFILES[job.profile].video_args()
+    threads = ["-threads", str(job.threads)] if job.threads else []
+    for i in range(n):
+        start, end = bounds[i], bounds[i + 1]
+        graph.append(f"[c{i}]trim=start={start:.3f}:end={end:.3f},setpts=PTS-STARTPTS[v{i}]")
+        outputs += ["-map", f"[v{i}]", *encode]
+        if has_audio:
+            graph.append(f"[s{i}]atrim=start={start:.3f}:end={end:.3f},asetpts=PTS-STARTPTS[a{i}]")
+            outputs += ["-map", f"[a{i}]", "-c:a", "aac", "-b:a", "192k"]
+        outputs += ["-movflags", "+faststart", *threads, os.path.abspath(part_path(job.output_path(i + 1)))]
+    return [
+        "ffmpeg", "-y", "-i", os.path.abspath(job.video_path),
+        "-filter_complex", ";".join(graph),
+        *outputs
+    ]
+
+
+def transcript(job, ctx):
+    if job.srt_path:
+        ctx.log(f"Usando a transcrição de {os.path.basename(job.srt_path)}")
+        return legendas.ler_srt(job.srt_path)
+    ctx.log("Transcrevendo áudio...")
+    return legendas.transcrever_video(job.video_path, job.modelo, ctx, job.idioma, job.vad)
+
+
+def plan(job, duration, ctx):
+    """Limites [0, corte1, ..., duração] dos trechos, com o planejador de core.trechos."""
+    clip = trechos.ClipJob(job.video_path, job.output_dir, job.max_seconds, tolerancia=job.tolerancia,
+                           cache=AnaliseCache() if job.tolerancia > 0 else None)
+    cuts = trechos.plan_cuts(duration, job.max_seconds, None, trechos.preferred_points(clip, ctx), job.tolerancia)
+    return [0.0] + cuts + [duration]
+
+
+def render(job, ctx):
+    """Vertical, legenda e divisão em trechos numa única decodificação/codificação.
+
+    Retorna a lista de arquivos gerados; nada é publicado se o ffmpeg falhar.
+    """
+    if encoders.PROFILES[job.profile].two_pass:
+        raise ValueError(f"O perfil {job.profile} usa 2 passagens; escolha um perfil de passagem única.")
+    info = probe(job.video_path)
+    if not info.has_video:
+        raise ValueError(f"{os.path.basename(job.video_path)} não tem vídeo.")
+    os.makedirs(job.output_dir, exist_ok=True)
+
+    bounds = plan(job, info.duration, ctx)
+    outputs = [job.output_path(i + 1) for i in range(len(bounds) - 1)]
+    ctx.log(f"{os.path.basename(job.video_path)}: {info.duration:.1f}s em {len(outputs)} trecho(s), "
+            f"modo {job.mode}, perfil {job.profile}")
+
+    tmp_dir = tempfile.mkdtemp(prefix="pipeline_")
+    ok = False
+    try:
+        subtitles = None
+        if job.estilo is not None:
+            segments = transcript(job, ctx)
+            legendas.gerar_ass(segments, os.path.join(tmp_dir, SUBTITLE_NAME), job.estilo, TARGET_W, TARGET_H)
+            subtitles = SUBTITLE_NAME
+
+        cmd = build_command(job, bounds, info.has_audio, subtitles)
+        result = run_ffmpeg(cmd, ctx, info.duration, label=os.path.basename(job.video_path), cwd=tmp_dir)
+        if result.returncode != 0 or ctx.cancelled:
+            if ctx.cancelled:
+                return []
+            raise RuntimeError(f"FFmpeg erro: {result.stderr[-2000:]}")
+        for output in outputs:
+            publish(part_path(output), output)
+        ok = True
+        ctx.log(f"✅ {len(outputs)} short(s) de {os.path.basename(job.video_path)} ({result.speed:.1f}x tempo real)")
+        return outputs
+    finally:
+        if not ok:
+            for output in outputs:
+                discard(part_path(output))
+        shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+from dataclasses import asdict, dataclass, field
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "make-shortsvideos"))
+
+
+@dataclass
+class MediaInfo:
+    duration: float
+    format_name: str = ""
+    video_codec: str = ""
+    audio_codec: str = ""
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    streams: list = field(default_factory=list)
+
+    @property
+    def has_video(self):
+        return bool(self.video_codec)
+
+    @property
+    def has_audio(self):
+        return bool(self.audio_codec)
+
+
+def _parse_rate(rate):
+    try:
+        num, den = rate.split('/')
+        return float(num) / float(den) if float(den) else 0.0
+    except (AttributeError, ValueError):
+        return 0.0
+
+
+def parse_ffprobe(data):
+    """Converte a saída JSON do ffprobe (-show_format -show_streams) em MediaInfo."""
+    fmt = data.get("format", {})
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video" and not s.get("disposition", {}).get("attached_pic")), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    duration = fmt.get("duration") or video.get("duration") or audio.get("duration")
+    if duration is None:
+        raise ValueError("ffprobe não retornou duração")
+
+    return MediaInfo(
+        duration=float(duration),
+        format_name=fmt.get("format_name", ""),
+        video_codec=video.get("codec_name", ""),
+        audio_codec=audio.get("codec_name", ""),
+        width=int(video.get("width", 0)),
+        height=int(video.get("height", 0)),
+        fps=_parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate")),
+        streams=[
+            {k: s[k] for k in ("index", "codec_type", "codec_name", "profile", "level", "pix_fmt", "width", "height", "sample_rate", "channels", "bit_rate") if k in s}
+            for s in streams
+        ],
+    )
+
+
+def run_ffprobe(path):
+    cmd = [
+        'ffprobe', '-v', 'error', '-print_format', 'json',
+        '-show_format', '-show_streams', str(path)
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    return parse_ffprobe(json.loads(result.stdout))
+
+
+class ProbeCache:
+    """Cache em SQLite dos metadados do ffprobe.
+
+    A chave é o caminho absoluto; a entrada só vale enquanto tamanho e mtime
+    do arquivo forem os mesmos da sondagem original.
+    """
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db_path = os.path.join(CACHE_DIR, "probe.sqlite")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS media ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, info TEXT)"
+        )
+        self._conn.commit()
+
+    def get(self, path, stat=None):
+        path = os.path.abspath(str(path))
+        stat = stat or os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT info FROM media WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        return MediaInfo(**json.loads(row[0])) if row else None
+
+    def put(self, path, info, stat=None):
+        path = os.path.abspath(str(path))
+        stat = stat or os.stat(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media (path, size, mtime_ns, info) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, json.dumps(asdict(info))),
+            )
+            self._conn.commit()
+
+    def probe(self, path):
+        """Retorna os metadados do arquivo, rodando ffprobe só em caso de cache miss."""
+        stat = os.stat(str(path))
+        info = self.get(path, stat)
+        if info is None:
+            info = run_ffprobe(path)
+            self.put(path, info, stat)
+        return info
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Cache compartilhado pelo processo; None se o disco não permitir criá-lo."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None and os.environ.get("SHORTS_PROBE_CACHE", "1") != "0":
+            try:
+                _default_cache = ProbeCache()
+            except (OSError, sqlite3.Error):
+                _default_cache = False
+        return _default_cache or None
+
+
+def probe(path):
+    cache = default_cache()
+    if cache is None:
+        return run_ffprobe(path)
+    return cache.probe(path)
@@ -0,0 +1,116 @@
+import collections
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+
+PROGRESS_ARGS = ["-progress", "pipe:1", "-nostats"]
+STDERR_TAIL = 200  # linhas de stderr guardadas para mensagens de erro
+
+
+@dataclass
+class FFmpegProgress:
+    """Um bloco de `-progress` do ffmpeg, já convertido em tipos."""
+    frame: int = 0
+    fps: float = 0.0
+    bitrate_kbps: float = 0.0
+    total_size: int = 0
+    out_time: float = 0.0  # segundos de saída já produzidos
+    speed: float = 0.0  # múltiplo do tempo real (1.0 = tempo real)
+    done: bool = False
+
+    def percent(self, duration):
+        if self.done:
+            return 100.0
+        return min(100.0, self.out_time / duration * 100) if duration else 0.0
+
+
+@dataclass
+class FFmpegResult:
+    returncode: int
+    stderr: str
+    progress: FFmpegProgress
+    elapsed: float
+
+    @property
+    def speed(self):
+        """Velocidade média do job (segundos de mídia por segundo de relógio)."""
+        if self.progress.out_time and self.elapsed:
+            return self.progress.out_time / self.elapsed
+        return self.progress.speed
+
+
+def _number(value, cast=float):
+    try:
+        return cast(value.strip().rstrip("x").replace("kbits/s", ""))
+    except (AttributeError, ValueError):
+        return cast(0)
+
+
+def parse_block(values):
+    """Converte os pares chave=valor de um bloco de progresso em FFmpegProgress."""
+    out_time_us = _number(values.get("out_time_us") or values.get("out_time_ms"), int)
+    return FFmpegProgress(
+        frame=_number(values.get("frame"), int),
+        fps=_number(values.get("fps")),
+        bitrate_kbps=_number(values.get("bitrate")),
+        total_size=_number(values.get("total_size"), int),
+        out_time=max(0, out_time_us) / 1_000_000,
+        speed=_number(values.get("speed")),
+        done=values.get("progress") == "end",
+    )
+
+
+def iter_progress(lines):
+    """Agrupa as linhas de `-progress` em blocos; cada bloco termina em `progress=`.
+
+    Valores `N/A` (comuns no último bloco) mantêm o valor do bloco anterior.
+    """
+    values = {}
+    for line in lines:
+        key, sep, value = line.strip().partition("=")
+        if not sep or value == "N/A":
+            continue
+        values[key] = value
+        if key == "progress":
+            yield parse_block(values)
+
+
+def with_progress(cmd):
+    return [cmd[0], *PROGRESS_ARGS, *cmd[1:]]
+
+
+def run_ffmpeg(cmd, ctx, duration=0, label=None, on_progress=None, interval=0.5, **kwargs):
+    """Roda o ffmpeg com `-progress pipe:1` e repassa o andamento.
+
+    `ctx.file_progress` (e `on_progress(FFmpegProgress)`, se dado) são chamados
+    no máximo a cada `interval` segundos, e sempre no último bloco. O stderr é
+    drenado numa thread à parte e só as últimas linhas são guardadas.
+    """
+    start = time.perf_counter()
+    process = ctx.popen(
+        with_progress(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, bufsize=1, **kwargs
+    )
+    tail = collections.deque(maxlen=STDERR_TAIL)
+    reader = threading.Thread(target=lambda: tail.extend(process.stderr), daemon=True)
+    reader.start()
+
+    last = FFmpegProgress()
+    last_report = 0.0
+    try:
+        for last in iter_progress(process.stdout):
+            if ctx.cancelled:
+                process.terminate()
+                break
+            now = time.perf_counter()
+            if last.done or now - last_report >= interval:
+                last_report = now
+                ctx.file_progress(last.percent(duration), label)
+                if on_progress:
+                    on_progress(last)
+        process.wait()
+        reader.join()
+    finally:
+        ctx.release(process)
+    return FFmpegResult(process.returncode, "".join(tail), last, time.perf_counter() - start)
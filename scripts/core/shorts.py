@@ -0,0 +1,329 @@
+import glob
+import hashlib
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import encoders
+from .dedup import mark_processed, skip_duplicates
+from .journal import JobJournal, discard, part_path, publish, sweep_parts
+from .media import get_media_duration, normalize_filename
+from .probe import probe
+from .runner import run_ffmpeg
+
+VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.mov']
+AUDIO_EXTENSIONS = ['.mp3', '.wav', '.aac', '.ogg', '.m4a']
+RESOLUTIONS = ["720x1280", "1080x1920", "1280x720", "1920x1080"]
+THREADS_POR_JOB_PADRAO = 4  # o libx264 escala bem até ~4 threads em 1080p
+POOL_GOP = 1  # segundos entre keyframes nos fundos pré-normalizados
+
+
+@dataclass
+class ShortsBatch:
+    audio_folder: str
+    video_folder: str
+    output_resolution: tuple = (1080, 1920)
+    seed: int = None  # None = sorteia uma semente e registra no log
+    workers: int = 0  # 0 = dimensiona pelos núcleos e threads por job
+    threads_per_job: int = 0  # -threads de cada ffmpeg (0 = padrão)
+    use_pool: bool = False  # corta dos fundos pré-normalizados, em stream copy
+    profile: str = encoders.DEFAULT_ABR  # perfil de encoder (ver core.encoders)
+    resume: bool = False  # refaz só os shorts que o journal registra como não concluídos
+
+    @property
+    def shorts_folder(self):
+        return Path(self.audio_folder) / "SHORTS_GERADOS"
+
+    def audio_files(self):
+        return sorted(f for f in Path(self.audio_folder).glob("*") if f.suffix.lower() in AUDIO_EXTENSIONS)
+
+    def video_files(self):
+        return sorted(f for f in Path(self.video_folder).glob("*") if f.suffix.lower() in VIDEO_EXTENSIONS)
+
+
+def pool_folder(video_folder, resolution):
+    return Path(video_folder) / f"POOL_{resolution[0]}x{resolution[1]}"
+
+
+def pool_args(resolution, profile=encoders.DEFAULT_ABR):
+    """Argumentos de normalização dos fundos: tudo que muda o conteúdo do pool."""
+    return [
+        "-vf", build_filter(*resolution),
+        *encoders.PROFILES[profile].video_args(),
+        "-pix_fmt", "yuv420p",
+        # Keyframe a cada POOL_GOP segundos: qualquer corte alinhado vira stream copy
+        "-force_key_frames", f"expr:gte(t,n_forced*{POOL_GOP})",
+        "-sc_threshold", "0",
+    ]
+
+
+def pool_path(video_path, resolution, profile=encoders.DEFAULT_ABR):
+    """Fundo normalizado de `video_path`; o nome leva um hash dos argumentos de normalização,
+    então mudar o perfil, a resolução ou o GOP gera outro arquivo em vez de reusar o antigo."""
+    video_path = Path(video_path)
+    key = hashlib.sha1(" ".join(pool_args(resolution, profile)).encode()).hexdigest()[:10]
+    return pool_folder(video_path.parent, resolution) / f"{video_path.name}.{key}.mp4"
+
+
+def parse_resolution(text):
+    w, h = map(int, text.split("x"))
+    return (w, h)
+
+
+def size_pool(workers=0, threads_per_job=0, cpu_count=None):
+    """Quantos encodes simultâneos e quantas threads cada um recebe.
+
+    Sem valores explícitos, cada ffmpeg fica com THREADS_POR_JOB_PADRAO threads
+    e o número de encodes é núcleos / threads, para não sobrecarregar a máquina.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    threads = threads_per_job or THREADS_POR_JOB_PADRAO
+    if not workers:
+        workers = max(1, cpu_count // threads)
+    if not threads_per_job and workers > 1:
+        # Divide os núcleos entre os encodes simultâneos
+        threads_per_job = max(1, cpu_count // workers)
+    return workers, threads_per_job
+
+
+def rng_for(seed, audio_path):
+    """Gerador próprio de cada áudio: a escolha do fundo não depende da ordem de execução."""
+    return random.Random(f"{seed}:{Path(audio_path).name}")
+
+
+def build_filter(target_w, target_h):
+    # Filtro adaptável para vertical/horizontal
+    if target_h > target_w:
+        # Portrait
+        return f"scale=-2:{target_h},crop='if(gt(iw,{target_w}),{target_w},iw)':{target_h}"
+    # Landscape
+    return f"scale=-2:{target_h},crop={target_w}:{target_h}"
+
+
+def _run_step(cmd, ctx, duration, label):
+    result = run_ffmpeg(cmd, ctx, duration, label=label)
+    if result.returncode != 0:
+        raise Exception(f"FFmpeg erro: {result.stderr}")
+    return result.speed
+
+
+def _run_encode(cmd, profile, output_path, ctx, duration=0, label=None):
+    """Roda as passagens do perfil; retorna a velocidade (x tempo real) da última."""
+    profile = encoders.PROFILES[profile]
+    passlog = str(output_path) + ".passlog"
+    try:
+        for step in encoders.pass_commands(profile, cmd, passlog):
+            speed = _run_step(step, ctx, duration, label)
+        return speed
+    finally:
+        if profile.two_pass:
+            encoders.remove_passlog(passlog)
+
+
+def make_short(audio_path, video_files, output_path, resolution, ctx, rng, threads=0, from_pool=False,
+               profile=encoders.DEFAULT_ABR):
+    """Gera um short com o áudio sobre um trecho sorteado (por `rng`) de um vídeo de fundo.
+
+    Com `from_pool`, os fundos já estão na resolução alvo: o início é alinhado
+    ao GOP do pool e o vídeo vai em stream copy, só o áudio é codificado.
+    Retorna a velocidade do encode, em múltiplos do tempo real.
+    """
+    video_path = rng.choice(video_files)
+    audio_duration = get_media_duration(audio_path)
+    video_duration = get_media_duration(video_path)
+
+    if video_duration < 1 or audio_duration < 1:
+        raise Exception("Arquivo com duração inválida")
+
+    max_start = max(0, video_duration - audio_duration)
+    start_time = rng.uniform(0, max_start)
+
+    if from_pool:
+        cmd = [
+            "ffmpeg",
+            "-ss", str(int(start_time // POOL_GOP) * POOL_GOP),
+            "-i", str(video_path),
+            "-i", str(audio_path),
+            "-t", str(audio_duration),
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-b:a", "192k",
+            "-movflags", "+faststart",
+            "-shortest",
+            "-y",
+            str(output_path)
+        ]
+        return _run_step(cmd, ctx, audio_duration, Path(audio_path).name)
+
+    cmd = [
+        "ffmpeg",
+        "-ss", str(start_time),
+        "-i", str(video_path),
+        "-ss", "0",
+        "-i", str(audio_path),
+        "-t", str(audio_duration),
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+        "-vf", build_filter(*resolution),
+        *encoders.PROFILES[profile].video_args(),
+        "-c:a", "aac",
+        "-b:a", "192k",
+        "-movflags", "+faststart",
+        "-shortest",
+        *(["-threads", str(threads)] if threads else []),
+        "-y",
+        str(output_path)
+    ]
+    return _run_encode(cmd, profile, output_path, ctx, audio_duration, Path(audio_path).name)
+
+
+def _normalize_background(video_path, resolution, ctx, threads=0, profile=encoders.DEFAULT_ABR):
+    target = pool_path(video_path, resolution, profile)
+    if target.exists() and target.stat().st_mtime >= Path(video_path).stat().st_mtime:
+        return False
+    # Versões deste fundo normalizadas com outros parâmetros (ou sem hash no nome) não servem mais
+    for stale in target.parent.glob(f"{glob.escape(Path(video_path).name)}.*mp4"):
+        if stale != target:
+            stale.unlink()
+
+    tmp = part_path(target)
+    cmd = [
+        "ffmpeg", "-y", "-i", str(video_path),
+        "-map", "0:v:0", "-an",
+        *pool_args(resolution, profile),
+        "-movflags", "+faststart",
+        *(["-threads", str(threads)] if threads else []),
+        tmp
+    ]
+    try:
+        _run_encode(cmd, profile, tmp, ctx, probe(str(video_path)).duration, Path(video_path).name)
+    except Exception:
+        discard(tmp)
+        raise
+    publish(tmp, target)
+    return True
+
+
+def prepare_pool(video_folder, resolution, ctx, workers=0, threads_per_job=0, profile=encoders.DEFAULT_ABR):
+    """Transcodifica cada vídeo de fundo uma única vez para a resolução alvo.
+
+    Os arquivos vão para POOL_<WxH> dentro da pasta de vídeos, com GOP curto
+    e fixo; só são refeitos quando o original é mais novo. Retorna a lista de
+    fundos normalizados, na mesma ordem dos originais.
+    """
+    sources = sorted(f for f in Path(video_folder).glob("*") if f.suffix.lower() in VIDEO_EXTENSIONS)
+    sources = skip_duplicates("fundos", sources, ctx)
+    pool_folder(video_folder, resolution).mkdir(exist_ok=True)
+    # Fundos pela metade de um lote interrompido
+    sweep_parts(pool_folder(video_folder, resolution))
+    workers, threads = size_pool(workers, threads_per_job)
+    ctx.log(f"🧰 Preparando pool {resolution[0]}x{resolution[1]} com {len(sources)} fundo(s)...")
+
+    ready = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_normalize_background, src, resolution, ctx, threads, profile): src for src in sources}
+        for done, future in enumerate(as_completed(futures), start=1):
+            src = futures[future]
+            try:
+                if future.result():
+                    ctx.log(f"🧰 Normalizado: {src.name}")
+                ready.append(src)
+            except Exception as e:
+                ctx.log(f"❌ Erro ao normalizar {src.name}: {str(e)}")
+            ctx.progress(done, len(sources), f"Pool: {src.name}")
+
+    return [pool_path(src, resolution, profile) for src in sources if src in ready]
+
+
+def short_path(shorts_folder, audio_path):
+    return shorts_folder / f"short_{normalize_filename(audio_path.stem)}.mp4"
+
+
+def _short_job(batch, audio_path, video_files, shorts_folder, seed, threads, journal, ctx):
+    if ctx.cancelled:
+        return
+    output_path = short_path(shorts_folder, audio_path)
+    output_name = output_path.name
+
+    if journal.is_done(audio_path, output_path):
+        ctx.log(f"⏭️ Pulado (já existe): {output_name}")
+        return
+
+    tmp = part_path(output_path)
+    journal.start(audio_path, output_path)
+    try:
+        speed = make_short(
+            audio_path, video_files, tmp, batch.output_resolution, ctx,
+            rng_for(seed, audio_path), threads, batch.use_pool, batch.profile
+        )
+        publish(tmp, output_path)
+        journal.finish(audio_path, True)
+        mark_processed("shorts", audio_path, output_path)
+        ctx.log(f"✅ Gerado: {output_name} ({speed:.1f}x tempo real)")
+    except Exception as e:
+        discard(tmp)
+        journal.finish(audio_path, False, str(e)[-500:])
+        ctx.log(f"❌ Erro em {audio_path.name}: {str(e)}")
+
+
+def generate_shorts(batch, ctx):
+    """Gera um short por áudio do lote, com vários ffmpeg em paralelo.
+
+    Cada áudio sorteia fundo e ponto de início com um gerador derivado da
+    semente e do nome do arquivo, então lotes paralelos e sequenciais com a
+    mesma semente produzem os mesmos shorts. Retorna False se faltarem arquivos.
+    """
+    audio_files = batch.audio_files()
+    video_files = batch.video_files()
+
+    if not audio_files or not video_files:
+        ctx.log("❌ Não foram encontrados áudios ou vídeos válidos.")
+        return False
+
+    shorts_folder = batch.shorts_folder
+    journal = JobJournal.for_folder(shorts_folder, "shorts")
+    if batch.resume:
+        audio_files = [Path(key) for key, _ in journal.unfinished() if os.path.exists(key)]
+        ctx.log(f"🔁 Retomando {len(audio_files)} short(s) não concluído(s).")
+    else:
+        # Mesmo áudio com outro nome vira o mesmo short; fundos repetidos só enviesam o sorteio
+        # (esses só são tirados do lote, sem contar como trabalho economizado)
+        audio_files = skip_duplicates("shorts", audio_files, ctx, shorts_folder)
+    for audio_path in audio_files:
+        journal.plan(audio_path, short_path(shorts_folder, audio_path))
+
+    seed = batch.seed if batch.seed is not None else random.randrange(1_000_000)
+    workers, threads = size_pool(batch.workers, batch.threads_per_job)
+
+    if batch.use_pool:
+        video_files = prepare_pool(
+            batch.video_folder, batch.output_resolution, ctx, batch.workers, batch.threads_per_job, batch.profile
+        )
+        if not video_files:
+            ctx.log("❌ Nenhum fundo normalizado disponível.")
+            return False
+    else:
+        video_files = skip_duplicates("fundos", video_files, ctx)
+
+    ctx.progress(0, len(audio_files))
+    ctx.log(f"🔊 Áudios encontrados: {len(audio_files)}")
+    ctx.log(f"🎥 Vídeos encontrados: {len(video_files)}")
+    ctx.log(f"📐 Resolução escolhida: {batch.output_resolution[0]}x{batch.output_resolution[1]}")
+    ctx.log(f"🎛️ Perfil: {batch.profile} ({encoders.PROFILES[batch.profile].describe()})")
+    ctx.log(f"🎲 Semente: {seed} | ⚙️ {workers} encode(s) simultâneo(s)" + (f", {threads} thread(s) cada" if threads else ""))
+    ctx.log("⏳ Processando...")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_short_job, batch, audio_path, video_files, shorts_folder, seed, threads, journal, ctx): audio_path
+            for audio_path in audio_files
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            future.result()
+            ctx.progress(done, len(audio_files), f"Concluído: {futures[future].name}")
+
+    return True
@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+
+from .probe import CACHE_DIR
+
+
+def hash_audio(video_path):
+    """SHA-256 dos pacotes do 1º stream de áudio (stream copy, sem decodificar)."""
+    cmd = [
+        "ffmpeg", "-v", "error", "-i", str(video_path),
+        "-map", "0:a:0", "-c", "copy", "-f", "hash", "-hash", "sha256", "-"
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    match = re.search(r"SHA256=([0-9a-f]+)", result.stdout)
+    if not match:
+        raise ValueError("ffmpeg não retornou o hash do áudio")
+    return match.group(1)
+
+
+class TranscricaoCache:
+    """Transcrições do Whisper em SQLite, por hash do áudio, modelo e idioma.
+
+    O hash do áudio também fica guardado por caminho/tamanho/mtime, então um
+    vídeo já visto não precisa nem ser lido de novo para achar a transcrição.
+    """
+
+    def __init__(self, db_path=None):
+        if db_path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db_path = os.path.join(CACHE_DIR, "transcricoes.sqlite")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS audio_hash ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcricao ("
+            "hash TEXT, modelo TEXT, idioma TEXT, segments TEXT, PRIMARY KEY (hash, modelo, idioma))"
+        )
+        self._conn.commit()
+
+    def hash_de(self, video_path):
+        path = os.path.abspath(str(video_path))
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hash FROM audio_hash WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return row[0]
+        digest = hash_audio(path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_hash (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+            self._conn.commit()
+        return digest
+
+    def get(self, digest, modelo, idioma):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segments FROM transcricao WHERE hash = ? AND modelo = ? AND idioma = ?",
+                (digest, modelo, idioma or "auto"),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def qualquer(self, digest):
+        """A transcrição mais recente do áudio, de qualquer modelo ou idioma."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segments FROM transcricao WHERE hash = ? ORDER BY rowid DESC LIMIT 1", (digest,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def vazio(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM transcricao LIMIT 1").fetchone() is None
+
+    def put(self, digest, modelo, idioma, segments):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcricao (hash, modelo, idioma, segments) VALUES (?, ?, ?, ?)",
+                (digest, modelo, idioma or "auto", json.dumps(segments, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+
+def limpar_segmentos(segments):
+    """Mantém só o que a legenda usa (tempos, texto e palavras), em tipos JSON."""
+    limpos = []
+    for seg in segments:
+        item = {"start": float(seg["start"]), "end": float(seg["end"]), "text": seg["text"]}
+        if seg.get("words"):
+            item["words"] = [
+                {"word": w["word"], "start": float(w["start"]), "end": float(w["end"])}
+                for w in seg["words"]
+            ]
+        limpos.append(item)
+    return limpos
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_padrao():
+    """Cache compartilhado pelo processo; None se desativado ou indisponível."""
+    global _cache
+    with _cache_lock:
+        if _cache is None and os.environ.get("SHORTS_TRANSCRICAO_CACHE", "1") != "0":
+            try:
+                _cache = TranscricaoCache()
+            except (OSError, sqlite3.Error):
+                _cache = False
+        return _cache or None
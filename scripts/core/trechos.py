@@ -0,0 +1,353 @@
+import bisect
+import os
+import shutil
+import subprocess
+import tempfile
+from dataclasses import dataclass
+
+from .analise import AnaliseCache, analisar
+from .dedup import mark_processed, skip_duplicates
+from .destaques import ranquear
+from .media import get_media_duration, list_media
+from .probe import probe, run_ffprobe
+
+VIDEO_EXTENSIONS = ['mp4', 'mkv', 'avi', 'mov', 'flv', 'wmv', 'm4v', 'webm']
+
+# copia:     um ffmpeg -ss/-t por trecho (comportamento original, pode sobrepor)
+# segmentos: lê os keyframes uma vez e gera todos os trechos num único ffmpeg
+# preciso:   corte exato; só o pedaço de GOP antes do 1º keyframe é recodificado
+MODOS = ["copia", "segmentos", "preciso"]
+TOLERANCIA_PADRAO = 10  # segundos que um corte pode recuar para cair num silêncio ou corte de cena
+
+
+def parse_duration(text):
+    parts = text.strip().split(':')
+    try:
+        if len(parts) == 1:
+            minutes = int(parts[0])
+            total = minutes * 60
+        elif len(parts) == 2:
+            minutes = int(parts[0])
+            seconds = int(parts[1])
+            total = minutes * 60 + seconds
+        else:
+            raise ValueError("Formato inválido")
+    except Exception:
+        raise ValueError("Duração inválida. Use mm:ss ou minutos apenas.")
+    if total <= 0:
+        raise ValueError("A duração dos trechos precisa ser maior que zero.")
+    return total
+
+
+@dataclass
+class ClipJob:
+    video_path: str
+    output_dir: str
+    max_seconds: float
+    modo: str = "copia"
+    tolerancia: float = 0  # > 0 ajusta os cortes a silêncios/cenas (ver core.analise)
+    cache: AnaliseCache = None
+    destaques: int = 0  # > 0 extrai só as N melhores janelas (ver core.destaques)
+
+    @property
+    def base_name(self):
+        return os.path.splitext(os.path.basename(self.video_path))[0]
+
+    def output_path(self, index):
+        return os.path.join(self.output_dir, f"{self.base_name}_trecho{index:02}.mp4")
+
+    def highlight_path(self, rank):
+        return os.path.join(self.output_dir, f"{self.base_name}_destaque{rank:02}.mp4")
+
+
+def _run(cmd, ctx):
+    result = ctx.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, cmd, stderr=result.stderr)
+
+
+def read_keyframes(video_path):
+    """Timestamps (s) dos keyframes do 1º stream de vídeo, lidos dos pacotes sem decodificar."""
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.append(float(pts))
+    return sorted(keyframes)
+
+
+def _snap(points, start, target, tolerance):
+    """Último ponto em (start, target] a no máximo `tolerance` segundos do alvo."""
+    i = bisect.bisect_right(points, target) - 1
+    if i >= 0 and points[i] >= target - tolerance and points[i] > start + 0.5:
+        return points[i]
+    return None
+
+
+def plan_cuts(duration, max_seconds, keyframes=None, preferred=(), tolerance=0):
+    """Pontos de corte (sem o 0) para trechos de no máximo `max_seconds`.
+
+    `preferred` são listas ordenadas de pontos bons para cortar, em ordem de
+    prioridade (ex.: silêncios, depois cortes de cena); o corte recua até o
+    primeiro que estiver a até `tolerance` segundos do limite. Com
+    `keyframes`, cada corte ainda recua até o último keyframe que cabe no
+    trecho, de modo que os trechos em stream copy não se sobrepõem nem passam
+    do limite. Sem keyframe utilizável, o corte fica no limite exato.
+    """
+    if max_seconds <= 0:
+        raise ValueError("A duração dos trechos precisa ser maior que zero.")
+    cuts = []
+    start = 0.0
+    while duration - start > max_seconds:
+        target = start + max_seconds
+        cut = target
+        for points in preferred:
+            snapped = _snap(points, start, target, tolerance)
+            if snapped is not None:
+                cut = snapped
+                break
+        if keyframes:
+            i = bisect.bisect_right(keyframes, cut) - 1
+            if i >= 0 and keyframes[i] > start + 0.5:
+                cut = keyframes[i]
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+
+def preferred_points(job, ctx):
+    """Silêncios e cortes de cena do vídeo, se o job pede ajuste dos cortes."""
+    if job.tolerancia <= 0:
+        return ()
+    analise = analisar(job.video_path, probe(job.video_path), ctx, job.cache)
+    silences, scenes = sorted(analise.meios_de_silencio()), sorted(analise.cortes_de_cena())
+    ctx.log(f"{len(silences)} silêncio(s) e {len(scenes)} corte(s) de cena; tolerância de {job.tolerancia:g}s.")
+    return (silences, scenes)
+
+
+def _split_copy(job, duration, ctx):
+    cuts = plan_cuts(duration, job.max_seconds, None, preferred_points(job, ctx), job.tolerancia)
+    bounds = [0.0] + cuts + [duration]
+    ctx.log(f"Duração total: {duration:.2f} segundos. Dividindo em {len(bounds) - 1} trecho(s).")
+
+    for i in range(len(bounds) - 1):
+        if ctx.cancelled:
+            return
+        output_path = job.output_path(i + 1)
+        _copy_range(job, bounds[i], bounds[i + 1], output_path, ctx)
+        ctx.log(f"Trecho {i+1} salvo: {os.path.basename(output_path)}")
+
+
+def _copy_range(job, start, end, output_path, ctx):
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", str(start),
+        "-i", job.video_path,
+        "-t", str(end - start),
+        "-c", "copy",
+        output_path
+    ]
+    _run(cmd, ctx)
+
+
+def _split_segments(job, duration, ctx):
+    cuts = plan_cuts(
+        duration, job.max_seconds, read_keyframes(job.video_path), preferred_points(job, ctx), job.tolerancia
+    )
+    ctx.log(f"Duração total: {duration:.2f} segundos. Dividindo em {len(cuts) + 1} trecho(s) nos keyframes.")
+
+    pattern = os.path.join(job.output_dir, f"{job.base_name.replace('%', '%%')}_trecho%02d.mp4")
+    cmd = [
+        "ffmpeg", "-y", "-i", job.video_path,
+        "-map", "0:v:0", "-map", "0:a?",
+        "-c", "copy",
+        "-f", "segment",
+        "-segment_times", ",".join(f"{c:.6f}" for c in cuts) or str(duration + 1),
+        "-segment_start_number", "1",
+        "-reset_timestamps", "1",
+        "-avoid_negative_ts", "make_zero",
+        pattern
+    ]
+    _run(cmd, ctx)
+    for i in range(len(cuts) + 1):
+        ctx.log(f"Trecho {i+1} salvo: {os.path.basename(job.output_path(i + 1))}")
+
+
+H264_PROFILES = {"Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high"}
+
+
+def head_encode_args(info):
+    """Args do libx264 com o perfil, o nível e o formato de pixel do original; None se não der para casar."""
+    stream = next((st for st in info.streams if st.get("codec_type") == "video"), {})
+    profile = H264_PROFILES.get(stream.get("profile"))
+    if info.video_codec != "h264" or profile is None or stream.get("pix_fmt") not in ("yuv420p", "yuvj420p"):
+        return None
+    args = ["-c:v", "libx264", "-preset", "fast", "-crf", "18", "-profile:v", profile, "-pix_fmt", "yuv420p"]
+    if stream.get("level", 0) > 0:
+        args += ["-level", f"{stream['level'] / 10:g}"]
+    if info.fps:
+        args += ["-r", f"{info.fps:.6f}"]
+    return args
+
+
+def _encode_range(job, start, end, output_path, ctx):
+    _run(["ffmpeg", "-y", "-ss", f"{start:.6f}", "-i", job.video_path,
+          "-t", f"{end - start:.6f}", "-map", "0:v:0", "-map", "0:a?",
+          "-c:v", "libx264", "-preset", "fast", "-crf", "18", "-c:a", "aac", output_path], ctx)
+
+
+def _smart_cut(job, start, end, keyframes, info, tmp_dir, output_path, ctx):
+    """Gera [start, end) recodificando só até o 1º keyframe >= start."""
+    i = bisect.bisect_left(keyframes, start - 0.001)
+    key = keyframes[i] if i < len(keyframes) else end
+    if key - start < 0.001:
+        # Já começa num keyframe: stream copy puro
+        _run(["ffmpeg", "-y", "-ss", f"{start:.6f}", "-i", job.video_path,
+              "-t", f"{end - start:.6f}", "-map", "0:v:0", "-map", "0:a?", "-c", "copy",
+              "-avoid_negative_ts", "make_zero", output_path], ctx)
+        return
+    head_args = head_encode_args(info)
+    if key >= end or head_args is None:
+        # Trecho menor que o GOP, ou perfil que o libx264 não reproduz: recodifica inteiro
+        _encode_range(job, start, end, output_path, ctx)
+        return
+
+    head = os.path.join(tmp_dir, "head.ts")
+    body = os.path.join(tmp_dir, "body.ts")
+    listing = os.path.join(tmp_dir, "lista.txt")
+
+    # O SPS/PPS da cabeça recodificada nunca é idêntico ao do original, mesmo
+    # com perfil e nível iguais. As duas partes passam por MPEG-TS (Annex B),
+    # que leva os parâmetros de cada uma junto dos seus keyframes, em vez de
+    # o MP4 final usar os da cabeça para decodificar também o corpo.
+    _run([
+        "ffmpeg", "-y", "-ss", f"{start:.6f}", "-i", job.video_path,
+        "-t", f"{key - start:.6f}", "-map", "0:v:0", "-map", "0:a?",
+        *head_args, "-c:a", "aac", "-f", "mpegts", head
+    ], ctx)
+    # Corpo: do keyframe até o fim do trecho, em stream copy
+    _run([
+        "ffmpeg", "-y", "-ss", f"{key:.6f}", "-i", job.video_path,
+        "-t", f"{end - key:.6f}", "-map", "0:v:0", "-map", "0:a?",
+        "-c:v", "copy", "-bsf:v", "h264_mp4toannexb", "-c:a", "aac",
+        "-avoid_negative_ts", "make_zero", "-f", "mpegts", body
+    ], ctx)
+    with open(listing, "w", encoding="utf-8") as f:
+        f.write(f"file '{head}'\nfile '{body}'\n")
+    _run(["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", listing, "-c", "copy",
+          "-bsf:a", "aac_adtstoasc", output_path], ctx)
+
+
+def _split_precise(job, duration, ctx):
+    info = run_ffprobe(job.video_path)  # sem cache: entradas antigas não têm perfil/nível do H.264
+    if info.video_codec != "h264":
+        ctx.log(f"Corte preciso exige H.264 (vídeo é {info.video_codec or 'desconhecido'}); usando segmentos.")
+        _split_segments(job, duration, ctx)
+        return
+
+    keyframes = read_keyframes(job.video_path)
+    cuts = plan_cuts(duration, job.max_seconds, None, preferred_points(job, ctx), job.tolerancia)
+    bounds = [0.0] + cuts + [duration]
+    ctx.log(f"Duração total: {duration:.2f} segundos. Dividindo em {len(bounds) - 1} trecho(s) com corte preciso.")
+
+    tmp_dir = tempfile.mkdtemp(prefix="trechos_", dir=job.output_dir)
+    try:
+        for i in range(len(bounds) - 1):
+            if ctx.cancelled:
+                return
+            output_path = job.output_path(i + 1)
+            _smart_cut(job, bounds[i], bounds[i + 1], keyframes, info, tmp_dir, output_path, ctx)
+            ctx.log(f"Trecho {i+1} salvo: {os.path.basename(output_path)}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _fmt_time(seconds):
+    return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02}:{int(seconds % 60):02}"
+
+
+def _extract_highlights(job, duration, ctx):
+    """Extrai só as `job.destaques` janelas de `max_seconds` mais bem ranqueadas."""
+    info = probe(job.video_path)
+    windows = ranquear(
+        job.video_path, analisar(job.video_path, info, ctx, job.cache), duration, job.max_seconds, job.destaques, ctx
+    )
+    precise = job.modo == "preciso" and info.video_codec == "h264"
+    ctx.log(f"Duração total: {duration:.2f} segundos. Extraindo {len(windows)} destaque(s)"
+            + (" com corte preciso." if precise else " em stream copy."))
+
+    if precise:
+        info = run_ffprobe(job.video_path)  # perfil/nível atuais (ver _split_precise)
+    keyframes = read_keyframes(job.video_path) if precise else None
+    tmp_dir = tempfile.mkdtemp(prefix="trechos_", dir=job.output_dir) if precise else None
+    try:
+        for rank, window in enumerate(windows, start=1):
+            if ctx.cancelled:
+                return
+            output_path = job.highlight_path(rank)
+            if precise:
+                _smart_cut(job, window.inicio, window.fim, keyframes, info, tmp_dir, output_path, ctx)
+            else:
+                _copy_range(job, window.inicio, window.fim, output_path, ctx)
+            ctx.log(f"Destaque {rank} ({_fmt_time(window.inicio)}–{_fmt_time(window.fim)}, "
+                    f"score {window.score:.2f}) salvo: {os.path.basename(output_path)}")
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def split_video(job, ctx):
+    """Divide um vídeo em trechos de até `max_seconds`, conforme `job.modo`.
+
+    Com `job.destaques`, em vez de todos os trechos gera só os N melhores.
+    """
+    duration = get_media_duration(job.video_path)
+    if job.destaques > 0:
+        _extract_highlights(job, duration, ctx)
+    elif job.modo == "segmentos":
+        _split_segments(job, duration, ctx)
+    elif job.modo == "preciso":
+        _split_precise(job, duration, ctx)
+    else:
+        _split_copy(job, duration, ctx)
+
+
+def process_folder(folder, max_seconds, ctx, modo="copia", tolerancia=0, destaques=0):
+    """Divide cada vídeo da pasta em trechos.
+
+    `tolerancia` > 0 ajusta os cortes a silêncios e cenas; `destaques` > 0
+    gera só as N janelas mais movimentadas de cada vídeo.
+    """
+    video_files = list_media(folder, VIDEO_EXTENSIONS)
+    if not video_files:
+        ctx.log("Nenhum vídeo encontrado na pasta.")
+        return
+    output_dir = os.path.join(folder, "trechos")
+    os.makedirs(output_dir, exist_ok=True)
+
+    unique = set(skip_duplicates("trechos", [os.path.join(folder, v) for v in video_files], ctx, output_dir))
+    video_files = [v for v in video_files if os.path.join(folder, v) in unique]
+    total = len(video_files)
+
+    cache = AnaliseCache() if tolerancia > 0 or destaques > 0 else None
+    ctx.progress(0, total)
+    for index, video in enumerate(video_files, start=1):
+        if ctx.cancelled:
+            break
+        ctx.log(f"Processando vídeo: {video}")
+
+        try:
+            job = ClipJob(os.path.join(folder, video), output_dir, max_seconds, modo, tolerancia, cache, destaques)
+            split_video(job, ctx)
+            mark_processed("trechos", job.video_path, job.highlight_path(1) if destaques > 0 else job.output_path(1))
+        except Exception as e:
+            ctx.log(f"Erro ao processar {video}: {e}")
+
+        ctx.progress(index, total)
+
+    ctx.log("✅ Processamento concluído!")
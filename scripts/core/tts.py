@@ -0,0 +1,117 @@
+import asyncio
+import os
+import random
+
+from .journal import JobJournal, discard, part_path, publish
+
+EXTENSOES_TEXTO = (".txt", ".md", ".docx", ".pdf")
+MAX_SIMULTANEOS_PADRAO = 4
+TENTATIVAS_PADRAO = 3
+
+
+def formatar_velocidade(percentual):
+    """Converte -100..100 no formato de `rate` do edge-tts ('+10%', '-5%')."""
+    if not -100 <= percentual <= 100:
+        raise ValueError("Velocidade inválida. Use um valor entre -100 e +100.")
+    return f"{'+' if percentual >= 0 else ''}{percentual}%"
+
+
+def listar_textos(pasta):
+    return sorted(
+        os.path.join(pasta, f) for f in os.listdir(pasta)
+        if f.lower().endswith(EXTENSOES_TEXTO)
+    )
+
+
+def sintetizador_edge(voz, velocidade):
+    """Fábrica padrão: uma chamada ao serviço do edge-tts por arquivo."""
+    import edge_tts
+
+    async def sintetizar(texto, saida):
+        communicate = edge_tts.Communicate(texto, voice=voz, rate=velocidade)
+        await communicate.save(saida)
+
+    return sintetizar
+
+
+def caminho_saida(file_path, output_folder):
+    return os.path.join(output_folder, f"{os.path.splitext(os.path.basename(file_path))[0]}.mp3")
+
+
+async def _converter_um(file_path, output_folder, sintetizar, semaforo, ctx, tentativas, espera_base, journal):
+    filename = os.path.basename(file_path)
+    output = caminho_saida(file_path, output_folder)
+    tmp = part_path(output)
+
+    if journal.is_done(file_path, output):
+        ctx.log(f"⏩ Pulando (já existe): {filename}")
+        return "pulado"
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if not text:
+        ctx.log(f"⚠️ Arquivo vazio: {filename}")
+        journal.finish(file_path, True)
+        return "vazio"
+
+    journal.start(file_path, output)
+    for tentativa in range(1, tentativas + 1):
+        if ctx.cancelled:
+            journal.finish(file_path, False, "cancelado")
+            return "cancelado"
+        try:
+            # O semáforo só cobre a requisição: a espera entre tentativas libera a vaga
+            async with semaforo:
+                await sintetizar(text, tmp)
+            publish(tmp, output)
+            journal.finish(file_path, True)
+            ctx.log(f"✅ Finalizado: {filename}")
+            return "ok"
+        except Exception as e:
+            discard(tmp)
+            if tentativa == tentativas:
+                journal.finish(file_path, False, str(e))
+                ctx.log(f"❌ Erro em {filename}: {str(e)}")
+                return "erro"
+            espera = espera_base * 2 ** (tentativa - 1) * random.uniform(0.8, 1.2)
+            ctx.log(f"🔁 {filename}: {e} (nova tentativa em {espera:.1f}s)")
+            await asyncio.sleep(espera)
+
+
+async def converter_lote(arquivos, output_folder, sintetizar, ctx,
+                         max_simultaneos=MAX_SIMULTANEOS_PADRAO, tentativas=TENTATIVAS_PADRAO, espera_base=1.0,
+                         retomar=False):
+    """Sintetiza os arquivos com no máximo `max_simultaneos` requisições em voo.
+
+    Cada arquivo é tentado até `tentativas` vezes, com espera exponencial
+    (com jitter) entre as tentativas. `sintetizar(texto, saida)` é uma
+    corrotina; trocá-la permite rodar o lote contra um servidor falso local.
+    Com `retomar`, `arquivos` é ignorado e só os itens não concluídos do
+    journal da pasta de saída são refeitos. Retorna um dict {status: quantidade}.
+    """
+    journal = JobJournal.for_folder(output_folder, "tts")
+    if retomar:
+        arquivos = [chave for chave, _ in journal.unfinished() if os.path.exists(chave)]
+        ctx.log(f"🔁 Retomando {len(arquivos)} arquivo(s) não concluído(s).")
+    for file_path in arquivos:
+        journal.plan(file_path, caminho_saida(file_path, output_folder))
+    semaforo = asyncio.Semaphore(max_simultaneos)
+    feitos = 0
+    ctx.progress(0, len(arquivos))
+
+    async def tarefa(file_path):
+        nonlocal feitos
+        try:
+            return await _converter_um(file_path, output_folder, sintetizar, semaforo, ctx, tentativas, espera_base, journal)
+        except Exception as e:
+            ctx.log(f"❌ Erro em {os.path.basename(file_path)}: {str(e)}")
+            return "erro"
+        finally:
+            feitos += 1
+            ctx.progress(feitos, len(arquivos), f"Processando: {os.path.basename(file_path)}")
+
+    resultados = await asyncio.gather(*(tarefa(f) for f in arquivos))
+    resumo = {}
+    for status in resultados:
+        resumo[status] = resumo.get(status, 0) + 1
+    return resumo
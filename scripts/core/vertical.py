@@ -0,0 +1,307 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from . import encoders
+from .dedup import mark_processed, skip_duplicates
+from .journal import JobJournal, discard, part_path, publish
+from .media import VIDEO_EXTENSIONS, list_media, sanitize_filename
+from .probe import probe
+from .runner import run_ffmpeg
+
+MODES = ["vertical_blur", "vertical_blur_fast", "vertical_blur_still", "crop_scale"]
+BLUR_MODES = ("vertical_blur", "vertical_blur_fast", "vertical_blur_still")
+TARGET_W, TARGET_H = 1080, 1920
+TARGET_VIDEO_CODEC = "h264"
+TARGET_AUDIO_CODEC = "aac"
+TARGET_EXTENSION = ".mp4"  # os perfis podem gerar H.264, HEVC ou AV1; só o MP4 aceita todos com +faststart
+CROP_SCALE_FILTER = "scale=-2:1920,crop='if(gt(iw,1080),1080,iw)':1920"
+SLOW_SPEED = 1.0  # abaixo disso (x tempo real) o job é apontado como lento no resumo
+
+
+@dataclass
+class ConversionJob:
+    input_path: str
+    output_path: str
+    mode: str = "vertical_blur"
+    threads: int = 0  # -threads do ffmpeg (0 = automático)
+    fast_path: bool = True  # permite copiar streams que já atendem ao alvo
+    decision: "Decision" = None
+    profile: str = None  # perfil de encoder (None = padrão do modo)
+    journal: JobJournal = field(default=None, repr=False)
+    speed: float = 0.0  # x tempo real da última passagem (preenchido na conversão)
+
+    @property
+    def name(self):
+        return os.path.basename(self.input_path)
+
+    @property
+    def encoder_profile(self):
+        if self.profile:
+            return encoders.PROFILES[self.profile]
+        return encoders.PROFILES[encoders.DEFAULT_CRF if self.mode in BLUR_MODES else encoders.DEFAULT_ABR]
+
+    @property
+    def passlog(self):
+        return self.output_path + ".passlog"
+
+    @property
+    def part_path(self):
+        return part_path(self.output_path)
+
+
+def output_path_for(video, converted_dir):
+    """Saída em `converted`, sempre em MP4, qualquer que seja o contêiner de origem."""
+    base_name = os.path.splitext(video)[0]
+    return os.path.join(converted_dir, f"{sanitize_filename(base_name)}_vertical{TARGET_EXTENSION}")
+
+
+def plan_folder(folder, ctx, mode="vertical_blur", profile=None, resume=False):
+    """Monta os jobs de conversão da pasta, pulando vídeos já convertidos.
+
+    Com `resume`, refaz só os itens que o journal da pasta de saída registra
+    como não concluídos (interrompidos ou com falha) no lote anterior.
+    """
+    converted_dir = os.path.join(folder, "converted")
+    os.makedirs(converted_dir, exist_ok=True)
+    ctx.log(f"Pasta de saída: {converted_dir}")
+    journal = JobJournal.for_folder(converted_dir, "converter")
+
+    if resume:
+        pending = [(key, output) for key, output in journal.unfinished() if os.path.exists(key)]
+        ctx.log(f"Retomando {len(pending)} conversão(ões) não concluída(s).")
+        return [ConversionJob(key, output, mode, profile=profile, journal=journal) for key, output in pending]
+
+    jobs = []
+    videos = list_media(folder, VIDEO_EXTENSIONS)
+    unique = set(skip_duplicates("converter", [os.path.join(folder, v) for v in videos], ctx, converted_dir))
+    for video in videos:
+        input_path = os.path.join(folder, video)
+        if input_path not in unique:
+            continue
+        output_path = output_path_for(video, converted_dir)
+        if journal.is_done(input_path, output_path):
+            ctx.log(f"Arquivo já convertido, pulando: {video}")
+            continue
+        journal.plan(input_path, output_path)
+        jobs.append(ConversionJob(input_path, output_path, mode, profile=profile, journal=journal))
+    return jobs
+
+
+def threads_per_job(workers, thread_budget):
+    """Divide o orçamento global de threads entre as conversões simultâneas."""
+    if not thread_budget:
+        return 0
+    return max(1, thread_budget // max(1, workers))
+
+
+@dataclass
+class Decision:
+    video: str  # "copy", "scale" (só redimensiona) ou "filter" (grafo do modo)
+    audio: str  # "copy", "aac" ou "none"
+    reason: str = ""
+
+    def describe(self):
+        video = {"copy": "vídeo copiado", "scale": "vídeo redimensionado", "filter": "vídeo recodificado"}[self.video]
+        audio = {"copy": "áudio copiado", "aac": "áudio recodificado", "none": "sem áudio"}[self.audio]
+        return f"{video}, {audio} ({self.reason})"
+
+
+def decide(job, info):
+    """Escolhe o mínimo de trabalho para levar a entrada ao alvo 1080x1920 H.264/AAC."""
+    if not info.has_audio:
+        audio = "none"
+    elif info.audio_codec == TARGET_AUDIO_CODEC:
+        audio = "copy"
+    else:
+        audio = "aac"
+
+    video_stream = next((st for st in info.streams if st.get("codec_type") == "video"), {})
+    pix_fmt_ok = video_stream.get("pix_fmt", "yuv420p") in ("yuv420p", "yuvj420p")
+    if not job.fast_path:
+        return Decision("filter", audio, "fast path desativado")
+    if (info.width, info.height) == (TARGET_W, TARGET_H) and info.video_codec == TARGET_VIDEO_CODEC and pix_fmt_ok:
+        return Decision("copy", audio, f"já é {TARGET_W}x{TARGET_H} {TARGET_VIDEO_CODEC}")
+    if info.height and abs(info.width / info.height - TARGET_W / TARGET_H) < 0.01:
+        return Decision("scale", audio, f"{info.width}x{info.height} já é 9:16")
+    return Decision("filter", audio, f"{info.width}x{info.height} {info.video_codec}")
+
+
+def blur_graph(mode):
+    """Grafo do fundo borrado de cada modo de blur.
+
+    - vertical_blur: borra o quadro inteiro já em 1080x1920 (original, mais caro);
+    - vertical_blur_fast: borra numa cópia de 270x480 e só então amplia, o
+      que custa uma fração do boxblur em resolução cheia;
+    - vertical_blur_still: borra só o primeiro quadro e repete essa imagem
+      como fundo, para vídeos de câmera parada.
+    """
+    fg = "[0:v]scale=1080:1920:force_original_aspect_ratio=decrease[fg];"
+    if mode == "vertical_blur_fast":
+        return (
+            "[0:v]scale=270:480:force_original_aspect_ratio=increase,crop=270:480,"
+            "boxblur=5:5,scale=1080:1920[bg];" + fg +
+            "[bg][fg]overlay=(W-w)/2:(H-h)/2"
+        )
+    if mode == "vertical_blur_still":
+        return (
+            "[0:v]trim=end_frame=1,scale=270:480:force_original_aspect_ratio=increase,crop=270:480,"
+            "boxblur=5:5,scale=1080:1920,loop=loop=-1:size=1[bg];" + fg +
+            "[bg][fg]overlay=(W-w)/2:(H-h)/2:shortest=1"
+        )
+    return (
+        "[0:v]scale=1080:1920:force_original_aspect_ratio=increase,boxblur=20:5[bg];" + fg +
+        "[bg][fg]overlay=(W-w)/2:(H-h)/2,crop=1080:1920"
+    )
+
+
+def build_command(job, decision=None):
+    """Comando ffmpeg para o job; sem `decision`, recodifica tudo pelo modo."""
+    if decision is None:
+        decision = Decision("filter", "copy" if job.mode in BLUR_MODES else "aac")
+    threads = ["-threads", str(job.threads)] if job.threads else []
+    encode = job.encoder_profile.video_args()
+
+    if decision.video == "copy":
+        video = ["-map", "0:v:0", "-c:v", "copy"]
+    elif decision.video == "scale":
+        video = ["-map", "0:v:0", "-vf", f"scale={TARGET_W}:{TARGET_H},setsar=1", *encode]
+    elif job.mode in BLUR_MODES:
+        video = ["-filter_complex", blur_graph(job.mode), *encode]
+    else:
+        video = ["-vf", CROP_SCALE_FILTER, *encode]
+
+    if decision.audio == "none":
+        audio = ["-an"]
+    else:
+        # Mapas explícitos só quando o vídeo também foi mapeado (o filter_complex mapeia sozinho)
+        audio = ["-map", "0:a:0?"] if "-map" in video else []
+        audio += ["-c:a", "copy"] if decision.audio == "copy" else ["-c:a", "aac", "-b:a", "192k"]
+
+    shortest = ["-shortest"] if job.mode == "crop_scale" and decision.video == "filter" else []
+    return [
+        "ffmpeg", "-y", "-i", job.input_path,
+        *video, *audio,
+        "-movflags", "+faststart", *shortest,
+        *threads,
+        job.part_path
+    ]
+
+
+def build_commands(job, decision=None):
+    """Todas as passagens do job (duas nos perfis de 2 passagens, se houver recodificação)."""
+    cmd = build_command(job, decision)
+    if decision is not None and decision.video == "copy":
+        return [cmd]
+    return encoders.pass_commands(job.encoder_profile, cmd, job.passlog)
+
+
+def convert_video(job, ctx):
+    if not os.path.exists(job.input_path):
+        ctx.log(f"Erro: Arquivo de entrada não encontrado: {job.input_path}")
+        return False
+
+    duration = 0
+    try:
+        info = probe(job.input_path)
+        duration = info.duration
+        job.decision = decide(job, info)
+        ctx.log(f"{job.name}: {job.decision.describe()}")
+    except Exception as e:
+        ctx.log(f"Não foi possível analisar {job.name} ({e}); recodificando.")
+        job.decision = None
+
+    commands = build_commands(job, job.decision)
+    ok = False
+    try:
+        for i, cmd in enumerate(commands, start=1):
+            if len(commands) > 1:
+                ctx.log(f"{job.name}: passagem {i}/{len(commands)}")
+            if not _run_ffmpeg(cmd, job, duration, ctx):
+                return False
+        publish(job.part_path, job.output_path)
+        ok = True
+        return True
+    finally:
+        if not ok:
+            discard(job.part_path)
+        if len(commands) > 1:
+            encoders.remove_passlog(job.passlog)
+        ctx.file_progress(100, job.name)
+
+
+def _run_ffmpeg(cmd, job, duration, ctx):
+    try:
+        result = run_ffmpeg(cmd, ctx, duration, label=job.name)
+    except Exception as e:
+        ctx.log(f"Erro na conversão: {str(e)}")
+        return False
+    if result.returncode != 0 or ctx.cancelled:
+        if not ctx.cancelled:
+            lines = result.stderr.strip().splitlines()
+            ctx.log(f"Erro na conversão: {lines[-1] if lines else f'código {result.returncode}'}")
+        return False
+    job.speed = result.speed
+    return True
+
+
+def _run_job(job, ctx):
+    if ctx.cancelled:
+        return False
+    ctx.log(f"\nIniciando conversão: {job.name} → {os.path.basename(job.output_path)}")
+    if job.journal:
+        job.journal.start(job.input_path, job.output_path)
+    success = convert_video(job, ctx)
+    if job.journal:
+        job.journal.finish(job.input_path, success, "cancelado" if ctx.cancelled else None)
+    if success:
+        mark_processed("converter", job.input_path, job.output_path)
+        ctx.log(f"Conversão concluída: {job.name} ({job.speed:.1f}x tempo real)")
+    else:
+        ctx.log(f"Falha ao converter: {job.name}")
+    return success
+
+
+def process_videos(jobs, ctx, workers=1, thread_budget=0):
+    """Converte os jobs com até `workers` ffmpeg simultâneos.
+
+    `thread_budget` limita o total de threads somando todos os ffmpeg
+    (0 = cada processo decide). Retorna o número de conversões bem-sucedidas.
+    """
+    threads = threads_per_job(workers, thread_budget)
+    for job in jobs:
+        job.threads = threads
+
+    done = 0
+    if workers <= 1:
+        for i, job in enumerate(jobs, start=1):
+            if ctx.cancelled:
+                break
+            done += _run_job(job, ctx)
+            ctx.progress(i, len(jobs))
+    else:
+        ctx.log(f"Conversões simultâneas: {workers}" + (f" ({threads} thread(s) cada)" if threads else ""))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_job, job, ctx) for job in jobs]
+            for i, future in enumerate(as_completed(futures), start=1):
+                done += future.result()
+                ctx.progress(i, len(jobs))
+
+    log_decisions(jobs, ctx)
+    return done
+
+
+def log_decisions(jobs, ctx):
+    decided = [job.decision for job in jobs if job.decision]
+    if not decided:
+        return
+    copied = sum(d.video == "copy" for d in decided)
+    scaled = sum(d.video == "scale" for d in decided)
+    audio_copied = sum(d.audio == "copy" for d in decided)
+    ctx.log(
+        f"Resumo: {copied} vídeo(s) só remuxados, {scaled} só redimensionados, "
+        f"{len(decided) - copied - scaled} com filtro completo; áudio copiado em {audio_copied} de {len(decided)}."
+    )
+    slow = sorted((job for job in jobs if 0 < job.speed < SLOW_SPEED), key=lambda job: job.speed)
+    if slow:
+        ctx.log("Abaixo do tempo real: " + ", ".join(f"{job.name} ({job.speed:.2f}x)" for job in slow))
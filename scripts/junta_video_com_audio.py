@@ -1,27 +1,9 @@
-import os
-import random
 import threading
-import unicodedata
-import subprocess
-from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
-VIDEO_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.mov']
-AUDIO_EXTENSIONS = ['.mp3', '.wav', '.aac', '.ogg', '.m4a']
-
-def normalize_filename(name):
-    name = unicodedata.normalize('NFKD', name).encode('ASCII', 'ignore').decode('ASCII')
-    return ''.join(c if c.isalnum() or c in ['-', '_'] else '_' for c in name).strip('_')
-
-def get_media_duration(path):
-    cmd = [
-        'ffprobe', '-v', 'error', '-show_entries',
-        'format=duration', '-of',
-        'default=noprint_wrappers=1:nokey=1', str(path)
-    ]
-    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    return float(result.stdout.strip())
+from core import encoders, shorts
+from core.events import EventBus, pump_tk
 
 class ShortsMakerSimples:
     def __init__(self, master):
@@ -34,6 +16,8 @@ class ShortsMakerSimples:
         self.output_resolution = (1080, 1920)
 
         self.create_widgets()
+        self.bus = EventBus()
+        pump_tk(self.master, self.bus, self.apply_events)
 
     def create_widgets(self):
         style = ttk.Style()
@@ -61,13 +45,32 @@ class ShortsMakerSimples:
         self.resolution_combo = ttk.Combobox(
             resolution_frame,
             state="readonly",
-            values=["720x1280", "1080x1920", "1280x720", "1920x1080"],
+            values=shorts.RESOLUTIONS,
             width=15
         )
         self.resolution_combo.pack(side=tk.LEFT, padx=5)
         self.resolution_combo.set("1080x1920")
         self.resolution_combo.bind("<<ComboboxSelected>>", self.on_resolution_change)
 
+        batch_frame = ttk.LabelFrame(main_frame, text="Processamento em Lote")
+        batch_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(batch_frame, text="Encodes simultâneos (0 = automático):").pack(side=tk.LEFT, padx=5)
+        self.workers_var = tk.IntVar(value=0)
+        ttk.Spinbox(batch_frame, from_=0, to=64, textvariable=self.workers_var, width=5).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(batch_frame, text="Semente:").pack(side=tk.LEFT, padx=5)
+        self.seed_var = tk.StringVar(value="")
+        ttk.Entry(batch_frame, textvariable=self.seed_var, width=10).pack(side=tk.LEFT, padx=5)
+
+        self.use_pool_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(batch_frame, text="Usar pool pré-normalizado", variable=self.use_pool_var).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(batch_frame, text="Perfil:").pack(side=tk.LEFT, padx=5)
+        self.profile_combo = ttk.Combobox(batch_frame, state="readonly", values=list(encoders.PROFILES), width=26)
+        self.profile_combo.pack(side=tk.LEFT, padx=5)
+        self.profile_combo.set(encoders.DEFAULT_ABR)
+
         progress_frame = ttk.LabelFrame(main_frame, text="Progresso")
         progress_frame.pack(fill=tk.X, pady=5)
 
@@ -75,6 +78,9 @@ class ShortsMakerSimples:
         self.progress.pack(fill=tk.X, expand=True)
         self.progress_label = ttk.Label(progress_frame, text="Pronto")
         self.progress_label.pack()
+        self.running = {}  # arquivo -> % do encode em andamento
+        self.running_label = ttk.Label(progress_frame, text="")
+        self.running_label.pack()
 
         control_frame = ttk.Frame(main_frame)
         control_frame.pack(fill=tk.X, pady=5)
@@ -82,6 +88,9 @@ class ShortsMakerSimples:
         self.generate_btn = ttk.Button(control_frame, text="GERAR SHORTS EM LOTE", command=self.process_batch)
         self.generate_btn.pack(side=tk.LEFT, padx=5)
 
+        self.pool_btn = ttk.Button(control_frame, text="Preparar Pool de Fundos", command=self.prepare_pool)
+        self.pool_btn.pack(side=tk.LEFT, padx=5)
+
         ttk.Button(control_frame, text="Limpar Log", command=self.clear_log).pack(side=tk.LEFT, padx=5)
 
         log_frame = ttk.LabelFrame(main_frame, text="Log de Processamento")
@@ -91,15 +100,26 @@ class ShortsMakerSimples:
         self.log_area.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
     def on_resolution_change(self, event=None):
-        selected = self.resolution_combo.get()
-        w, h = map(int, selected.split("x"))
-        self.output_resolution = (w, h)
+        self.output_resolution = shorts.parse_resolution(self.resolution_combo.get())
 
-    def log(self, message):
-        self.log_area.insert(tk.END, message + "\n")
+    def log(self, *messages):
+        self.log_area.insert(tk.END, "".join(message + "\n" for message in messages))
         self.log_area.see(tk.END)
-        self.master.update_idletasks()
-        print(message)
+
+    def apply_events(self, batch):
+        if batch.logs:
+            self.log(*batch.logs)
+        if batch.progress:
+            self.update_progress(*batch.progress)
+        if batch.file_progress:
+            self.update_running(batch.file_progress)
+        for kind, data in batch.other:
+            if kind == "pool_ready":
+                self.progress_label.config(text="Pool pronto")
+                self.log(f"🧰 Pool pronto: {data['count']} fundo(s)")
+                self.pool_btn.config(state=tk.NORMAL)
+            elif kind == "shorts_done":
+                self.finish_batch(data["ok"])
 
     def clear_log(self):
         self.log_area.delete(1.0, tk.END)
@@ -124,91 +144,49 @@ class ShortsMakerSimples:
             return
 
         self.generate_btn.config(state=tk.DISABLED)
-        threading.Thread(target=self.generate_shorts, daemon=True).start()
+        self.progress["maximum"] = 100
+        self.progress["value"] = 0
 
-    def generate_shorts(self):
-        audio_files = [f for f in Path(self.audio_folder).glob("*") if f.suffix.lower() in AUDIO_EXTENSIONS]
-        video_files = [f for f in Path(self.video_folder).glob("*") if f.suffix.lower() in VIDEO_EXTENSIONS]
+        seed = self.seed_var.get().strip()
+        batch = shorts.ShortsBatch(
+            self.audio_folder, self.video_folder, self.output_resolution,
+            seed=int(seed) if seed.isdigit() else None, workers=self.workers_var.get(),
+            use_pool=self.use_pool_var.get(), profile=self.profile_combo.get()
+        )
+        threading.Thread(target=self.generate_shorts, args=(batch,), daemon=True).start()
 
-        if not audio_files or not video_files:
-            messagebox.showerror("Erro", "Não foram encontrados áudios ou vídeos válidos.")
-            self.generate_btn.config(state=tk.NORMAL)
+    def prepare_pool(self):
+        if not self.video_folder:
+            messagebox.showerror("Erro", "Selecione a pasta de vídeos antes de preparar o pool.")
             return
 
-        shorts_folder = Path(self.audio_folder) / "SHORTS_GERADOS"
-        shorts_folder.mkdir(exist_ok=True)
+        self.pool_btn.config(state=tk.DISABLED)
+        threading.Thread(
+            target=self.run_prepare_pool, args=(self.workers_var.get(), self.profile_combo.get()), daemon=True
+        ).start()
 
-        self.progress["maximum"] = 100
-        self.progress["value"] = 0
-        self.log(f"🔊 Áudios encontrados: {len(audio_files)}")
-        self.log(f"🎥 Vídeos encontrados: {len(video_files)}")
-        self.log(f"📐 Resolução escolhida: {self.output_resolution[0]}x{self.output_resolution[1]}")
-        self.log("⏳ Processando...")
-
-        for idx, audio_path in enumerate(audio_files):
-            self.progress_label.config(text=f"Processando: {audio_path.name}")
-
-            try:
-                video_path = random.choice(video_files)
-
-                audio_duration = get_media_duration(audio_path)
-                video_duration = get_media_duration(video_path)
-
-                if video_duration < 1 or audio_duration < 1:
-                    raise Exception("Arquivo com duração inválida")
-
-                max_start = max(0, video_duration - audio_duration)
-                start_time = random.uniform(0, max_start)
-
-                target_w, target_h = self.output_resolution
-                normalized_name = normalize_filename(audio_path.stem)
-                output_name = f"short_{normalized_name}.mp4"
-                output_path = shorts_folder / output_name
-
-                if output_path.exists():
-                    self.log(f"⏭️ Pulado (já existe): {output_name}")
-                    continue
-
-                # Filtro adaptável para vertical/horizontal
-                if target_h > target_w:
-                    # Portrait
-                    vf_filter = f"scale=-2:{target_h},crop='if(gt(iw,{target_w}),{target_w},iw)':{target_h}"
-                else:
-                    # Landscape
-                    vf_filter = f"scale=-2:{target_h},crop={target_w}:{target_h}"
-
-                cmd = [
-                    "ffmpeg",
-                    "-ss", str(start_time),
-                    "-i", str(video_path),
-                    "-ss", "0",
-                    "-i", str(audio_path),
-                    "-t", str(audio_duration),
-                    "-map", "0:v:0",
-                    "-map", "1:a:0",
-                    "-vf", vf_filter,
-                    "-c:v", "libx264",
-                    "-preset", "fast",
-                    "-b:v", "5000k",
-                    "-c:a", "aac",
-                    "-b:a", "192k",
-                    "-shortest",
-                    "-y",
-                    str(output_path)
-                ]
-
-                process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-                if process.returncode != 0:
-                    raise Exception(f"FFmpeg erro: {process.stderr}")
-
-                self.log(f"✅ Gerado: {output_name}")
-
-            except Exception as e:
-                self.log(f"❌ Erro em {audio_path.name}: {str(e)}")
-
-            self.progress["value"] = ((idx + 1) / len(audio_files)) * 100
-            self.master.update_idletasks()
+    def run_prepare_pool(self, workers, profile):
+        ready = shorts.prepare_pool(self.video_folder, self.output_resolution, self.bus.context(), workers, profile=profile)
+        self.bus.emit("pool_ready", count=len(ready))
+
+    def update_progress(self, done, total, label=None):
+        self.progress["value"] = (done / total) * 100 if total else 0
+        if label:
+            self.progress_label.config(text=label)
+
+    def update_running(self, file_progress):
+        self.running.update(file_progress)
+        self.running = {name: percent for name, percent in self.running.items() if percent < 100}
+        self.running_label.config(text=" | ".join(f"{name}: {percent:.0f}%" for name, percent in self.running.items()))
+
+    def generate_shorts(self, batch):
+        self.bus.emit("shorts_done", ok=shorts.generate_shorts(batch, self.bus.context()))
+
+    def finish_batch(self, ok):
+        if not ok:
+            messagebox.showerror("Erro", "Não foram encontrados áudios ou vídeos válidos.")
+            self.generate_btn.config(state=tk.NORMAL)
+            return
 
         self.progress_label.config(text="Finalizado")
         self.progress["value"] = 100
@@ -1,26 +1,20 @@
-import whisper
 import os
-import srt
 import datetime
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk, colorchooser
-from tkinter import font as tkfont
-import subprocess
 from pathlib import Path
 import threading
-from moviepy.editor import VideoFileClip, CompositeVideoClip, TextClip
-from moviepy.config import change_settings
 
-change_settings({"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.1-Q16\magick.exe"})
+from core import legendas
+from core.events import EventBus, pump_tk
 
 class LegendadorApp:
     # Configurações padrão
-    VIDEO_EXTENSIONS = ['mp4', 'mkv', 'avi', 'mov', 'flv', 'wmv', 'm4v', 'webm', 'mpg', 'mpeg', 'ts', 'ogv', '3gp']
     MODELO_WHISPER = "small"
-    FONTE_PADRAO = "Arial"
-    TAMANHO_PADRAO = 54
-    COR_PADRAO = "#DAA520"  # Amarelo mostarda
-    POSICAO_VERTICAL_PADRAO = 20  # Porcentagem (0=topo, 100=base)
+    FONTE_PADRAO = legendas.EstiloLegenda.fonte
+    TAMANHO_PADRAO = legendas.EstiloLegenda.tamanho
+    COR_PADRAO = legendas.EstiloLegenda.cor
+    POSICAO_VERTICAL_PADRAO = legendas.EstiloLegenda.posicao_vertical
 
     def __init__(self, root):
         self.root = root
@@ -34,8 +28,14 @@ class LegendadorApp:
         self.cor_legenda = tk.StringVar(value=self.COR_PADRAO)
         self.posicao_vertical = tk.IntVar(value=self.POSICAO_VERTICAL_PADRAO)
         self.modelo_whisper = tk.StringVar(value=self.MODELO_WHISPER)
+        self.renderizador = tk.StringVar(value=legendas.RENDERIZADORES[0])
+        self.idioma = tk.StringVar(value="auto")
+        self.refazer = tk.BooleanVar(value=False)
+        self.vad = tk.BooleanVar(value=True)
 
+        self.bus = EventBus()
         self.criar_interface()
+        pump_tk(self.root, self.bus, self.aplicar_eventos)
 
     def criar_interface(self):
         # Frame de configurações
@@ -45,13 +45,11 @@ class LegendadorApp:
         # Linha 1 - Fonte e Tamanho
         tk.Label(config_frame, text="Fonte:", bg="#f0f0f0").grid(row=0, column=0, sticky=tk.W)
 
-        fontes = self.listar_fontes_imagemagick()
-        if not fontes:
-            fontes = [self.FONTE_PADRAO] 
-
-        fonte_menu = ttk.Combobox(config_frame, textvariable=self.fonte_legenda, values=fontes, width=30)
+        fonte_menu = ttk.Combobox(config_frame, textvariable=self.fonte_legenda, values=self.listar_fontes(), width=30)
         fonte_menu.grid(row=0, column=1, sticky=tk.W, padx=5)
-
+        self.fonte_menu = fonte_menu
+        # libass (ASS) e ImageMagick (MoviePy) resolvem fontes por nomes diferentes
+        self.renderizador.trace_add("write", lambda *_: self.fonte_menu.config(values=self.listar_fontes()))
 
         tk.Label(config_frame, text="Tamanho:", bg="#f0f0f0").grid(row=0, column=2, sticky=tk.W)
         ttk.Spinbox(config_frame, from_=10, to=50, textvariable=self.tamanho_legenda, width=5).grid(row=0, column=3, sticky=tk.W, padx=5)
@@ -68,10 +66,19 @@ class LegendadorApp:
         self.posicao_label.grid(row=1, column=2, sticky=tk.W)
 
         tk.Label(config_frame, text="Modelo Whisper:", bg="#f0f0f0").grid(row=1, column=5, sticky=tk.W)
-        modelos = ['tiny', 'base', 'small', 'medium', 'large']
-        modelo_menu = ttk.Combobox(config_frame, textvariable=self.modelo_whisper, values=modelos, width=10)
+        modelo_menu = ttk.Combobox(config_frame, textvariable=self.modelo_whisper, values=legendas.MODELOS_WHISPER, width=10)
         modelo_menu.grid(row=1, column=6, sticky=tk.W, padx=5)
 
+        # Linha 3 - Renderização
+        tk.Label(config_frame, text="Renderização:", bg="#f0f0f0").grid(row=2, column=0, sticky=tk.W)
+        ttk.Combobox(config_frame, textvariable=self.renderizador, values=legendas.RENDERIZADORES, state="readonly", width=10).grid(row=2, column=1, sticky=tk.W, padx=5)
+
+        tk.Label(config_frame, text="Idioma:", bg="#f0f0f0").grid(row=2, column=5, sticky=tk.W)
+        ttk.Combobox(config_frame, textvariable=self.idioma, values=["auto", "pt", "en", "es"], width=10).grid(row=2, column=6, sticky=tk.W, padx=5)
+
+        tk.Checkbutton(config_frame, text="Refazer vídeos já legendados", variable=self.refazer, bg="#f0f0f0").grid(row=3, column=0, columnspan=3, sticky=tk.W)
+        tk.Checkbutton(config_frame, text="Pular silêncios (VAD)", variable=self.vad, bg="#f0f0f0").grid(row=3, column=3, columnspan=3, sticky=tk.W)
+
         # Botão de processamento
         btn_frame = tk.Frame(self.root, bg="#f0f0f0")
         btn_frame.pack(pady=10)
@@ -97,6 +104,12 @@ class LegendadorApp:
             pady=10
         ).pack(pady=5)
 
+        # Progresso da renderização (por quadro, via -progress do ffmpeg)
+        self.progresso = ttk.Progressbar(self.root, orient=tk.HORIZONTAL, mode='determinate')
+        self.progresso.pack(fill=tk.X, padx=10)
+        self.progresso_label = tk.Label(self.root, text="", bg="#f0f0f0")
+        self.progresso_label.pack()
+
         # Área de log
         log_frame = tk.LabelFrame(self.root, text="Log de Processamento", bg="#f0f0f0")
         log_frame.pack(pady=5, padx=10, fill=tk.BOTH, expand=True)
@@ -120,145 +133,60 @@ class LegendadorApp:
             self.cor_legenda.set(cor[1])
             self.cor_btn.config(bg=cor[1])
 
-    def log(self, mensagem):
+    def log(self, *mensagens):
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {mensagem}\n")
+        self.log_text.insert(tk.END, "".join(f"[{timestamp}] {mensagem}\n" for mensagem in mensagens))
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
-
-    def transcrever_video(self, video_path):
-        model = whisper.load_model(self.modelo_whisper.get())
-        result = model.transcribe(video_path)
-        return result["segments"]
 
-    def listar_fontes_imagemagick(self):
+    def aplicar_eventos(self, lote):
+        """Mostra, na thread do Tk, o que a thread de processamento publicou."""
+        if lote.logs:
+            self.log(*lote.logs)
+        for nome, percentual in lote.file_progress.items():
+            self.progresso["value"] = percentual
+            self.progresso_label.config(text=f"Renderizando {nome}: {percentual:.0f}%")
+        for tipo, dados in lote.other:
+            if tipo == "info":
+                messagebox.showinfo(dados["titulo"], dados["mensagem"])
+            elif tipo == "aviso":
+                messagebox.showwarning(dados["titulo"], dados["mensagem"])
+
+    def listar_fontes(self):
+        renderizador = self.renderizador.get()
         try:
-            resultado = subprocess.run(
-                ['magick', '-list', 'font'],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            saida = resultado.stdout
-            nomes_fontes = []
-            for linha in saida.splitlines():
-                if linha.strip().startswith("Font:"):
-                    partes = linha.split(":", 1)
-                    if len(partes) == 2:
-                        nome_fonte = partes[1].strip()
-                        nomes_fontes.append(nome_fonte)
-            return sorted(nomes_fontes)
+            fontes = legendas.listar_fontes(renderizador)
         except Exception as e:
-            self.log(f"Erro ao listar fontes do ImageMagick: {e}")
-            return []
-
-    def gerar_srt(self, segments, srt_path):
-        legendas = []
-
-        for i, seg in enumerate(segments):
-            start = seg['start']
-            end = seg['end']
-
-            start_time = datetime.timedelta(seconds=start)
-            end_time = datetime.timedelta(seconds=end)
-            texto = ' '.join(seg['text'].strip().split())
-
-            legenda = srt.Subtitle(
-                index=i+1,
-                start=start_time,
-                end=end_time,
-                content=texto
-            )
-            legendas.append(legenda)
+            origem = "ImageMagick" if renderizador == "moviepy" else "fontconfig (fc-list)"
+            # Chamado também antes de a área de log existir: passa pelo barramento
+            self.bus.context().log(f"Erro ao listar fontes do {origem}: {e}")
+            fontes = []
+        return fontes or [self.FONTE_PADRAO]
+
+    def estilo_atual(self):
+        return legendas.EstiloLegenda(
+            fonte=self.fonte_legenda.get(),
+            tamanho=int(self.tamanho_legenda.get()),
+            cor=self.cor_legenda.get(),
+            posicao_vertical=self.posicao_vertical.get()
+        )
 
-        with open(srt_path, "w", encoding="utf-8") as f:
-            f.write(srt.compose(legendas))
-        
-    def processar_video(self, video_path, output_path):
-        try:
-            base_name = os.path.splitext(video_path)[0]
-            srt_path = f"{base_name}.srt"
-
-            self.log("Transcrevendo áudio...")
-            segments = self.transcrever_video(video_path)
-
-            self.log("Gerando legendas SRT...")
-            self.gerar_srt(segments, srt_path)
-
-            self.log("Carregando vídeo com MoviePy...")
-            video = VideoFileClip(video_path)
-            legendas = []
-
-            fonte_nome = self.fonte_legenda.get()
-            tamanho = int(self.tamanho_legenda.get())
-            cor = self.cor_legenda.get()
-            cor_contorno = "black"  # Cor do contorno
-            espessura_contorno = 5   # Espessura do contorno
-            posicao_pct = self.posicao_vertical.get() / 100
-
-            altura_legenda = int(video.h * posicao_pct)
-
-            self.log("Renderizando legendas no vídeo...")
-
-            for seg in segments:
-                texto = seg['text'].strip()
-                if not texto:
-                    continue
-
-                # Configurações comuns para contorno e texto principal
-                text_kwargs = {
-                    'txt': texto,
-                    'fontsize': tamanho,
-                    'font': fonte_nome,
-                    'method': 'caption',  # Ou 'pango' se disponível
-                    'size': (video.w * 0.9, None),  # Largura fixa, altura automática
-                    'align': 'center',
-                    'print_cmd': True  # Debug (opcional)
-                }
-
-                # Camada de contorno (stroke externo)
-                contorno = TextClip(
-                    **text_kwargs,
-                    color=cor_contorno,
-                    stroke_color=cor_contorno,
-                    stroke_width=espessura_contorno * 2,  # Stroke mais largo
-                ).set_position(("center", altura_legenda)).set_duration(seg['end'] - seg['start']).set_start(seg['start'])
-
-                # Camada de texto principal (sem stroke)
-                texto_principal = TextClip(
-                    **text_kwargs,
-                    color=cor,
-                    stroke_width=0,  # Sem contorno
-                ).set_position(("center", altura_legenda)).set_duration(seg['end'] - seg['start']).set_start(seg['start'])
-
-                # Adiciona ambas as camadas (contorno primeiro)
-                legendas.extend([contorno, texto_principal])
-
-            video_final = CompositeVideoClip([video] + legendas)
-            video_final.write_videofile(output_path, codec="libx264", audio_codec="aac")
-
-            os.remove(srt_path)
-            return True
+    def idioma_atual(self):
+        idioma = self.idioma.get().strip()
+        return None if idioma in ("", "auto") else idioma
 
-        except Exception as e:
-            self.log(f"Erro ao processar vídeo com MoviePy: {e}")
-            return False
-
-    def cor_para_ass(self, cor_hex):
-        """Converte cor hex para formato ASS (BGR)"""
-        if cor_hex.startswith('#'):
-            cor_hex = cor_hex[1:]
-        r = int(cor_hex[0:2], 16)
-        g = int(cor_hex[2:4], 16)
-        b = int(cor_hex[4:6], 16)
-        return f"&H{b:02X}{g:02X}{r:02X}&"
+    def opcoes_atuais(self):
+        """Lê as opções da interface na thread do Tk, antes de iniciar o trabalho."""
+        return dict(
+            modelo=self.modelo_whisper.get(), estilo=self.estilo_atual(), renderizador=self.renderizador.get(),
+            idioma=self.idioma_atual(), vad=self.vad.get(), refazer=self.refazer.get()
+        )
 
     def selecionar_pasta(self):
         pasta = filedialog.askdirectory()
         if not pasta:
             return
         
-        thread = threading.Thread(target=self.processar_pasta, args=(pasta,), daemon=True)
+        thread = threading.Thread(target=self.processar_pasta, args=(pasta, self.opcoes_atuais()), daemon=True)
         thread.start()
     
     def selecionar_video(self):
@@ -269,75 +197,44 @@ class LegendadorApp:
             return
 
         pasta_origem = os.path.dirname(caminho_video)
-        nome_arquivo = Path(caminho_video).stem
-        extensao = Path(caminho_video).suffix
-
         output_dir = os.path.join(pasta_origem, "legendados")
         os.makedirs(output_dir, exist_ok=True)
 
-        output_path = os.path.join(output_dir, f"{nome_arquivo}_legendado{extensao}")
+        output_path = legendas.caminho_saida(caminho_video, output_dir)
 
-        self.log(f"\nProcessando vídeo único: {nome_arquivo + extensao}")
-        thread = threading.Thread(target=self.processar_unico, args=(caminho_video, output_path), daemon=True)
+        self.log(f"\nProcessando vídeo único: {os.path.basename(caminho_video)}")
+        thread = threading.Thread(target=self.processar_unico, args=(caminho_video, output_path, self.opcoes_atuais()), daemon=True)
         thread.start()
 
-    def processar_unico(self, video_path, output_path):
-        if os.path.exists(output_path):
-            self.log("Versão legendada já existe. Pulando.")
+    def processar_unico(self, video_path, output_path, opcoes):
+        ctx = self.bus.context()
+        if os.path.exists(output_path) and not opcoes["refazer"]:
+            ctx.log("Versão legendada já existe. Pulando.")
+            return
+        job = legendas.LegendaJob(
+            video_path, output_path, opcoes["modelo"], opcoes["estilo"], opcoes["renderizador"], opcoes["idioma"], opcoes["vad"]
+        )
+        if legendas.processar_video(job, ctx):
+            ctx.log(f"Concluído: {os.path.basename(video_path)}")
+            self.bus.emit("info", titulo="Finalizado", mensagem="Vídeo legendado com sucesso!")
         else:
-            if self.processar_video(video_path, output_path):
-                self.log(f"Concluído: {os.path.basename(video_path)}")
-                self.root.after(0, lambda: messagebox.showinfo("Finalizado", "Vídeo legendado com sucesso!"))
-            else:
-                self.log(f"Erro ao processar: {os.path.basename(video_path)}")
+            ctx.log(f"Erro ao processar: {os.path.basename(video_path)}")
 
 
-    def processar_pasta(self, pasta):
-        self.log(f"Pasta selecionada: {pasta}")
-        
-        output_dir = os.path.join(pasta, "legendados")
-        os.makedirs(output_dir, exist_ok=True)
-        self.log(f"Pasta de saída criada: {output_dir}")
-        
-        self.log("Procurando vídeos...")
-        
-        videos = []
-        for f in os.listdir(pasta):
-            file_path = os.path.join(pasta, f)
-            if os.path.isfile(file_path):
-                ext = Path(f).suffix[1:].lower()
-                if ext in self.VIDEO_EXTENSIONS:
-                    videos.append(f)
-        
-        if not videos:
-            self.root.after(0, lambda: messagebox.showwarning(
-                "Aviso", 
-                f"Nenhum vídeo encontrado na pasta. Formatos suportados: {', '.join(self.VIDEO_EXTENSIONS)}"
-            ))
+    def processar_pasta(self, pasta, opcoes):
+        output_dir = legendas.processar_pasta(
+            pasta, self.bus.context(), opcoes["modelo"], opcoes["estilo"],
+            opcoes["renderizador"], opcoes["idioma"], opcoes["refazer"], opcoes["vad"]
+        )
+
+        if output_dir is None:
+            self.bus.emit(
+                "aviso", titulo="Aviso",
+                mensagem=f"Nenhum vídeo encontrado na pasta. Formatos suportados: {', '.join(legendas.VIDEO_EXTENSIONS)}"
+            )
             return
-        
-        self.log(f"Encontrados {len(videos)} vídeos para processar.")
-        
-        for video in videos:
-            video_path = os.path.join(pasta, video)
-            output_name = f"{Path(video).stem}_legendado{Path(video).suffix}"
-            output_path = os.path.join(output_dir, output_name)
-            
-            if os.path.exists(output_path):
-                self.log(f"Pulando {video} (já existe versão legendada)")
-                continue
-            
-            self.log(f"\nProcessando: {video}")
-            if self.processar_video(video_path, output_path):
-                self.log(f"Concluído: {video}")
-            else:
-                self.log(f"Falha ao processar: {video}")
-        
-        self.log("\nProcessamento concluído!")
-        self.root.after(0, lambda: messagebox.showinfo(
-            "Finalizado", 
-            f"Todos os vídeos foram processados e salvos em:\n{output_dir}"
-        ))
+
+        self.bus.emit("info", titulo="Finalizado", mensagem=f"Todos os vídeos foram processados e salvos em:\n{output_dir}")
 
 
 if __name__ == "__main__":
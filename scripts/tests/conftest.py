@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os testes importam o pacote `core` como o CLI faz, a partir da pasta `scripts`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,72 @@
+from core import downloads
+from core.jobs import JobContext
+
+
+def _video(n, extractor="Youtube"):
+    return {"ie_key": extractor, "id": f"v{n}", "url": f"https://example.com/v{n}", "title": f"Vídeo {n}"}
+
+
+class ExtratorFalso:
+    """Faz o papel do YoutubeDL na extração flat; estas listas não têm abas a expandir."""
+
+    def extract_info(self, url, download=False):
+        raise AssertionError(f"não deveria extrair {url}")
+
+
+def _arquivo(tmp_path, *numeros):
+    archive = downloads.DownloadArchive.for_folder(str(tmp_path))
+    for n in numeros:
+        archive.add(downloads._entry_key("Youtube", f"v{n}"))
+    return archive
+
+
+def _ids(entries):
+    return [e.key.split()[-1] for e in entries]
+
+
+def test_arquivados_sao_pulados(tmp_path):
+    archive = _arquivo(tmp_path, 1, 3)
+    info = {"entries": [_video(n) for n in range(5)]}
+    assert _ids(downloads._flatten(info, ExtratorFalso(), archive)) == ["v0", "v2", "v4"]
+    archive.close()
+
+
+def test_para_cedo_depois_de_uma_sincronizacao_completa(tmp_path):
+    known = downloads.STOP_AFTER_KNOWN
+    archive = _arquivo(tmp_path, *range(1, known + 1))
+    info = {"entries": [_video(n) for n in range(known + 5)]}
+
+    def lazy():
+        # A página seguinte nunca deve ser pedida depois da parada
+        for entry in info["entries"]:
+            yield entry
+        raise AssertionError("listagem continuou depois dos já baixados")
+
+    entries = downloads._flatten({"entries": lazy()}, ExtratorFalso(), archive, stop_early=True)
+    assert _ids(entries) == ["v0"]
+    archive.close()
+
+
+def test_sem_sincronizacao_completa_percorre_a_lista_inteira(tmp_path):
+    known = downloads.STOP_AFTER_KNOWN
+    archive = _arquivo(tmp_path, *range(0, known + 2))
+    info = {"entries": [_video(n) for n in range(known + 5)]}
+    entries = downloads._flatten(info, ExtratorFalso(), archive)
+    assert _ids(entries) == [f"v{n}" for n in range(known + 2, known + 5)]
+    archive.close()
+
+
+def test_parada_antecipada_so_com_last_sync(tmp_path, monkeypatch):
+    pedidos = []
+
+    def listar(url, archive=None, stop_early=False):
+        pedidos.append(stop_early)
+        return iter([downloads.Entry(url, "youtube novo")])
+
+    monkeypatch.setattr(downloads, "iter_entries", listar)
+    monkeypatch.setattr(downloads, "download_entries", lambda entries, *a, **k: ([], []))
+    ctx = JobContext(log=lambda m: None)
+
+    downloads.download(["canal"], str(tmp_path), ctx, sync=True)
+    downloads.download(["canal"], str(tmp_path), ctx, sync=True)
+    assert pedidos == [False, True]
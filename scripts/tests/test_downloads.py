@@ -0,0 +1,188 @@
+import functools
+import http.server
+import os
+import threading
+
+import pytest
+import yt_dlp
+
+from core import downloads
+from core.jobs import JobContext
+
+
+def _video(n, extractor="Youtube"):
+    return {"ie_key": extractor, "id": f"v{n}", "url": f"https://example.com/v{n}", "title": f"Vídeo {n}"}
+
+
+class ExtratorFalso:
+    """Faz o papel do YoutubeDL na extração flat: devolve as abas cadastradas por URL."""
+
+    def __init__(self, abas=None):
+        self.abas = abas or {}
+        self.pedidos = []
+
+    def extract_info(self, url, download=False):
+        self.pedidos.append(url)
+        return {"entries": self.abas[url]}
+
+
+def _ids(entries):
+    return [e.key.split()[-1] for e in entries]
+
+
+def test_sem_arquivo_lista_tudo():
+    info = {"entries": [_video(n) for n in range(3)] + [None, {"ie_key": "Youtube", "id": "x"}]}
+    entries = list(downloads._flatten(info, ExtratorFalso()))
+    assert _ids(entries) == ["v0", "v1", "v2"]
+    assert entries[0].title == "Vídeo 0"
+
+
+def test_abas_do_canal_sao_expandidas():
+    canal = {"entries": [
+        {"ie_key": "YoutubeTab", "url": "https://example.com/videos"},
+        {"ie_key": "YoutubeTab", "url": "https://example.com/shorts"},
+    ]}
+    ydl = ExtratorFalso({
+        "https://example.com/videos": [_video(1), _video(2)],
+        "https://example.com/shorts": [_video(3)],
+    })
+    assert _ids(downloads._flatten(canal, ydl)) == ["v1", "v2", "v3"]
+    assert ydl.pedidos == ["https://example.com/videos", "https://example.com/shorts"]
+
+
+class YoutubeDLFalso:
+    """Substitui o YoutubeDL no download: registra opções, instâncias e threads.
+
+    Links com "falha" devolvem código de erro, com "explode" levantam exceção;
+    os demais "baixam" um arquivo vazio com o nome do link e avisam o hook.
+    Com `barreira`, cada download espera outro estar em andamento ao mesmo tempo.
+    """
+
+    criados = []
+    barreira = None
+    lock = threading.Lock()
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.threads = set()
+        with self.lock:
+            self.criados.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def download(self, urls):
+        self.threads.add(threading.get_ident())
+        if self.barreira:
+            self.barreira.wait()
+        url = urls[0]
+        if "falha" in url:
+            return 1
+        if "explode" in url:
+            raise RuntimeError("conexão recusada")
+        caminho = os.path.join(os.path.dirname(self.opts["outtmpl"]), url.rsplit("/", 1)[-1] + ".mp4")
+        open(caminho, "wb").close()
+        for hook in self.opts["progress_hooks"]:
+            hook({"status": "finished", "filename": caminho})
+        return 0
+
+
+@pytest.fixture
+def ydl_falso(monkeypatch):
+    monkeypatch.setattr(YoutubeDLFalso, "criados", [])
+    monkeypatch.setattr(yt_dlp, "YoutubeDL", YoutubeDLFalso)
+    return YoutubeDLFalso
+
+
+def _entradas(*nomes):
+    return [downloads.Entry(f"https://example.com/{nome}", f"youtube {nome}", nome) for nome in nomes]
+
+
+def test_downloads_simultaneos_com_um_youtubedl_por_entrada(tmp_path, ydl_falso, monkeypatch):
+    # Sem dois downloads ao mesmo tempo, a barreira estoura o tempo e o teste falha
+    monkeypatch.setattr(ydl_falso, "barreira", threading.Barrier(2, timeout=5))
+    baixados, erros = downloads.download_entries(_entradas("a", "b", "c", "d"), str(tmp_path), JobContext(), workers=2)
+
+    assert erros == []
+    assert sorted(os.path.basename(p) for p in baixados) == ["a.mp4", "b.mp4", "c.mp4", "d.mp4"]
+    assert len(ydl_falso.criados) == 4
+    assert all(len(ydl.threads) == 1 for ydl in ydl_falso.criados)
+    assert len(set.union(*(ydl.threads for ydl in ydl_falso.criados))) == 2
+
+
+def test_limite_de_taxa_dividido_entre_os_workers(tmp_path, ydl_falso):
+    taxa = downloads.parse_rate("2M")
+    downloads.download_entries(_entradas("a", "b", "c"), str(tmp_path), JobContext(), workers=2,
+                               rate_limit=taxa, fragments=8)
+
+    assert taxa == 2 * 1024 ** 2
+    assert {ydl.opts["ratelimit"] for ydl in ydl_falso.criados} == {taxa // 2}
+    assert {ydl.opts["concurrent_fragment_downloads"] for ydl in ydl_falso.criados} == {8}
+
+
+def test_limite_de_taxa_dividido_so_pelos_workers_usados(tmp_path, ydl_falso):
+    # Mais workers que entradas: o limite do lote vai inteiro para o único download
+    downloads.download_entries(_entradas("a"), str(tmp_path), JobContext(), workers=4, rate_limit=1000)
+    assert ydl_falso.criados[0].opts["ratelimit"] == 1000
+
+
+def test_sem_limite_de_taxa(tmp_path, ydl_falso):
+    downloads.download_entries(_entradas("a", "b"), str(tmp_path), JobContext(), workers=2,
+                               rate_limit=downloads.parse_rate("0"))
+    assert all("ratelimit" not in ydl.opts for ydl in ydl_falso.criados)
+
+
+def test_erro_numa_entrada_nao_derruba_as_outras(tmp_path, ydl_falso):
+    archive = downloads.DownloadArchive.for_folder(str(tmp_path))
+    progresso, arquivos = [], []
+    ctx = JobContext(log=lambda m: None, progress=lambda feito, total, rotulo: progresso.append((feito, total)))
+
+    baixados, erros = downloads.download_entries(
+        _entradas("a", "falha", "explode", "b"), str(tmp_path), ctx, workers=2,
+        archive=archive, channel="canal", on_file=arquivos.append
+    )
+
+    assert sorted(os.path.basename(p) for p in baixados) == ["a.mp4", "b.mp4"]
+    assert sorted(arquivos) == sorted(baixados)
+    assert len(erros) == 2
+    assert any("falha" in e for e in erros) and any("conexão recusada" in e for e in erros)
+    assert [archive.has(f"youtube {n}") for n in ("a", "falha", "explode", "b")] == [True, False, False, True]
+    assert progresso[-1] == (4, 4) and len(progresso) == 4
+    archive.close()
+
+
+class _Silencioso(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    """Servidor HTTP local com dois arquivos de mídia, no lugar de um site de vídeos."""
+    pasta = tmp_path / "site"
+    pasta.mkdir()
+    for nome in ("um", "dois"):
+        (pasta / f"{nome}.mp4").write_bytes(os.urandom(64 * 1024))
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_Silencioso, directory=str(pasta)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield pasta, f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_real_de_um_servidor_local(tmp_path, servidor):
+    pasta, base = servidor
+    destino = tmp_path / "baixados"
+    destino.mkdir()
+    entradas = [downloads.Entry(f"{base}/{nome}.mp4", f"generic {nome}", nome) for nome in ("um", "dois", "nao-existe")]
+
+    baixados, erros = downloads.download_entries(entradas, str(destino), JobContext(log=lambda m: None),
+                                                 workers=2, rate_limit=downloads.parse_rate("10M"))
+
+    assert sorted(os.path.basename(p) for p in baixados) == ["dois.mp4", "um.mp4"]
+    for caminho in baixados:
+        assert open(caminho, "rb").read() == (pasta / os.path.basename(caminho)).read_bytes()
+    assert len(erros) == 1 and "nao-existe" in erros[0]
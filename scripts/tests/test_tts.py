@@ -0,0 +1,100 @@
+import asyncio
+import os
+
+from core import tts
+from core.jobs import JobContext
+
+
+def _textos(pasta, *nomes):
+    arquivos = []
+    for nome in nomes:
+        caminho = os.path.join(pasta, f"{nome}.txt")
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(f"texto de {nome}")
+        arquivos.append(caminho)
+    return arquivos
+
+
+class SinteseFalsa:
+    """Substitui o edge-tts: falha as primeiras `falhas[nome]` chamadas de cada texto."""
+
+    def __init__(self, falhas=None):
+        self.falhas = dict(falhas or {})
+        self.chamadas = {}
+        self.em_voo = 0
+        self.pico = 0
+
+    async def __call__(self, texto, saida):
+        nome = texto.split()[-1]
+        self.chamadas[nome] = self.chamadas.get(nome, 0) + 1
+        self.em_voo += 1
+        self.pico = max(self.pico, self.em_voo)
+        try:
+            await asyncio.sleep(0.01)
+            if self.falhas.get(nome, 0) > 0:
+                self.falhas[nome] -= 1
+                raise ConnectionError("serviço indisponível")
+            with open(saida, "wb") as f:
+                f.write(b"mp3")
+        finally:
+            self.em_voo -= 1
+
+
+def _lote(arquivos, saida, sintese, **kwargs):
+    kwargs.setdefault("espera_base", 0)
+    return asyncio.run(tts.converter_lote(arquivos, saida, sintese, JobContext(log=lambda m: None), **kwargs))
+
+
+def test_nova_tentativa_apos_falha_transitoria(tmp_path):
+    arquivos = _textos(tmp_path, "a", "b")
+    saida = tmp_path / "mp3"
+    saida.mkdir()
+    sintese = SinteseFalsa({"a": 2})
+
+    assert _lote(arquivos, str(saida), sintese, tentativas=3) == {"ok": 2}
+    assert sintese.chamadas == {"a": 3, "b": 1}
+    assert sorted(p.name for p in saida.glob("*.mp3")) == ["a.mp3", "b.mp3"]
+    assert not [p for p in saida.iterdir() if ".part." in p.name]
+
+
+def test_desiste_apos_esgotar_tentativas(tmp_path):
+    arquivos = _textos(tmp_path, "a")
+    saida = tmp_path / "mp3"
+    saida.mkdir()
+    sintese = SinteseFalsa({"a": 5})
+
+    assert _lote(arquivos, str(saida), sintese, tentativas=2) == {"erro": 1}
+    assert sintese.chamadas == {"a": 2}
+    assert not list(saida.glob("*.mp3"))
+
+
+def test_retomar_refaz_so_o_que_falhou(tmp_path):
+    arquivos = _textos(tmp_path, "a", "b", "c")
+    saida = tmp_path / "mp3"
+    saida.mkdir()
+    assert _lote(arquivos, str(saida), SinteseFalsa({"b": 9}), tentativas=1) == {"ok": 2, "erro": 1}
+
+    sintese = SinteseFalsa()
+    assert _lote([], str(saida), sintese, retomar=True) == {"ok": 1}
+    assert sintese.chamadas == {"b": 1}
+
+
+def test_lote_repetido_pula_os_prontos(tmp_path):
+    arquivos = _textos(tmp_path, "a", "b")
+    saida = tmp_path / "mp3"
+    saida.mkdir()
+    _lote(arquivos, str(saida), SinteseFalsa())
+
+    sintese = SinteseFalsa()
+    assert _lote(arquivos, str(saida), sintese) == {"pulado": 2}
+    assert sintese.chamadas == {}
+
+
+def test_limite_de_requisicoes_simultaneas(tmp_path):
+    arquivos = _textos(tmp_path, *"abcdefgh")
+    saida = tmp_path / "mp3"
+    saida.mkdir()
+    sintese = SinteseFalsa()
+
+    assert _lote(arquivos, str(saida), sintese, max_simultaneos=3) == {"ok": 8}
+    assert sintese.pico == 3
@@ -5,6 +5,9 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, scrolledtext
 import edge_tts
 
+from core import tts
+from core.events import EventBus, pump_tk
+
 class EdgeTTSApp:
     def __init__(self, root):
         self.root = root
@@ -50,6 +53,11 @@ class EdgeTTSApp:
         self.speed_entry.insert(0, "0")
         self.speed_entry.grid(row=3, column=1, padx=5, sticky=tk.W)
 
+        # Requisições simultâneas
+        ttk.Label(config_frame, text="Requisições simultâneas:").grid(row=4, column=0, padx=5, sticky=tk.E)
+        self.max_simultaneos = tk.IntVar(value=tts.MAX_SIMULTANEOS_PADRAO)
+        ttk.Spinbox(config_frame, from_=1, to=32, textvariable=self.max_simultaneos, width=8).grid(row=4, column=1, padx=5, sticky=tk.W)
+
         # Progresso
         progress_frame = ttk.Frame(main_frame)
         progress_frame.pack(fill=tk.X, pady=5)
@@ -73,17 +81,32 @@ class EdgeTTSApp:
         self.log_area.pack(fill=tk.BOTH, expand=True)
 
         self.toggle_buttons(False)
+        self.bus = EventBus()
+        pump_tk(self.root, self.bus, self.apply_events)
 
     def toggle_buttons(self, enable):
         state = "normal" if enable else "disabled"
         self.convert_btn.config(state=state)
 
-    def log(self, message):
+    def log(self, *messages):
         self.log_area.config(state="normal")
-        self.log_area.insert(tk.END, message + "\n")
+        self.log_area.insert(tk.END, "".join(message + "\n" for message in messages))
         self.log_area.see(tk.END)
         self.log_area.config(state="disabled")
-        self.root.update_idletasks()
+
+    def apply_events(self, batch):
+        """Aplica na thread do Tk o que as threads de trabalho publicaram."""
+        if batch.logs:
+            self.log(*batch.logs)
+        if batch.progress:
+            self.update_progress(*batch.progress)
+        for kind, data in batch.other:
+            if kind == "voices":
+                self.set_voices(data["voices"])
+            elif kind == "error":
+                messagebox.showerror("Erro", data["message"])
+            elif kind == "finished":
+                self.finish_conversion(data["status"])
 
     def clear_log(self):
         self.log_area.config(state="normal")
@@ -114,48 +137,47 @@ class EdgeTTSApp:
             try:
                 voices = await edge_tts.list_voices()
                 filtered = [v for v in voices if v["Locale"].startswith(("pt", "en"))]
-                self.voices = sorted(filtered, key=lambda x: (x["Locale"], x["Gender"]))
-                self.voice_map = {f'{v["ShortName"]} - {v["Gender"]} ({v["Locale"]})': v["ShortName"] for v in self.voices}
-                self.voice_combo["values"] = list(self.voice_map.keys())
-                if self.voice_map:
-                    self.voice_combo.current(0)
-                    if self.folder_path or self.file_path:
-                        self.toggle_buttons(True)
-                    self.log(f"✅ {len(self.voices)} vozes carregadas")
+                self.bus.emit("voices", voices=sorted(filtered, key=lambda x: (x["Locale"], x["Gender"])))
             except Exception as e:
-                self.log(f"❌ Erro ao carregar vozes: {str(e)}")
-                messagebox.showerror("Erro", f"Não foi possível carregar as vozes: {str(e)}")
+                self.bus.emit("log", message=f"❌ Erro ao carregar vozes: {str(e)}")
+                self.bus.emit("error", message=f"Não foi possível carregar as vozes: {str(e)}")
 
         threading.Thread(target=lambda: asyncio.run(fetch()), daemon=True).start()
 
+    def set_voices(self, voices):
+        self.voices = voices
+        self.voice_map = {f'{v["ShortName"]} - {v["Gender"]} ({v["Locale"]})': v["ShortName"] for v in self.voices}
+        self.voice_combo["values"] = list(self.voice_map.keys())
+        if self.voice_map:
+            self.voice_combo.current(0)
+            if self.folder_path or self.file_path:
+                self.toggle_buttons(True)
+            self.log(f"✅ {len(self.voices)} vozes carregadas")
+
     def test_voice(self):
         voice_display = self.voice_combo.get()
         if not voice_display or voice_display not in self.voice_map:
             messagebox.showwarning("Aviso", "Selecione uma voz primeiro.")
             return
         text = "Esta é uma prévia de como ficará a voz selecionada."
-        threading.Thread(target=self.preview_voice, args=(text,), daemon=True).start()
-
-    def preview_voice(self, text):
-        voice_short = self.voice_map[self.voice_combo.get()]
-        speed = self.get_speed()
+        threading.Thread(
+            target=self.preview_voice, args=(text, self.voice_map[voice_display], self.get_speed()), daemon=True
+        ).start()
 
+    def preview_voice(self, text, voice_short, speed):
         async def speak():
             try:
                 communicate = edge_tts.Communicate(text, voice=voice_short, rate=speed)
                 await communicate.save("preview.mp3")
                 os.startfile("preview.mp3")
             except Exception as e:
-                self.log(f"❌ Erro na prévia: {str(e)}")
+                self.bus.emit("log", message=f"❌ Erro na prévia: {str(e)}")
 
         asyncio.run(speak())
 
     def get_speed(self):
         try:
-            speed_percent = int(self.speed_entry.get().strip())
-            if not -100 <= speed_percent <= 100:
-                raise ValueError()
-            return f"{'+' if speed_percent >= 0 else ''}{speed_percent}%"
+            return tts.formatar_velocidade(int(self.speed_entry.get().strip()))
         except ValueError:
             messagebox.showerror("Erro", "Velocidade inválida. Use um valor entre -100 e +100.")
             return "+0%"
@@ -163,81 +185,57 @@ class EdgeTTSApp:
     def start_conversion(self):
         if self.is_processing:
             return
+        voice_display = self.voice_combo.get()
+        if voice_display not in self.voice_map:
+            messagebox.showerror("Erro", "Selecione uma voz.")
+            return
         self.is_processing = True
         self.toggle_buttons(False)
-        threading.Thread(target=self.convert_all, daemon=True).start()
-
-    def convert_all(self):
+        threading.Thread(
+            target=self.convert_all,
+            args=(self.voice_map[voice_display], self.get_speed(), max(1, self.max_simultaneos.get())),
+            daemon=True
+        ).start()
+
+    def convert_all(self, voice_short, speed, max_simultaneos):
+        ctx = self.bus.context()
         try:
-            voice_display = self.voice_combo.get()
-            if voice_display not in self.voice_map:
-                messagebox.showerror("Erro", "Selecione uma voz.")
-                return
-
-            voice_short = self.voice_map[voice_display]
-            speed = self.get_speed()
-
             output_folder = os.path.join(self.folder_path, "audios_gerados")
-            os.makedirs(output_folder, exist_ok=True)
 
             # Detecta arquivos
             if self.file_path:
                 arquivos = [self.file_path]
             else:
-                arquivos = [os.path.join(self.folder_path, f) for f in os.listdir(self.folder_path)
-                            if f.lower().endswith((".txt", ".md", ".docx", ".pdf"))]
+                arquivos = tts.listar_textos(self.folder_path)
 
             if not arquivos:
-                self.log("ℹ️ Nenhum arquivo encontrado para conversão.")
+                ctx.log("ℹ️ Nenhum arquivo encontrado para conversão.")
+                self.bus.emit("finished", status="Pronto")
                 return
 
-            self.progress["maximum"] = len(arquivos)
-            self.progress["value"] = 0
-
-            async def run_conversion():
-                for i, file_path in enumerate(arquivos):
-                    if not self.is_processing:
-                        break
-
-                    filename = os.path.basename(file_path)
-                    output = os.path.join(output_folder, f"{os.path.splitext(filename)[0]}.mp3")
-
-                    self.progress_label.config(text=f"Processando: {filename}")
-                    self.progress["value"] = i + 1
-                    self.root.update_idletasks()
-
-                    if os.path.exists(output):
-                        self.log(f"⏩ Pulando (já existe): {filename}")
-                        continue
-
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            text = f.read().strip()
-
-                        if not text:
-                            self.log(f"⚠️ Arquivo vazio: {filename}")
-                            continue
-
-                        communicate = edge_tts.Communicate(text, voice=voice_short, rate=speed)
-                        await communicate.save(output)
-                        self.log(f"✅ Finalizado: {filename}")
-
-                    except Exception as e:
-                        self.log(f"❌ Erro em {filename}: {str(e)}")
-
-                self.progress_label.config(text="Concluído")
-                self.is_processing = False
-                self.toggle_buttons(True)
-                self.log("🎉 Conversão finalizada!")
-                self.root.bell()
-
-            asyncio.run(run_conversion())
+            asyncio.run(tts.converter_lote(
+                arquivos, output_folder, tts.sintetizador_edge(voice_short, speed), ctx,
+                max_simultaneos=max_simultaneos
+            ))
+            ctx.log("🎉 Conversão finalizada!")
+            self.bus.emit("finished", status="Concluído")
 
         except Exception as e:
-            self.log(f"❌ Erro inesperado: {str(e)}")
-            self.is_processing = False
-            self.toggle_buttons(True)
-            self.progress_label.config(text="Erro")
+            ctx.log(f"❌ Erro inesperado: {str(e)}")
+            self.bus.emit("finished", status="Erro")
+
+    def finish_conversion(self, status):
+        self.progress_label.config(text=status)
+        self.is_processing = False
+        self.toggle_buttons(True)
+        if status == "Concluído":
+            self.root.bell()
+
+    def update_progress(self, done, total, label=None):
+        self.progress["maximum"] = total
+        self.progress["value"] = done
+        if label:
+            self.progress_label.config(text=label)
 
     def open_output_folder(self):
         if not self.folder_path:
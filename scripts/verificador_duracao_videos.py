@@ -1,10 +1,11 @@
-import os
-import subprocess
 import shutil
-from datetime import timedelta
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, scrolledtext
 
+from core import duracao
+from core.events import EventBus, pump_tk
+
 class VideoDurationChecker:
     def __init__(self, root):
         self.root = root
@@ -15,9 +16,13 @@ class VideoDurationChecker:
         # Variáveis
         self.pasta_videos = tk.StringVar()
         self.duracao_maxima = tk.IntVar(value=180)  # 3 minutos padrão
+        self.sondagens = tk.IntVar(value=duracao.WORKERS_PADRAO)
+        self.somente_relatorio = tk.BooleanVar(value=False)
+        self.eventos = EventBus()
         
         # Configurar interface
         self.setup_ui()
+        pump_tk(self.root, self.eventos, self.aplicar_eventos)
         
     def setup_ui(self):
         # Frame principal
@@ -42,8 +47,19 @@ class VideoDurationChecker:
         tk.Label(main_frame, text="Duração Máxima (segundos):").grid(row=2, column=0, sticky="w", pady=5)
         tk.Entry(main_frame, textvariable=self.duracao_maxima, width=10).grid(row=2, column=1, sticky="w", pady=5)
         
+        # Opções de varredura
+        opcoes_frame = tk.Frame(main_frame)
+        opcoes_frame.grid(row=3, column=0, columnspan=2, sticky="w", pady=5)
+        tk.Label(opcoes_frame, text="Sondagens simultâneas:").pack(side=tk.LEFT)
+        ttk.Spinbox(opcoes_frame, from_=1, to=64, textvariable=self.sondagens, width=5).pack(side=tk.LEFT, padx=5)
+        tk.Checkbutton(
+            opcoes_frame,
+            text="Somente relatório (não excluir, salvar CSV/JSON)",
+            variable=self.somente_relatorio
+        ).pack(side=tk.LEFT, padx=15)
+        
         # Botão de processamento
-        tk.Button(
+        self.btn_verificar = tk.Button(
             main_frame, 
             text="Verificar Vídeos", 
             command=self.verificar_videos,
@@ -51,10 +67,11 @@ class VideoDurationChecker:
             fg="white",
             padx=20,
             pady=10
-        ).grid(row=3, column=0, columnspan=2, pady=20)
+        )
+        self.btn_verificar.grid(row=4, column=0, columnspan=2, pady=20)
         
         # Área de log
-        tk.Label(main_frame, text="Log de Processamento:").grid(row=4, column=0, sticky="w", pady=5)
+        tk.Label(main_frame, text="Log de Processamento:").grid(row=5, column=0, sticky="w", pady=5)
         
         self.log_text = scrolledtext.ScrolledText(
             main_frame,
@@ -63,7 +80,7 @@ class VideoDurationChecker:
             height=20,
             font=("Consolas", 10)
         )
-        self.log_text.grid(row=5, column=0, columnspan=2, sticky="nsew")
+        self.log_text.grid(row=6, column=0, columnspan=2, sticky="nsew")
         
         # Barra de progresso
         self.progress = ttk.Progressbar(
@@ -72,11 +89,13 @@ class VideoDurationChecker:
             length=400,
             mode='determinate'
         )
-        self.progress.grid(row=6, column=0, columnspan=2, pady=10, sticky="ew")
+        self.progress.grid(row=7, column=0, columnspan=2, pady=10, sticky="ew")
+        self.velocidade_label = tk.Label(main_frame, text="")
+        self.velocidade_label.grid(row=8, column=0, columnspan=2, sticky="w")
         
         # Configurar expansão
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(5, weight=1)
+        main_frame.rowconfigure(6, weight=1)
         
     def selecionar_pasta(self):
         pasta = filedialog.askdirectory()
@@ -84,33 +103,34 @@ class VideoDurationChecker:
             self.pasta_videos.set(pasta)
             self.log("Pasta selecionada: " + pasta)
     
-    def log(self, mensagem):
-        self.log_text.insert(tk.END, mensagem + "\n")
+    def log(self, *mensagens):
+        self.log_text.insert(tk.END, "".join(mensagem + "\n" for mensagem in mensagens))
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
-    
-    def obter_duracao_video(self, caminho_video):
-        """Obtém a duração do vídeo em segundos usando ffprobe"""
-        try:
-            cmd = [
-                'ffprobe', '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                caminho_video
-            ]
-            
-            resultado = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return float(resultado.stdout.strip())
-        except subprocess.CalledProcessError as e:
-            self.log(f"Erro ao verificar {os.path.basename(caminho_video)}: {e.stderr}")
-            return None
-        except Exception as e:
-            self.log(f"Erro inesperado com {os.path.basename(caminho_video)}: {e}")
-            return None
     
     def formatar_duracao(self, segundos):
         """Formata segundos para formato HH:MM:SS"""
-        return str(timedelta(seconds=segundos)).split('.')[0]
+        return duracao.formatar_duracao(segundos)
+    
+    def atualizar_progresso(self, feitos, total, rotulo=None):
+        self.progress['maximum'] = total
+        self.progress['value'] = feitos
+        if rotulo:
+            self.velocidade_label.config(text=rotulo)
+    
+    def aplicar_eventos(self, lote):
+        """Aplica na interface os eventos enviados pela thread de varredura."""
+        if lote.logs:
+            self.log(*lote.logs)
+        if lote.progress:
+            self.atualizar_progresso(*lote.progress)
+        for evento, dados in lote.other:
+            if evento == "concluido":
+                self.btn_verificar.config(state=tk.NORMAL)
+                if dados["analisados"]:
+                    messagebox.showinfo("Concluído", "Processamento finalizado!")
+            elif evento == "erro":
+                self.btn_verificar.config(state=tk.NORMAL)
+                messagebox.showerror("Erro", f"Ocorreu um erro: {dados['mensagem']}")
     
     def verificar_videos(self):
         if not self.pasta_videos.get():
@@ -121,65 +141,29 @@ class VideoDurationChecker:
             messagebox.showerror("Erro", "ffprobe não encontrado. Instale o FFmpeg primeiro.")
             return
         
-        self.log("\n" + "="*50)
-        self.log(f"Verificando vídeos em: {self.pasta_videos.get()}")
-        self.log(f"Duração máxima permitida: {self.duracao_maxima.get()}s ({self.formatar_duracao(self.duracao_maxima.get())})")
+        relatorio_path = None
+        if self.somente_relatorio.get():
+            relatorio_path = filedialog.asksaveasfilename(
+                title="Salvar relatório",
+                defaultextension=".csv",
+                filetypes=[("CSV", "*.csv"), ("JSON", "*.json")]
+            )
+            if not relatorio_path:
+                return
         
+        self.btn_verificar.config(state=tk.DISABLED)
+        threading.Thread(
+            target=self.varrer,
+            args=(self.pasta_videos.get(), self.duracao_maxima.get(), self.sondagens.get(), relatorio_path),
+            daemon=True
+        ).start()
+    
+    def varrer(self, pasta, duracao_maxima, sondagens, relatorio_path):
         try:
-            videos = [
-                f for f in os.listdir(self.pasta_videos.get()) 
-                if f.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))
-            ]
-            total_videos = len(videos)
-            
-            if total_videos == 0:
-                self.log("Nenhum vídeo encontrado na pasta!")
-                return
-            
-            self.log(f"\nEncontrados {total_videos} vídeos para análise...")
-            
-            excluidos = 0
-            erros = 0
-            self.progress['maximum'] = total_videos
-            self.progress['value'] = 0
-            
-            for i, video in enumerate(videos):
-                caminho = os.path.join(self.pasta_videos.get(), video)
-                try:
-                    duracao = self.obter_duracao_video(caminho)
-                    self.progress['value'] = i + 1
-                    self.root.update_idletasks()
-                    
-                    if duracao is None:
-                        erros += 1
-                        continue
-                    
-                    self.log(f"\n{video}: {self.formatar_duracao(duracao)}")
-                    
-                    if duracao > self.duracao_maxima.get():
-                        self.log("EXCLUINDO (maior que o limite)")
-                        os.remove(caminho)
-                        excluidos += 1
-                    else:
-                        self.log("OK (dentro do limite)")
-                        
-                except Exception as e:
-                    self.log(f"Erro ao processar {video}: {e}")
-                    erros += 1
-            
-            # Relatório final
-            self.log("\n" + "="*50)
-            self.log("RELATÓRIO FINAL:")
-            self.log(f"- Vídeos analisados: {total_videos}")
-            self.log(f"- Vídeos excluídos: {excluidos}")
-            self.log(f"- Vídeos mantidos: {total_videos - excluidos - erros}")
-            self.log(f"- Erros encontrados: {erros}")
-            self.log("="*50)
-            
-            messagebox.showinfo("Concluído", "Processamento finalizado!")
-            
+            relatorio = duracao.verificar_videos(pasta, duracao_maxima, self.eventos.context(), sondagens, relatorio_path)
+            self.eventos.emit("concluido", analisados=relatorio["analisados"] + relatorio["erros"])
         except Exception as e:
-            messagebox.showerror("Erro", f"Ocorreu um erro: {str(e)}")
+            self.eventos.emit("erro", mensagem=str(e))
 
 if __name__ == "__main__":
     root = tk.Tk()
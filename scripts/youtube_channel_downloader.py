@@ -1,8 +1,9 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import yt_dlp as ytdlp
-import moviepy as mp
-import os
+import threading
+
+from core import downloads
+from core.events import EventBus, pump_tk
 
 def download_from_channel():
     url = url_entry.get().strip()
@@ -12,79 +13,73 @@ def download_from_channel():
         messagebox.showwarning("Aviso", "Por favor, insira a URL do canal do YouTube.")
         return
 
+    try:
+        rate_limit = downloads.parse_rate(rate_entry.get())
+    except ValueError as e:
+        messagebox.showerror("Erro", str(e))
+        return
+
     save_path = filedialog.askdirectory(title="Escolha a pasta de destino")
     if not save_path:
         return
 
     download_button.config(state=tk.DISABLED)
-    root.update()
-
-    # Corrige a URL se for @handle
-    if '@' in url:
-        try:
-            with ytdlp.YoutubeDL({'quiet': True}) as ydl:
-                info = ydl.extract_info(url, download=False)
-                url = f"https://www.youtube.com/channel/{info['channel_id']}"
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao acessar o canal: {e}")
-            download_button.config(state=tk.NORMAL)
-            return
-
-    ydl_opts = {
-        'format': 'bestaudio/best' if output_format == 'mp3' else 'best',
-        'outtmpl': os.path.join(save_path, '%(title)s.%(ext)s'),
-        'ignoreerrors': True,
-        'quiet': True,
-        'no_warnings': True,
-        'progress_hooks': [],
-    }
-
-    downloaded_files = []
-    errors = []
-
-    def progress_hook(d):
-        if d['status'] == 'finished':
-            downloaded_files.append(d['filename'])
+    status_label.config(text="Listando vídeos do canal...")
 
-    ydl_opts['progress_hooks'].append(progress_hook)
+    # O download roda fora da thread do Tk; o andamento chega pelo barramento
+    threading.Thread(
+        target=run_download,
+        args=(url, save_path, output_format, max(1, workers_var.get()), rate_limit, sync_var.get()),
+        daemon=True
+    ).start()
 
+def run_download(url, save_path, output_format, workers, rate_limit, sync):
+    # Corrige a URL se for @handle
     try:
-        with ytdlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-
-        if output_format == 'mp3':
-            converted = 0
-            for file_path in downloaded_files:
-                ext = os.path.splitext(file_path)[1].lower()
-                if ext != '.mp3':
-                    mp3_file_path = os.path.splitext(file_path)[0] + '.mp3'
-                    try:
-                        audio_clip = mp.AudioFileClip(file_path)
-                        audio_clip.write_audiofile(mp3_file_path, verbose=False, logger=None)
-                        audio_clip.close()
-                        os.remove(file_path)
-                        converted += 1
-                    except Exception as e:
-                        errors.append(f"Erro ao converter {file_path}: {e}")
-            msg = f"Download finalizado.\nArquivos convertidos para MP3: {converted}."
-            if errors:
-                msg += "\n\nErros:\n" + "\n".join(errors)
-            messagebox.showinfo("Sucesso", msg)
-        else:
-            messagebox.showinfo("Sucesso", f"Download finalizado.\nTotal de arquivos baixados: {len(downloaded_files)}")
+        url = downloads.resolve_channel_url(url)
+    except Exception as e:
+        bus.emit("failed", message=f"Erro ao acessar o canal: {e}")
+        return
 
+    try:
+        summary = downloads.download(
+            [url], save_path, bus.context(), output_format, workers, rate_limit, sync=sync
+        )
+        bus.emit("finished", format=output_format, **summary)
     except Exception as e:
-        messagebox.showerror("Erro", f"Erro ao baixar vídeos: {e}")
+        bus.emit("failed", message=f"Erro ao baixar vídeos: {e}")
+
+def apply_events(batch):
+    if batch.logs:
+        status_label.config(text=batch.logs[-1])
+    if batch.progress:
+        done, total, _ = batch.progress
+        status_label.config(text=f"Baixados {done} de {total}")
+    for kind, data in batch.other:
+        if kind == "finished":
+            finish_download(data)
+        elif kind == "failed":
+            messagebox.showerror("Erro", data["message"])
+            download_button.config(state=tk.NORMAL)
 
-    finally:
-        download_button.config(state=tk.NORMAL)
+def finish_download(summary):
+    download_button.config(state=tk.NORMAL)
+    status_label.config(text="Pronto")
+    errors = summary["errors"]
+    if summary["format"] == 'mp3':
+        message = f"Download finalizado.\nArquivos convertidos para MP3: {summary['converted']}."
+    else:
+        message = f"Download finalizado.\nTotal de arquivos baixados: {summary['downloaded']}"
+    if errors:
+        message += "\n\nErros:\n" + "\n".join(errors)
+    messagebox.showinfo("Sucesso", message)
 
 # GUI
 root = tk.Tk()
 root.title("YouTube Channel Downloader")
 
 window_width = 600
-window_height = 170
+window_height = 270
 screen_width = root.winfo_screenwidth()
 screen_height = root.winfo_screenheight()
 x_cordinate = int((screen_width / 2) - (window_width / 2))
@@ -100,7 +95,25 @@ format_var = tk.StringVar(value="mp4")
 tk.Radiobutton(root, text="MP4", variable=format_var, value="mp4").grid(row=1, column=1, sticky="w", padx=10)
 tk.Radiobutton(root, text="MP3", variable=format_var, value="mp3").grid(row=1, column=1, padx=100, sticky="w")
 
+tk.Label(root, text="Downloads simultâneos:").grid(row=2, column=0, padx=10, sticky="e")
+workers_var = tk.IntVar(value=downloads.WORKERS_PADRAO)
+tk.Spinbox(root, from_=1, to=16, textvariable=workers_var, width=5).grid(row=2, column=1, sticky="w", padx=10)
+
+tk.Label(root, text="Limite de taxa (ex.: 2M, vazio = sem):").grid(row=3, column=0, padx=10, sticky="e")
+rate_entry = tk.Entry(root, width=10)
+rate_entry.grid(row=3, column=1, sticky="w", padx=10)
+
+# Baixa só o que é novo desde a última vez, pelos IDs já baixados na pasta
+sync_var = tk.BooleanVar(value=True)
+tk.Checkbutton(root, text="Sincronização incremental (só vídeos novos)", variable=sync_var).grid(row=4, column=1, sticky="w", padx=10)
+
 download_button = tk.Button(root, text="Baixar todos os vídeos", command=download_from_channel)
-download_button.grid(row=2, column=0, columnspan=2, pady=15)
+download_button.grid(row=5, column=0, columnspan=2, pady=15)
+
+status_label = tk.Label(root, text="Pronto")
+status_label.grid(row=6, column=0, columnspan=2)
+
+bus = EventBus()
+pump_tk(root, bus, apply_events)
 
 root.mainloop()